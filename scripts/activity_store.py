@@ -0,0 +1,400 @@
+import argparse
+import contextlib
+import json
+import os
+import sqlite3
+import sys
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from raw_manifest import payload_digest
+from utils import load_config, utc_now
+
+# Raw payloads include GPS data, so the file lives beside the raw store and
+# never under data/, which is published.
+DEFAULT_STORE_PATH = os.path.join("activities", "raw", "activities.sqlite")
+SCHEMA_VERSION = 1
+# Normalized fields kept as real columns so aggregation and the site payload
+# can query them without decoding each row's JSON.
+ACTIVITY_COLUMNS = (
+    "date",
+    "year",
+    "type",
+    "raw_type",
+    "start_date_local",
+    "name",
+    "distance",
+    "moving_time",
+    "elevation_gain",
+)
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS raw_activities (
+    source TEXT NOT NULL,
+    id TEXT NOT NULL,
+    sha256 TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    detail TEXT,
+    generation INTEGER NOT NULL,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (source, id)
+);
+CREATE INDEX IF NOT EXISTS raw_activities_generation ON raw_activities (source, generation);
+CREATE TABLE IF NOT EXISTS activities (
+    id TEXT PRIMARY KEY,
+    date TEXT NOT NULL,
+    year INTEGER NOT NULL,
+    type TEXT NOT NULL,
+    raw_type TEXT,
+    start_date_local TEXT,
+    name TEXT,
+    distance REAL NOT NULL DEFAULT 0,
+    moving_time REAL NOT NULL DEFAULT 0,
+    elevation_gain REAL NOT NULL DEFAULT 0,
+    row TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS activities_date ON activities (date);
+CREATE INDEX IF NOT EXISTS activities_year_type ON activities (year, type);
+CREATE INDEX IF NOT EXISTS activities_type ON activities (type);
+CREATE TABLE IF NOT EXISTS sync_state (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+_ID_SEPARATOR = "\x1f"
+
+
+def activity_store_path(config: Dict[str, Any]) -> Optional[str]:
+    """Path of the SQLite store when `storage.sqlite` is enabled, else None."""
+    storage_cfg = config.get("storage", {}) or {}
+    if not bool(storage_cfg.get("sqlite", False)):
+        return None
+    return str(storage_cfg.get("sqlite_path") or DEFAULT_STORE_PATH)
+
+
+def _float(value: Any) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class ActivityStore:
+    """Raw payloads, normalized activity rows and stage state in one SQLite file.
+
+    Raw rows are keyed by (source, id) and carry a content hash; a write that
+    changes the hash stamps the row with a new generation, so a consumer that
+    remembers the last generation it processed (`get_state`) reads only what
+    changed since (`raw_changed_since`). Normalized rows keep the full JSON
+    row plus indexed date/year/type columns. Multi-statement updates run in
+    `transaction()` and either land together or not at all.
+    """
+
+    def __init__(self, path: str = DEFAULT_STORE_PATH) -> None:
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Autocommit mode; `transaction()` issues BEGIN/COMMIT explicitly.
+        self._conn = sqlite3.connect(path, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._depth = 0
+        version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+        if version > SCHEMA_VERSION:
+            self._conn.close()
+            raise ValueError(f"{path} has schema version {version}; this version supports {SCHEMA_VERSION}")
+        with self.transaction():
+            # executescript() would COMMIT first, so run the DDL one statement at a time.
+            for statement in _SCHEMA.split(";"):
+                if statement.strip():
+                    self._conn.execute(statement)
+            self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def __enter__(self) -> "ActivityStore":
+        return self
+
+    def __exit__(self, *_exc: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._conn.close()
+
+    @contextlib.contextmanager
+    def transaction(self) -> Iterator[None]:
+        """Group writes; nested calls join the outermost transaction."""
+        if self._depth:
+            self._depth += 1
+            try:
+                yield
+            finally:
+                self._depth -= 1
+            return
+        self._conn.execute("BEGIN IMMEDIATE")
+        self._depth = 1
+        try:
+            yield
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        else:
+            self._conn.execute("COMMIT")
+        finally:
+            self._depth = 0
+
+    # Stage state.
+
+    def get_state(self, key: str, default: Any = None) -> Any:
+        row = self._conn.execute("SELECT value FROM sync_state WHERE key = ?", (key,)).fetchone()
+        return json.loads(row["value"]) if row else default
+
+    def set_state(self, key: str, value: Any) -> None:
+        self._conn.execute(
+            "INSERT INTO sync_state (key, value) VALUES (?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (key, json.dumps(value, sort_keys=True)),
+        )
+
+    # Raw payloads.
+
+    def raw_generation(self, source: str) -> int:
+        row = self._conn.execute(
+            "SELECT MAX(generation) FROM raw_activities WHERE source = ?", (source,)
+        ).fetchone()
+        # Deletes can remove the newest rows; never hand out a generation twice.
+        return max(int(row[0] or 0), int(self.get_state(f"raw.{source}.generation", 0)))
+
+    def put_raw(
+        self, source: str, items: Iterable[Tuple[str, Any, Optional[Dict[str, Any]]]]
+    ) -> int:
+        """Upsert `(id, payload, detail)` triples; returns how many changed.
+
+        All changed rows of one call share a new generation number.
+        """
+        changed = 0
+        with self.transaction():
+            generation = self.raw_generation(source) + 1
+            known = {
+                row["id"]: row["sha256"]
+                for row in self._conn.execute("SELECT id, sha256 FROM raw_activities WHERE source = ?", (source,))
+            }
+            now = utc_now().isoformat()
+            for activity_id, payload, detail in items:
+                activity_id = str(activity_id)
+                digest, _size = payload_digest({"payload": payload, "detail": detail or None})
+                if known.get(activity_id) == digest:
+                    continue
+                self._conn.execute(
+                    "INSERT INTO raw_activities (source, id, sha256, payload, detail, generation, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT(source, id) DO UPDATE SET sha256 = excluded.sha256, payload = excluded.payload, "
+                    "detail = excluded.detail, generation = excluded.generation, updated_at = excluded.updated_at",
+                    (
+                        source,
+                        activity_id,
+                        digest,
+                        json.dumps(payload, sort_keys=True),
+                        json.dumps(detail, sort_keys=True) if detail else None,
+                        generation,
+                        now,
+                    ),
+                )
+                known[activity_id] = digest
+                changed += 1
+        return changed
+
+    def raw_changed_since(
+        self, source: str, generation: int = 0
+    ) -> Iterator[Tuple[str, Any, Dict[str, Any]]]:
+        """`(id, payload, detail)` for raw rows written after `generation`."""
+        cursor = self._conn.execute(
+            "SELECT id, payload, detail FROM raw_activities WHERE source = ? AND generation > ? ORDER BY id",
+            (source, int(generation)),
+        )
+        for row in cursor:
+            yield row["id"], json.loads(row["payload"]), json.loads(row["detail"]) if row["detail"] else {}
+
+    def delete_raw(self, source: str, activity_ids: Iterable[str]) -> int:
+        with self.transaction():
+            self.set_state(f"raw.{source}.generation", self.raw_generation(source))
+            return sum(
+                self._conn.execute(
+                    "DELETE FROM raw_activities WHERE source = ? AND id = ?", (source, str(activity_id))
+                ).rowcount
+                for activity_id in activity_ids
+            )
+
+    def delete_activities(self, source: str, activity_ids: Iterable[str]) -> int:
+        """Drop the raw payloads and normalized rows of deleted activities; returns rows removed."""
+        activity_ids = sorted({str(activity_id) for activity_id in activity_ids})
+        with self.transaction():
+            removed = self.delete_raw(source, activity_ids)
+            for activity_id in activity_ids:
+                removed += self._conn.execute("DELETE FROM activities WHERE id = ?", (activity_id,)).rowcount
+        return removed
+
+    # Normalized rows.
+
+    def activity_count(self) -> int:
+        return int(self._conn.execute("SELECT COUNT(*) FROM activities").fetchone()[0])
+
+    def replace_activities(self, items: Sequence[Dict[str, Any]]) -> Tuple[int, int]:
+        """Make the normalized table exactly `items`; returns (written, deleted).
+
+        Rows whose JSON is unchanged are left alone.
+        """
+        current = {
+            row["id"]: row["row"] for row in self._conn.execute("SELECT id, row FROM activities")
+        }
+        written = 0
+        with self.transaction():
+            keep = set()
+            for item in items:
+                activity_id = str(item["id"])
+                keep.add(activity_id)
+                encoded = json.dumps(item, sort_keys=True)
+                if current.get(activity_id) == encoded:
+                    continue
+                self._upsert_activity(activity_id, item, encoded)
+                written += 1
+            stale = [activity_id for activity_id in current if activity_id not in keep]
+            for activity_id in stale:
+                self._conn.execute("DELETE FROM activities WHERE id = ?", (activity_id,))
+        return written, len(stale)
+
+    def _upsert_activity(self, activity_id: str, item: Dict[str, Any], encoded: str) -> None:
+        self._conn.execute(
+            "INSERT OR REPLACE INTO activities (id, date, year, type, raw_type, start_date_local, name, "
+            "distance, moving_time, elevation_gain, row) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                activity_id,
+                str(item.get("date") or ""),
+                int(item.get("year") or 0),
+                str(item.get("type") or ""),
+                item.get("raw_type"),
+                item.get("start_date_local"),
+                item.get("name"),
+                _float(item.get("distance")),
+                _float(item.get("moving_time")),
+                _float(item.get("elevation_gain")),
+                encoded,
+            ),
+        )
+
+    def _where(
+        self,
+        year: Optional[int],
+        activity_type: Optional[str],
+        since: Optional[str],
+    ) -> Tuple[str, List[Any]]:
+        clauses: List[str] = []
+        params: List[Any] = []
+        if year is not None:
+            clauses.append("year = ?")
+            params.append(int(year))
+        if activity_type is not None:
+            clauses.append("type = ?")
+            params.append(str(activity_type))
+        if since is not None:
+            clauses.append("date >= ?")
+            params.append(str(since))
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def iter_activities(
+        self,
+        year: Optional[int] = None,
+        activity_type: Optional[str] = None,
+        since: Optional[str] = None,
+        columns: Optional[Sequence[str]] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """Normalized rows ordered by (date, id), optionally filtered.
+
+        With `columns`, yields only `id` plus those indexed columns and skips
+        decoding the full row.
+        """
+        where, params = self._where(year, activity_type, since)
+        if columns:
+            unknown = [column for column in columns if column not in ACTIVITY_COLUMNS]
+            if unknown:
+                raise ValueError(f"Unknown activity column(s): {', '.join(unknown)}")
+            selected = ", ".join(["id", *columns])
+            for row in self._conn.execute(f"SELECT {selected} FROM activities{where} ORDER BY date, id", params):
+                yield dict(row)
+            return
+        for row in self._conn.execute(f"SELECT row FROM activities{where} ORDER BY date, id", params):
+            yield json.loads(row["row"])
+
+    def years(self) -> List[int]:
+        return [int(row[0]) for row in self._conn.execute("SELECT DISTINCT year FROM activities ORDER BY year")]
+
+    def type_counts(self) -> Dict[str, int]:
+        return {
+            row["type"]: int(row["n"])
+            for row in self._conn.execute("SELECT type, COUNT(*) AS n FROM activities GROUP BY type")
+        }
+
+    def daily_totals(
+        self, year: Optional[int] = None, activity_type: Optional[str] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """Per (year, type, date) count, distance, moving_time, elevation_gain and ids."""
+        where, params = self._where(year, activity_type, None)
+        cursor = self._conn.execute(
+            "SELECT year, type, date, COUNT(*) AS count, SUM(distance) AS distance, "
+            "SUM(moving_time) AS moving_time, SUM(elevation_gain) AS elevation_gain, "
+            f"GROUP_CONCAT(id, '{_ID_SEPARATOR}') AS ids "
+            f"FROM activities{where} GROUP BY year, type, date ORDER BY year, type, date",
+            params,
+        )
+        for row in cursor:
+            yield {
+                "year": int(row["year"]),
+                "type": row["type"],
+                "date": row["date"],
+                "count": int(row["count"]),
+                "distance": float(row["distance"] or 0.0),
+                "moving_time": float(row["moving_time"] or 0.0),
+                "elevation_gain": float(row["elevation_gain"] or 0.0),
+                "activity_ids": sorted(str(row["ids"] or "").split(_ID_SEPARATOR)),
+            }
+
+    def stats(self) -> Dict[str, Any]:
+        raw = {
+            row["source"]: int(row["n"])
+            for row in self._conn.execute("SELECT source, COUNT(*) AS n FROM raw_activities GROUP BY source")
+        }
+        return {"raw": raw, "activities": self.activity_count(), "years": self.years()}
+
+
+def open_activity_store(config: Optional[Dict[str, Any]] = None) -> Optional[ActivityStore]:
+    """The configured store, or None when `storage.sqlite` is off."""
+    path = activity_store_path(config if config is not None else load_config())
+    return ActivityStore(path) if path else None
+
+
+def forget_activities(config: Dict[str, Any], source: str, activity_ids: Iterable[str]) -> int:
+    """Remove deleted activities from the configured store; a no-op when it is off."""
+    store = open_activity_store(config)
+    if store is None:
+        return 0
+    with store:
+        return store.delete_activities(source, activity_ids)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Inspect the SQLite activity store")
+    parser.add_argument("command", choices=["stats"])
+    parser.add_argument("path", nargs="?", default=DEFAULT_STORE_PATH)
+    args = parser.parse_args()
+
+    if not os.path.exists(args.path):
+        raise FileNotFoundError(f"Missing {args.path}")
+    with ActivityStore(args.path) as store:
+        print(json.dumps(store.stats(), indent=2, sort_keys=True))
+    return 0
+
+
+if __name__ == "__main__":
+    try:
+        raise SystemExit(main())
+    except Exception as exc:
+        print(f"ERROR: {exc}", file=sys.stderr)
+        raise
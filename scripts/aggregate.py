@@ -2,6 +2,7 @@ import argparse
 import os
 from collections import defaultdict
 
+from activity_store import open_activity_store
 from utils import ensure_dir, load_config, read_json, utc_now, write_json
 
 IN_PATH = "data/activities_normalized.json"
@@ -15,15 +16,37 @@ def aggregate():
     exclude_types = {str(item) for item in (activities_cfg.get("exclude_types", []) or [])}
     featured_types = set(activities_cfg.get("types", []) or [])
 
-    items = read_json(IN_PATH) if os.path.exists(IN_PATH) else []
-
     data = defaultdict(lambda: defaultdict(lambda: defaultdict(dict)))
 
-    for item in items:
-        activity_type = item.get("type")
+    def included(activity_type) -> bool:
         if activity_type in exclude_types:
-            continue
+            return False
         if not include_all_types and featured_types and activity_type not in featured_types:
+            return False
+        return True
+
+    store = open_activity_store(config)
+    if store is not None and store.activity_count():
+        # Day totals come straight from SQL over the indexed columns.
+        with store:
+            for totals in store.daily_totals():
+                if not included(totals["type"]) or not totals["date"]:
+                    continue
+                data[str(totals["year"])][totals["type"]][totals["date"]] = {
+                    key: totals[key] for key in ("count", "distance", "moving_time", "elevation_gain", "activity_ids")
+                }
+        return {
+            "generated_at": utc_now().isoformat(),
+            "years": data,
+        }
+    if store is not None:
+        store.close()
+
+    items = read_json(IN_PATH) if os.path.exists(IN_PATH) else []
+
+    for item in items:
+        activity_type = item.get("type")
+        if not included(activity_type):
             continue
         date = item.get("date")
         year = str(item.get("year"))
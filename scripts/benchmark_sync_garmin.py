@@ -0,0 +1,158 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Dict, List
+from unittest import mock
+
+import yaml
+
+import sync_garmin
+from fake_garmin_client import FakeGarmin, garminconnect_module, synthetic_activities
+
+DEFAULT_SIZES = [1000, 10000, 50000]
+
+
+def _write_config(path: str, args: argparse.Namespace) -> None:
+    config = {
+        "source": "garmin",
+        "garmin": {
+            "email": "bench@example.com",
+            "password": "bench",
+            "range_days": args.range_days,
+            "backfill_workers": args.workers,
+            "enrich_workers": args.enrich_workers,
+            "requests_per_minute": args.requests_per_minute,
+        },
+        "sync": {"recent_days": 7, "per_page": args.per_page, "resume_backfill": True},
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        yaml.safe_dump(config, f, sort_keys=False)
+
+
+def _timed_sync(client: FakeGarmin) -> Dict:
+    client.reset_counts()
+    log = io.StringIO()
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(log):
+        summary = sync_garmin.sync_garmin(dry_run=False, prune_deleted=False)
+    wall_seconds = time.perf_counter() - started
+    return {
+        "wall_seconds": round(wall_seconds, 3),
+        "fetched": summary.get("fetched"),
+        "calls": dict(client.counts),
+        "summary": summary,
+    }
+
+
+def _timed_enrichment(client: FakeGarmin, args: argparse.Namespace) -> Dict:
+    """Cold-cache duration lookups for every activity listed without one."""
+    missing = [{"id": activity_id, "moving_time": 0.0} for activity_id in sorted(client.missing_duration_ids)]
+    client.reset_counts()
+    enricher = sync_garmin._DurationEnricher(client, workers=args.enrich_workers)
+    started = time.perf_counter()
+    try:
+        for offset in range(0, len(missing), args.per_page):
+            enricher.enrich(missing[offset : offset + args.per_page])
+    finally:
+        enricher.close()
+    wall_seconds = time.perf_counter() - started
+    stats = enricher.summary()
+    return {
+        "wall_seconds": round(wall_seconds, 3),
+        "lookups": stats["attempted"],
+        "enriched": stats["enriched"],
+        "latency_seconds_avg": stats["latency_seconds_avg"],
+        "calls": dict(client.counts),
+    }
+
+
+def run_once(size: int, args: argparse.Namespace) -> Dict:
+    """Backfill, then a quiet recent-only run, then isolated enrichment, over `size` activities."""
+    client = FakeGarmin(
+        synthetic_activities(size, int(time.time()) - 3600, seed=args.seed),
+        latency_seconds=args.latency_ms / 1000.0,
+        missing_duration_rate=args.missing_duration_rate,
+        date_ranges=args.mode == "range",
+        seed=args.seed,
+    )
+    previous_cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir, mock.patch.dict(
+        sys.modules, {"garminconnect": garminconnect_module(client), "garth": None}
+    ):
+        # sync_garmin resolves config, data/ and activities/raw/ relative to the cwd.
+        os.chdir(workdir)
+        try:
+            _write_config(os.path.join(workdir, "config.yaml"), args)
+            backfill = _timed_sync(client)
+            recent = _timed_sync(client)
+        finally:
+            os.chdir(previous_cwd)
+    enrichment = _timed_enrichment(client, args)
+
+    backfill_summary = backfill.pop("summary")
+    recent.pop("summary")
+    return {
+        "activities": size,
+        "mode": args.mode,
+        "backfill_completed": backfill_summary.get("backfill_completed"),
+        "backfill": dict(
+            backfill,
+            activities_per_second=round(size / backfill["wall_seconds"], 1) if backfill["wall_seconds"] else None,
+            duration_enriched=backfill_summary.get("duration_enriched"),
+        ),
+        "recent": recent,
+        "enrichment": enrichment,
+    }
+
+
+def _print_table(results: List[Dict]) -> None:
+    header = (
+        f"{'activities':>10} {'mode':>6} {'backfill s':>10} {'act/s':>9} {'bf calls':>8} "
+        f"{'recent s':>8} {'rc calls':>8} {'enrich s':>8} {'lookups':>7}"
+    )
+    print(header)
+    print("-" * len(header))
+    for row in results:
+        backfill, recent, enrichment = row["backfill"], row["recent"], row["enrichment"]
+        print(
+            f"{row['activities']:>10} {row['mode']:>6} {backfill['wall_seconds']:>10.3f} "
+            f"{backfill['activities_per_second'] or 0:>9.1f} {backfill['calls']['calls']:>8} "
+            f"{recent['wall_seconds']:>8.3f} {recent['calls']['calls']:>8} "
+            f"{enrichment['wall_seconds']:>8.3f} {enrichment['lookups']:>7}"
+        )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark sync_garmin against an in-process client stand-in")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--mode", choices=["range", "offset"], default="range")
+    parser.add_argument("--per-page", type=int, default=200)
+    parser.add_argument("--range-days", type=int, default=sync_garmin.DEFAULT_RANGE_DAYS)
+    parser.add_argument("--workers", type=int, default=sync_garmin.DEFAULT_BACKFILL_WORKERS)
+    parser.add_argument("--enrich-workers", type=int, default=sync_garmin.DEFAULT_ENRICH_WORKERS)
+    parser.add_argument("--requests-per-minute", type=float, default=0.0)
+    parser.add_argument("--missing-duration-rate", type=float, default=0.05)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    results = [run_once(size, args) for size in args.sizes]
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        _print_table(results)
+    return 0
+
+
+if __name__ == "__main__":
+    try:
+        raise SystemExit(main())
+    except Exception as exc:
+        print(f"ERROR: {exc}", file=sys.stderr)
+        raise
@@ -0,0 +1,120 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+import yaml
+
+import sync_strava
+from fake_strava_server import FakeStravaServer, synthetic_activities
+
+DEFAULT_SIZES = [1000, 10000, 50000]
+
+
+def _write_config(path: str, args: argparse.Namespace) -> None:
+    config = {
+        "source": "strava",
+        "strava": {"client_id": "bench", "client_secret": "bench", "refresh_token": "bench"},
+        "sync": {
+            "recent_days": 7,
+            "per_page": args.per_page,
+            "resume_backfill": True,
+            "backfill_workers": args.workers,
+            "write_queue_pages": args.write_queue_pages,
+            "detail_enrichment": args.detail_enrichment,
+        },
+        "rate_limits": {"min_interval_seconds": 0},
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        yaml.safe_dump(config, f, sort_keys=False)
+
+
+def run_once(size: int, args: argparse.Namespace) -> Dict:
+    """Full (first-run) sync of `size` synthetic activities against the stand-in."""
+    activities = synthetic_activities(size, int(time.time()) - 3600)
+    server = FakeStravaServer(
+        activities,
+        latency_seconds=args.latency_ms / 1000.0,
+        fault_rate=args.fault_rate,
+        seed=args.seed,
+    )
+    previous_cwd = os.getcwd()
+    previous_base_url = sync_strava.STRAVA_BASE_URL
+    with tempfile.TemporaryDirectory() as workdir, server:
+        # sync_strava resolves config, data/ and activities/raw/ relative to the cwd.
+        os.chdir(workdir)
+        sync_strava.STRAVA_BASE_URL = server.base_url
+        try:
+            _write_config(os.path.join(workdir, "config.yaml"), args)
+            log = io.StringIO()
+            started = time.perf_counter()
+            with contextlib.redirect_stdout(log):
+                summary = sync_strava.sync_strava(dry_run=False, prune_deleted=False)
+            wall_seconds = time.perf_counter() - started
+        finally:
+            sync_strava.STRAVA_BASE_URL = previous_base_url
+            os.chdir(previous_cwd)
+
+    limiter_stats = summary.get("rate_limiter", {})
+    return {
+        "activities": size,
+        "fetched": summary.get("fetched"),
+        "backfill_completed": summary.get("backfill_completed"),
+        "wall_seconds": round(wall_seconds, 3),
+        "activities_per_second": round(size / wall_seconds, 1) if wall_seconds else None,
+        "requests_issued": limiter_stats.get("requests"),
+        "requests_served": server.counts["requests"],
+        "injected_faults": server.counts["faults"],
+        "sleep_seconds": limiter_stats.get("sleep_seconds"),
+        "retry_sleep_seconds": (summary.get("request_metrics") or {}).get("retry_sleep_seconds_total"),
+        "http_connections": summary.get("http_connections"),
+    }
+
+
+def _print_table(results: List[Dict]) -> None:
+    header = (
+        f"{'activities':>10} {'wall s':>9} {'act/s':>9} {'requests':>9} {'faults':>7} "
+        f"{'sleep s':>8} {'retry s':>8}"
+    )
+    print(header)
+    print("-" * len(header))
+    for row in results:
+        print(
+            f"{row['activities']:>10} {row['wall_seconds']:>9.3f} {row['activities_per_second'] or 0:>9.1f} "
+            f"{row['requests_issued'] or 0:>9} {row['injected_faults']:>7} {row['sleep_seconds'] or 0:>8.3f} "
+            f"{row['retry_sleep_seconds'] or 0:>8.3f}"
+        )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark sync_strava against a local API stand-in")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--per-page", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--write-queue-pages", type=int, default=sync_strava.DEFAULT_WRITE_QUEUE_PAGES)
+    parser.add_argument("--detail-enrichment", action="store_true")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--fault-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    results = [run_once(size, args) for size in args.sizes]
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        _print_table(results)
+    return 0
+
+
+if __name__ == "__main__":
+    try:
+        raise SystemExit(main())
+    except Exception as exc:
+        print(f"ERROR: {exc}", file=sys.stderr)
+        raise
@@ -0,0 +1,164 @@
+import random
+import threading
+import time
+import types
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+ACTIVITY_ID_BASE = 18_000_000_000
+TYPE_KEYS = ["running", "cycling", "walking", "hiking", "lap_swimming", "strength_training", "trail_running"]
+DURATION_FIELDS = ("duration", "movingDuration", "elapsedDuration")
+
+
+class GarminConnectTooManyRequestsError(Exception):
+    """Same class name as garminconnect's 429 error, so `_is_rate_limited_error` matches it."""
+
+
+class GarminConnectConnectionError(Exception):
+    pass
+
+
+def synthetic_activities(count: int, end_ts: int, spacing_seconds: int = 7200, seed: int = 7) -> List[Dict]:
+    """Deterministic Garmin activity summaries, newest first, one every `spacing_seconds`."""
+    rng = random.Random(seed)
+    activities = []
+    start_ts = end_ts - count * spacing_seconds
+    for index in range(count):
+        ts = start_ts + index * spacing_seconds + rng.randrange(0, max(1, spacing_seconds // 2))
+        type_key = rng.choice(TYPE_KEYS)
+        moving = float(rng.randrange(900, 7200))
+        stamp = datetime.fromtimestamp(ts, tz=timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+        activities.append(
+            {
+                "activityId": ACTIVITY_ID_BASE + index,
+                "activityName": f"{type_key} {index}",
+                "activityType": {"typeKey": type_key},
+                "startTimeGMT": stamp,
+                "startTimeLocal": stamp,
+                "distance": round(rng.uniform(1000, 40000), 1),
+                "duration": moving + rng.randrange(0, 600),
+                "movingDuration": moving,
+                "elapsedDuration": moving + rng.randrange(0, 900),
+                "elevationGain": round(rng.uniform(0, 800), 1),
+            }
+        )
+    activities.reverse()
+    return activities
+
+
+class FakeGarmin:
+    """In-process stand-in for `garminconnect.Garmin` over a synthetic corpus.
+
+    Lists activities newest first (`get_activities`, and
+    `get_activities_by_date` unless `date_ranges` is false) and serves
+    `get_activity` / `get_activity_details`. A seeded `missing_duration_rate`
+    of activities is listed without durations (the detail endpoints still
+    report them), every call sleeps `latency_seconds`, and the 1-based call
+    numbers in `throttle_calls` raise a 429.
+    """
+
+    def __init__(
+        self,
+        activities: Optional[Sequence[Dict]] = None,
+        latency_seconds: float = 0.0,
+        missing_duration_rate: float = 0.0,
+        throttle_calls: Iterable[int] = (),
+        date_ranges: bool = True,
+        seed: int = 7,
+    ) -> None:
+        if activities is None:
+            activities = synthetic_activities(100, int(time.time()), seed=seed)
+        self.activities = sorted(activities, key=lambda item: item["startTimeGMT"], reverse=True)
+        self._by_id = {str(item["activityId"]): item for item in self.activities}
+        rng = random.Random(seed)
+        rate = min(max(0.0, missing_duration_rate), 1.0)
+        self.missing_duration_ids = {
+            str(item["activityId"]) for item in self.activities if rate and rng.random() < rate
+        }
+        self.latency_seconds = max(0.0, latency_seconds)
+        self.throttle_calls = set(throttle_calls)
+        if not date_ranges:
+            self.get_activities_by_date = None
+        self.counts: Dict[str, int] = {"calls": 0, "throttled": 0}
+        self._lock = threading.Lock()
+
+    def reset_counts(self) -> None:
+        with self._lock:
+            self.counts = {"calls": 0, "throttled": 0}
+
+    def _call(self, method_name: str) -> None:
+        with self._lock:
+            self.counts["calls"] += 1
+            self.counts[method_name] = self.counts.get(method_name, 0) + 1
+            throttled = self.counts["calls"] in self.throttle_calls
+            if throttled:
+                self.counts["throttled"] += 1
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        if throttled:
+            raise GarminConnectTooManyRequestsError("429 Client Error: Too Many Requests")
+
+    def _listed(self, activity: Dict) -> Dict:
+        listed = dict(activity)
+        if str(activity["activityId"]) in self.missing_duration_ids:
+            for field in DURATION_FIELDS:
+                listed[field] = 0.0
+        return listed
+
+    def login(self, *_args: Any, **_kwargs: Any) -> None:
+        self._call("login")
+
+    def get_activities(self, start: int = 0, limit: int = 20, activitytype: Optional[str] = None) -> List[Dict]:
+        self._call("get_activities")
+        return [self._listed(item) for item in self.activities[start : start + limit]]
+
+    def get_activities_by_date(
+        self, startdate: str, enddate: Optional[str] = None, activitytype: Optional[str] = None
+    ) -> List[Dict]:
+        self._call("get_activities_by_date")
+        enddate = enddate or "9999-12-31"
+        return [
+            self._listed(item)
+            for item in self.activities
+            if startdate <= item["startTimeLocal"][:10] <= enddate
+        ]
+
+    def get_activity(self, activity_id: Any) -> Dict:
+        self._call("get_activity")
+        activity = self._activity(activity_id)
+        return {
+            "activityId": activity["activityId"],
+            "activityName": activity["activityName"],
+            "summaryDTO": {field: activity[field] for field in DURATION_FIELDS},
+        }
+
+    def get_activity_details(self, activity_id: Any, maxchart: int = 2000, maxpoly: int = 4000) -> Dict:
+        self._call("get_activity_details")
+        activity = self._activity(activity_id)
+        return {
+            "activityId": activity["activityId"],
+            "measurementCount": 0,
+            "metricsCount": 0,
+            "metricDescriptors": [],
+            "activityDetailMetrics": [],
+            "summaryDTO": {field: activity[field] for field in DURATION_FIELDS},
+        }
+
+    def _activity(self, activity_id: Any) -> Dict:
+        activity = self._by_id.get(str(activity_id))
+        if activity is None:
+            raise GarminConnectConnectionError(f"404 Client Error: Not Found for activity {activity_id}")
+        return activity
+
+
+def garminconnect_module(client: FakeGarmin) -> types.ModuleType:
+    """A `garminconnect` module whose `Garmin(...)` constructor returns `client`.
+
+    Install it with `sys.modules["garminconnect"] = garminconnect_module(client)`
+    to run `sync_garmin.sync_garmin()` end to end, login included.
+    """
+    module = types.ModuleType("garminconnect")
+    module.Garmin = lambda *_args, **_kwargs: client  # type: ignore[attr-defined]
+    module.GarminConnectTooManyRequestsError = GarminConnectTooManyRequestsError  # type: ignore[attr-defined]
+    module.GarminConnectConnectionError = GarminConnectConnectionError  # type: ignore[attr-defined]
+    return module
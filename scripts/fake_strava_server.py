@@ -0,0 +1,280 @@
+import argparse
+import bisect
+import json
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qs, urlparse
+
+ATHLETE_ID = 1001
+ACTIVITY_ID_BASE = 9_000_000_000
+SPORT_TYPES = ["Run", "Ride", "Walk", "Hike", "Swim", "WeightTraining", "TrailRun"]
+# Limits far above Strava's defaults so throughput runs measure the client, not the budget.
+DEFAULT_RATE_LIMITS = {
+    "overall_15_min": 100_000,
+    "overall_daily": 1_000_000,
+    "read_15_min": 100_000,
+    "read_daily": 1_000_000,
+}
+RATE_LIMIT_WINDOW_SECONDS = 900
+
+
+def synthetic_activities(count: int, end_ts: int, spacing_seconds: int = 7200, seed: int = 7) -> List[Dict]:
+    """Deterministic summary payloads, oldest first, one every `spacing_seconds`."""
+    rng = random.Random(seed)
+    activities = []
+    start_ts = end_ts - count * spacing_seconds
+    for index in range(count):
+        ts = start_ts + index * spacing_seconds + rng.randrange(0, max(1, spacing_seconds // 2))
+        sport_type = rng.choice(SPORT_TYPES)
+        moving_time = rng.randrange(900, 7200)
+        start = datetime.fromtimestamp(ts, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        activities.append(
+            {
+                "id": ACTIVITY_ID_BASE + index,
+                "name": f"{sport_type} {index}",
+                "type": sport_type,
+                "sport_type": sport_type,
+                "start_date": start,
+                "start_date_local": start,
+                "timezone": "(GMT+00:00) UTC",
+                "distance": round(rng.uniform(1000, 40000), 1),
+                "moving_time": moving_time,
+                "elapsed_time": moving_time + rng.randrange(0, 600),
+                "total_elevation_gain": round(rng.uniform(0, 800), 1),
+                "athlete": {"id": ATHLETE_ID},
+            }
+        )
+    return activities
+
+
+class FakeStravaServer:
+    """Local stand-in for the Strava endpoints `sync_strava` uses.
+
+    Serves `/oauth/token`, `/api/v3/athlete`, `/api/v3/athlete/activities`
+    (after/before/page/per_page; newest first, or oldest
+    first when `after` is given) and `/api/v3/activities/{id}`,
+    with quarter-hour/daily `X-RateLimit-*` headers, optional per-request
+    latency and a seeded fraction of injected 429/5xx responses.
+    """
+
+    def __init__(
+        self,
+        activities: Sequence[Dict],
+        latency_seconds: float = 0.0,
+        fault_rate: float = 0.0,
+        fault_statuses: Sequence[int] = (429, 500, 502, 503),
+        rate_limits: Optional[Dict[str, int]] = None,
+        seed: int = 7,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ) -> None:
+        ordered = sorted(activities, key=lambda item: _start_ts(item))
+        self.activities = ordered
+        self._timestamps = [_start_ts(item) for item in ordered]
+        self._by_id = {str(item["id"]): item for item in ordered}
+        self.latency_seconds = max(0.0, latency_seconds)
+        self.fault_rate = min(max(0.0, fault_rate), 1.0)
+        self.fault_statuses = list(fault_statuses) or [503]
+        self.rate_limits = dict(DEFAULT_RATE_LIMITS, **(rate_limits or {}))
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._window_start = 0.0
+        self._day = ""
+        self._usage = {"overall_15": 0, "overall_day": 0, "read_15": 0, "read_day": 0}
+        self.counts: Dict[str, int] = {"requests": 0, "faults": 0, "throttled": 0}
+        self._httpd = ThreadingHTTPServer((host, port), _handler_for(self))
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> str:
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self.base_url
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "FakeStravaServer":
+        self.start()
+        return self
+
+    def __exit__(self, *_exc: Any) -> None:
+        self.stop()
+
+    def page(self, after: Optional[int], before: Optional[int], page: int, per_page: int) -> List[Dict]:
+        lower = bisect.bisect_right(self._timestamps, after) if after is not None else 0
+        upper = bisect.bisect_left(self._timestamps, before) if before is not None else len(self._timestamps)
+        if after is not None:
+            # Any `after` makes Strava list oldest first.
+            start = lower + (page - 1) * per_page
+            return list(self.activities[start : min(upper, start + per_page)]) if start < upper else []
+        start = upper - (page - 1) * per_page
+        if start <= lower:
+            return []
+        return list(reversed(self.activities[max(lower, start - per_page) : start]))
+
+    def detail(self, activity_id: str) -> Optional[Dict]:
+        summary = self._by_id.get(activity_id)
+        if summary is None:
+            return None
+        detail = dict(summary)
+        detail.update({"calories": round(summary["moving_time"] / 6.0, 1), "device_name": "Fake Watch"})
+        return detail
+
+    def account(self, read: bool) -> Tuple[Optional[int], Dict[str, str]]:
+        """Count one request; returns an injected/throttle status (or None) and headers."""
+        now = time.time()
+        with self._lock:
+            self.counts["requests"] += 1
+            window_start = now - now % RATE_LIMIT_WINDOW_SECONDS
+            day = datetime.fromtimestamp(now, tz=timezone.utc).date().isoformat()
+            if window_start != self._window_start:
+                self._window_start = window_start
+                self._usage["overall_15"] = self._usage["read_15"] = 0
+            if day != self._day:
+                self._day = day
+                self._usage["overall_day"] = self._usage["read_day"] = 0
+
+            status = None
+            limits = self.rate_limits
+            if self._usage["overall_15"] >= limits["overall_15_min"] or self._usage["overall_day"] >= limits["overall_daily"]:
+                status = 429
+            elif read and (
+                self._usage["read_15"] >= limits["read_15_min"] or self._usage["read_day"] >= limits["read_daily"]
+            ):
+                status = 429
+            if status is not None:
+                self.counts["throttled"] += 1
+            else:
+                self._usage["overall_15"] += 1
+                self._usage["overall_day"] += 1
+                if read:
+                    self._usage["read_15"] += 1
+                    self._usage["read_day"] += 1
+                if self.fault_rate and self._rng.random() < self.fault_rate:
+                    status = self._rng.choice(self.fault_statuses)
+                    self.counts["faults"] += 1
+            headers = {
+                "X-RateLimit-Limit": f"{limits['overall_15_min']},{limits['overall_daily']}",
+                "X-RateLimit-Usage": f"{self._usage['overall_15']},{self._usage['overall_day']}",
+                "X-ReadRateLimit-Limit": f"{limits['read_15_min']},{limits['read_daily']}",
+                "X-ReadRateLimit-Usage": f"{self._usage['read_15']},{self._usage['read_day']}",
+            }
+        if status == 429:
+            headers["Retry-After"] = "1"
+        return status, headers
+
+
+def _start_ts(activity: Dict) -> int:
+    return int(datetime.strptime(activity["start_date"], "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc).timestamp())
+
+
+def _handler_for(server: FakeStravaServer) -> type:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *_args: Any) -> None:
+            return
+
+        def _send(self, status: int, payload: Any, headers: Optional[Dict[str, str]] = None) -> None:
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _serve(self, read: bool) -> None:
+            length = int(self.headers.get("Content-Length") or 0)
+            if length:
+                self.rfile.read(length)
+            if server.latency_seconds:
+                time.sleep(server.latency_seconds)
+            status, headers = server.account(read)
+            if status is not None:
+                self._send(status, {"message": "Injected error" if status != 429 else "Rate Limit Exceeded"}, headers)
+                return
+
+            url = urlparse(self.path)
+            query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            if self.command == "POST" and url.path == "/oauth/token":
+                payload = {
+                    "token_type": "Bearer",
+                    "access_token": "fake-access-token",
+                    "refresh_token": "fake-refresh-token",
+                    "expires_at": int(time.time()) + 6 * 3600,
+                }
+                self._send(200, payload, headers)
+            elif url.path == "/api/v3/athlete":
+                self._send(200, {"id": ATHLETE_ID, "username": "fake"}, headers)
+            elif url.path == "/api/v3/athlete/activities":
+                try:
+                    after = int(query["after"]) if query.get("after") else None
+                    before = int(query["before"]) if query.get("before") else None
+                    page = max(1, int(query.get("page") or 1))
+                    per_page = min(200, max(1, int(query.get("per_page") or 30)))
+                except ValueError:
+                    self._send(400, {"message": "Bad Request"}, headers)
+                    return
+                self._send(200, server.page(after, before, page, per_page), headers)
+            elif url.path.startswith("/api/v3/activities/"):
+                detail = server.detail(url.path.rsplit("/", 1)[-1])
+                if detail is None:
+                    self._send(404, {"message": "Record Not Found"}, headers)
+                else:
+                    self._send(200, detail, headers)
+            else:
+                self._send(404, {"message": "Not Found"}, headers)
+
+        def do_GET(self) -> None:  # noqa: N802 - BaseHTTPRequestHandler API
+            self._serve(read=True)
+
+        def do_POST(self) -> None:  # noqa: N802 - BaseHTTPRequestHandler API
+            self._serve(read=False)
+
+    return Handler
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Run a local Strava API stand-in")
+    parser.add_argument("--activities", type=int, default=1000)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--fault-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    activities = synthetic_activities(args.activities, int(time.time()))
+    server = FakeStravaServer(
+        activities,
+        latency_seconds=args.latency_ms / 1000.0,
+        fault_rate=args.fault_rate,
+        port=args.port,
+    )
+    base_url = server.start()
+    print(f"Serving {len(activities)} activities; export STRAVA_BASE_URL={base_url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
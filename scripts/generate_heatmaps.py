@@ -6,6 +6,7 @@ import urllib.parse
 from datetime import date, timedelta
 from typing import Callable, Dict, List, Optional
 
+from activity_store import ActivityStore, open_activity_store
 from activity_types import build_type_meta, featured_types_from_config, ordered_types
 from repo_helpers import choose_repo_slug_from_env, normalize_repo_slug
 from utils import (
@@ -24,6 +25,7 @@ from utils import (
 AGG_PATH = os.path.join("data", "daily_aggregates.json")
 ACTIVITIES_PATH = os.path.join("data", "activities_normalized.json")
 SITE_DATA_PATH = os.path.join("site", "data.json")
+SITE_ACTIVITY_COLUMNS = ("date", "year", "type", "raw_type", "start_date_local", "name")
 
 CELL = 12
 GAP = 2
@@ -133,10 +135,15 @@ def _load_activities(
     include_activity_urls: bool = False,
     include_strava_activity_urls: bool = False,
     include_garmin_activity_urls: bool = False,
+    store: Optional[ActivityStore] = None,
 ) -> List[Dict]:
-    if not os.path.exists(ACTIVITIES_PATH):
+    if store is not None and store.activity_count():
+        # Only the columns the site needs; full rows are never decoded.
+        items = store.iter_activities(columns=SITE_ACTIVITY_COLUMNS)
+    elif not os.path.exists(ACTIVITIES_PATH):
         return []
-    items = read_json(ACTIVITIES_PATH) or []
+    else:
+        items = read_json(ACTIVITIES_PATH) or []
     activities: List[Dict] = []
     for item in items:
         if not isinstance(item, dict):
@@ -455,6 +462,9 @@ def generate(write_svgs: bool = True):
     source = normalize_source(config.get("source", "strava"))
     include_activity_urls = _activity_links_enabled_from_config(config, source)
     load_activities_kwargs = {"source": source}
+    store = open_activity_store(config)
+    if store is not None:
+        load_activities_kwargs["store"] = store
     if source == "strava":
         load_activities_kwargs["include_strava_activity_urls"] = include_activity_urls
     elif source == "garmin":
@@ -471,6 +481,8 @@ def generate(write_svgs: bool = True):
         "week_start": week_start,
         "activities": _load_activities(**load_activities_kwargs),
     }
+    if store is not None:
+        store.close()
     profile_url = _profile_url_from_config(config, source)
     if profile_url:
         site_payload["profile_url"] = profile_url
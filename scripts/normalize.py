@@ -1,13 +1,17 @@
 import argparse
 import os
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
+from activity_store import open_activity_store
 from activity_types import canonicalize_activity_type, featured_types_from_config, normalize_activity_type
 from provider_fields import (
+    DETAIL_FIELDS,
     coalesce as _shared_coalesce,
     get_nested as _shared_get_nested,
     pick_duration_seconds as _shared_pick_duration_seconds,
 )
+from raw_manifest import payload_digest
+from raw_store import read_raw_activities
 from utils import ensure_dir, load_config, normalize_source, parse_iso_datetime, raw_activity_dir, read_json, write_json
 
 OUT_PATH = os.path.join("data", "activities_normalized.json")
@@ -53,7 +57,58 @@ def _resolve_canonical_type(raw_value: str, source: str) -> str:
     return canonicalize_activity_type(raw_value, source=source)
 
 
-def _normalize_activity(activity: Dict, type_aliases: Dict[str, str], source: str) -> Dict:
+def _load_detail(raw_dir: str, filename: str) -> Dict:
+    # Detailed payloads fetched by the enrichment queue live in <raw_dir>/details/.
+    path = os.path.join(raw_dir, "details", filename)
+    if not os.path.isfile(path):
+        return {}
+    try:
+        detail = read_json(path)
+    except Exception:
+        return {}
+    return detail if isinstance(detail, dict) else {}
+
+
+def _load_persisted_details(source: str) -> Dict[str, Dict]:
+    # The detail queue keeps the enrichment fields of fetched details in data/,
+    # because <raw_dir>/details/ does not survive CI runs.
+    path = os.path.join("data", f"detail_queue_{source}.json")
+    if not os.path.isfile(path):
+        return {}
+    try:
+        payload = read_json(path)
+    except Exception:
+        return {}
+    details = payload.get("details") if isinstance(payload, dict) else None
+    if not isinstance(details, dict):
+        return {}
+    return {str(key): value for key, value in details.items() if isinstance(value, dict)}
+
+
+def _detail_fields(activity: Dict, detail: Dict) -> Dict[str, Any]:
+    fields: Dict[str, Any] = {}
+    calories = _coalesce(detail.get("calories"), activity.get("calories"))
+    if calories is not None:
+        fields["calories"] = _safe_float(calories)
+    average_heartrate = _coalesce(
+        detail.get("average_heartrate"),
+        activity.get("average_heartrate"),
+        activity.get("averageHR"),
+    )
+    if average_heartrate is not None:
+        fields["average_heartrate"] = _safe_float(average_heartrate)
+    device_name = str(_coalesce(detail.get("device_name"), activity.get("device_name"), "") or "").strip()
+    if device_name:
+        fields["device_name"] = device_name
+    return fields
+
+
+def _normalize_activity(
+    activity: Dict,
+    type_aliases: Dict[str, str],
+    source: str,
+    detail: Optional[Dict] = None,
+) -> Dict:
     activity_id = _coalesce(activity.get("id"), activity.get("activityId"))
     start_date_local = activity.get("start_date_local") or activity.get("start_date")
     if not activity_id or not start_date_local:
@@ -98,6 +153,7 @@ def _normalize_activity(activity: Dict, type_aliases: Dict[str, str], source: st
     }
     if activity_name:
         normalized["name"] = activity_name
+    normalized.update(_detail_fields(activity, detail or {}))
     return normalized
 
 
@@ -134,8 +190,37 @@ def normalize() -> List[Dict]:
 
     # In CI, activities/raw is ephemeral per run, so keep persisted normalized
     # history and overlay any newly fetched raw activities.
-    existing = _load_existing()
-
+    store = open_activity_store(config)
+    if store is not None and store.activity_count():
+        existing = {str(item["id"]): item for item in store.iter_activities()}
+    else:
+        existing = _load_existing()
+
+    def overlay(activity: Dict, detail: Dict) -> None:
+        normalized = _normalize_activity(activity, type_aliases, source, detail)
+        if not normalized:
+            return
+        # Raw details are not kept between CI runs; carry enriched fields over
+        # from the persisted row until a fresh detail replaces them.
+        previous = existing.get(str(normalized["id"])) or {}
+        for field in DETAIL_FIELDS:
+            if field not in normalized and field in previous:
+                normalized[field] = previous[field]
+        normalized_type = normalize_activity_type(
+            normalized.get("type"),
+            featured_types=featured_types,
+            group_other_types=group_other_types,
+            other_bucket=other_bucket,
+            group_aliases=group_aliases,
+        )
+        normalized["type"] = normalized_type
+        if normalized_type in exclude_types:
+            return
+        if not include_all_types and normalized_type not in featured_set:
+            return
+        existing[str(normalized["id"])] = normalized
+
+    persisted_details = _load_persisted_details(source)
     raw_dirs = [raw_activity_dir(source)]
     # Backward compatibility for old Strava layout (activities/raw/*.json).
     legacy_raw_dir = os.path.join("activities", "raw")
@@ -145,36 +230,43 @@ def normalize() -> List[Dict]:
     for current_raw_dir in raw_dirs:
         if not os.path.exists(current_raw_dir):
             continue
-        for filename in sorted(os.listdir(current_raw_dir)):
-            if not filename.endswith(".json"):
-                continue
-            path = os.path.join(current_raw_dir, filename)
-            if not os.path.isfile(path):
-                continue
-            activity = read_json(path)
-            normalized = _normalize_activity(activity, type_aliases, source)
-            if not normalized:
-                continue
-            normalized_type = normalize_activity_type(
-                normalized.get("type"),
-                featured_types=featured_types,
-                group_other_types=group_other_types,
-                other_bucket=other_bucket,
-                group_aliases=group_aliases,
+        # Segment store records plus any one-file-per-activity payloads not yet migrated.
+        raw_items = (
+            (
+                activity_id,
+                activity,
+                _load_detail(current_raw_dir, f"{activity_id}.json") or persisted_details.get(str(activity_id), {}),
             )
-            normalized["type"] = normalized_type
-            if normalized_type in exclude_types:
-                continue
-            if not include_all_types and normalized_type not in featured_set:
-                continue
-            existing[str(normalized["id"])] = normalized
+            for activity_id, activity in read_raw_activities(current_raw_dir)
+        )
+        if store is not None:
+            store.put_raw(source, raw_items)
+            continue
+        for _activity_id, activity, detail in raw_items:
+            overlay(activity, detail)
+
+    if store is not None:
+        # Only raw payloads (or details) that changed since the last run are
+        # re-normalized, unless the activity settings changed in between.
+        settings_digest = payload_digest({"source": source, "activities": activities_cfg})[0]
+        generation_key = f"normalize.{source}.raw_generation"
+        processed = store.get_state(generation_key, 0)
+        if store.get_state("normalize.settings_sha256") != settings_digest:
+            processed = 0
+        raw_generation = store.raw_generation(source)
+        for _activity_id, activity, detail in store.raw_changed_since(source, processed):
+            overlay(activity, detail)
 
     items = [
         item
         for item in existing.values()
         if item.get("id") is not None and item.get("date")
     ]
+    publish_detail_fields = bool((config.get("sync", {}) or {}).get("detail_enrichment", False))
     for item in items:
+        if not publish_detail_fields:
+            for field in DETAIL_FIELDS:
+                item.pop(field, None)
         raw_activity_type = str(item.get("raw_activity_type") or item.get("raw_type") or item.get("type") or other_bucket)
         raw_type = str(item.get("raw_type") or raw_activity_type or other_bucket)
         item["raw_activity_type"] = raw_activity_type
@@ -193,6 +285,12 @@ def normalize() -> List[Dict]:
     if not include_all_types:
         items = [item for item in items if item.get("type") in featured_set]
     items.sort(key=lambda x: (x["date"], x["id"]))
+    if store is not None:
+        with store:
+            with store.transaction():
+                store.replace_activities(items)
+                store.set_state(generation_key, raw_generation)
+                store.set_state("normalize.settings_sha256", settings_digest)
     return items
 
 
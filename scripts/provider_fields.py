@@ -1,5 +1,9 @@
 from typing import Any, Dict, List
 
+# Health and device fields from activity details; they only reach data/ (which
+# is published) when `sync.detail_enrichment` is enabled.
+DETAIL_FIELDS = ("calories", "average_heartrate", "device_name")
+
 
 def coalesce(*values: Any) -> Any:
     for value in values:
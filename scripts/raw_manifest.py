@@ -0,0 +1,151 @@
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Dict, Optional, Set, Tuple
+
+from raw_store import FileRawStore
+from utils import read_json, utc_now, write_json
+
+MANIFEST_VERSION = 1
+STATUS_NEW = "new"
+STATUS_UPDATED = "updated"
+STATUS_UNCHANGED = "unchanged"
+
+
+def manifest_path_for(raw_dir: str) -> str:
+    # Lives beside the raw directory (activities/raw/<source>.manifest.json) so it
+    # is discarded together with the raw cache.
+    return f"{raw_dir.rstrip(os.sep)}.manifest.json"
+
+
+def payload_digest(payload: Any) -> Tuple[str, int]:
+    encoded = json.dumps(payload, ensure_ascii=True, sort_keys=True, separators=(",", ":")).encode(
+        "utf-8"
+    )
+    return hashlib.sha256(encoded).hexdigest(), len(encoded)
+
+
+class RawManifest:
+    """Activity id -> canonical-JSON hash index for one source's raw cache."""
+
+    def __init__(self, path: str, entries: Optional[Dict[str, Dict[str, Any]]] = None) -> None:
+        self.path = path
+        self.entries: Dict[str, Dict[str, Any]] = dict(entries or {})
+        self.counts = {STATUS_NEW: 0, STATUS_UPDATED: 0}
+        self._dirty = False
+        self._lock = threading.RLock()
+
+    @classmethod
+    def load(cls, path: str) -> "RawManifest":
+        entries: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(path):
+            try:
+                payload = read_json(path)
+            except Exception:
+                payload = {}
+            if isinstance(payload, dict) and payload.get("version") == MANIFEST_VERSION:
+                raw_entries = payload.get("entries")
+                if isinstance(raw_entries, dict):
+                    entries = {
+                        str(key): value for key, value in raw_entries.items() if isinstance(value, dict)
+                    }
+        return cls(path, entries)
+
+    def get(self, activity_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self.entries.get(activity_id)
+            return dict(entry) if entry else None
+
+    def ids(self) -> Set[str]:
+        with self._lock:
+            return set(self.entries)
+
+    def classify(self, activity_id: str, digest: str) -> str:
+        with self._lock:
+            entry = self.entries.get(activity_id)
+            if entry is None:
+                return STATUS_NEW
+            if entry.get("sha256") == digest:
+                return STATUS_UNCHANGED
+            return STATUS_UPDATED
+
+    def record(
+        self,
+        activity_id: str,
+        digest: str,
+        size: int,
+        start_ts: Optional[int] = None,
+        status: Optional[str] = None,
+    ) -> None:
+        with self._lock:
+            entry = dict(self.entries.get(activity_id) or {})
+            entry.update({"sha256": digest, "size": int(size), "seen_utc": utc_now().isoformat()})
+            if start_ts is not None:
+                entry["start_ts"] = int(start_ts)
+            self.entries[activity_id] = entry
+            if status in self.counts:
+                self.counts[status] += 1
+            self._dirty = True
+
+    def touch(self, activity_id: str) -> None:
+        with self._lock:
+            entry = self.entries.get(activity_id)
+            if entry is None:
+                return
+            entry["seen_utc"] = utc_now().isoformat()
+            self._dirty = True
+
+    def remove(self, activity_id: str) -> None:
+        with self._lock:
+            if self.entries.pop(activity_id, None) is not None:
+                self._dirty = True
+
+    def save(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            parent = os.path.dirname(self.path)
+            if parent:
+                os.makedirs(parent, exist_ok=True)
+            write_json(self.path, {"version": MANIFEST_VERSION, "entries": self.entries})
+            self._dirty = False
+
+
+def write_raw_activity(
+    raw_store: Any,
+    manifest: RawManifest,
+    activity_id: str,
+    payload: Dict[str, Any],
+    start_ts: Optional[int] = None,
+) -> bool:
+    """Write one raw activity unless the manifest shows it is unchanged.
+
+    Change detection is an in-memory hash lookup; the stored payload is only
+    read once, for activities stored before the manifest existed. `raw_store`
+    is a store from `raw_store.open_raw_store` (a directory path means the
+    one-file-per-activity layout).
+    """
+    if isinstance(raw_store, str):
+        raw_store = FileRawStore(raw_store)
+    digest, size = payload_digest(payload)
+    status = manifest.classify(activity_id, digest)
+    exists = raw_store.has(activity_id)
+    if status == STATUS_UNCHANGED and exists:
+        manifest.touch(activity_id)
+        return False
+    if status == STATUS_NEW and exists:
+        try:
+            existing = raw_store.get(activity_id)
+        except Exception:
+            existing = None
+        if existing == payload:
+            manifest.record(activity_id, digest, size, start_ts)
+            return False
+        status = STATUS_UPDATED
+    elif status == STATUS_UNCHANGED:
+        # Indexed but the payload is gone (e.g. raw cache cleared); rewrite it.
+        status = STATUS_UPDATED
+    raw_store.put(activity_id, payload)
+    manifest.record(activity_id, digest, size, start_ts, status)
+    return True
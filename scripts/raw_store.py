@@ -0,0 +1,535 @@
+import argparse
+import json
+import os
+import re
+import sys
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from utils import read_json, write_json
+
+LAYOUT_SEGMENTS = "segments"
+LAYOUT_FILES = "files"
+DEFAULT_LAYOUT = LAYOUT_FILES
+SEGMENTS_DIRNAME = "segments"
+INDEX_FILENAME = "index.json"
+INDEX_VERSION = 1
+# Active segments roll over past this size; sealed segments are what compaction rewrites.
+SEGMENT_MAX_BYTES = 16 * 1024 * 1024
+COMPACT_MIN_GARBAGE_BYTES = 1024 * 1024
+COMPACT_MIN_GARBAGE_RATIO = 0.5
+_SEGMENT_RE = re.compile(r"^seg-(\d{6})(?:-(\d+))?\.jsonl$")
+
+SegmentKey = Tuple[int, int]
+
+
+def raw_store_layout(config: Dict[str, Any]) -> str:
+    layout = str(((config.get("sync", {}) or {}).get("raw_store")) or DEFAULT_LAYOUT).strip().lower()
+    if layout not in {LAYOUT_SEGMENTS, LAYOUT_FILES}:
+        raise ValueError(f"Unsupported sync.raw_store '{layout}'. Supported values: files, segments.")
+    return layout
+
+
+def _segment_name(key: SegmentKey) -> str:
+    number, generation = key
+    return f"seg-{number:06d}.jsonl" if not generation else f"seg-{number:06d}-{generation}.jsonl"
+
+
+def _segment_key(name: str) -> Optional[SegmentKey]:
+    match = _SEGMENT_RE.match(name)
+    if not match:
+        return None
+    return int(match.group(1)), int(match.group(2) or 0)
+
+
+def _encode(record: Dict[str, Any]) -> bytes:
+    return (json.dumps(record, ensure_ascii=True, sort_keys=True, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+def _legacy_files(raw_dir: str) -> List[str]:
+    if not os.path.isdir(raw_dir):
+        return []
+    return sorted(
+        name
+        for name in os.listdir(raw_dir)
+        if name.endswith(".json")
+        and not name.endswith(".manifest.json")
+        and os.path.isfile(os.path.join(raw_dir, name))
+    )
+
+
+class FileRawStore:
+    """The original layout: one `<id>.json` file per activity in `raw_dir`."""
+
+    layout = LAYOUT_FILES
+
+    def __init__(self, raw_dir: str) -> None:
+        self.raw_dir = raw_dir
+
+    def _path(self, activity_id: str) -> str:
+        return os.path.join(self.raw_dir, f"{activity_id}.json")
+
+    def has(self, activity_id: str) -> bool:
+        return os.path.exists(self._path(activity_id))
+
+    def get(self, activity_id: str) -> Optional[Any]:
+        path = self._path(activity_id)
+        if not os.path.exists(path):
+            return None
+        return read_json(path)
+
+    def put(self, activity_id: str, payload: Any) -> None:
+        write_json(self._path(activity_id), payload)
+
+    def delete(self, activity_id: str) -> bool:
+        path = self._path(activity_id)
+        if not os.path.exists(path):
+            return False
+        os.remove(path)
+        return True
+
+    def ids(self) -> Set[str]:
+        return {name[:-5] for name in _legacy_files(self.raw_dir)}
+
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        for name in _legacy_files(self.raw_dir):
+            yield name[:-5], read_json(os.path.join(self.raw_dir, name))
+
+    def maybe_compact(self, background: bool = False) -> bool:
+        return False
+
+    def close(self) -> None:
+        return
+
+
+class SegmentedRawStore:
+    """Append-only JSONL segments under `<raw_dir>/segments/` plus an id index."""
+
+    layout = LAYOUT_SEGMENTS
+
+    def __init__(
+        self,
+        raw_dir: str,
+        segment_max_bytes: int = SEGMENT_MAX_BYTES,
+        migrate: bool = True,
+        read_only: bool = False,
+    ) -> None:
+        self.raw_dir = raw_dir
+        self.read_only = read_only
+        self.root = os.path.join(raw_dir, SEGMENTS_DIRNAME)
+        self.index_path = os.path.join(self.root, INDEX_FILENAME)
+        self.segment_max_bytes = max(1, int(segment_max_bytes))
+        self.entries: Dict[str, Tuple[SegmentKey, int, int]] = {}
+        self.segment_bytes: Dict[SegmentKey, int] = {}
+        self.compacted_through: Optional[SegmentKey] = None
+        self.counts = {"migrated": 0, "compactions": 0, "replayed": 0}
+        self._active: Optional[SegmentKey] = None
+        self._handle: Optional[Any] = None
+        self._dirty = False
+        self._compaction: Optional[threading.Thread] = None
+        self._compaction_error: Optional[BaseException] = None
+        self._lock = threading.RLock()
+        self._load()
+        # Read-only stores leave legacy `<id>.json` files where they are.
+        if migrate and not read_only:
+            self.migrate_legacy_files()
+
+    # Loading and recovery -------------------------------------------------
+
+    def _segment_path(self, key: SegmentKey) -> str:
+        return os.path.join(self.root, _segment_name(key))
+
+    def _on_disk_segments(self) -> List[SegmentKey]:
+        if not os.path.isdir(self.root):
+            return []
+        keys = [_segment_key(name) for name in os.listdir(self.root)]
+        return sorted(key for key in keys if key is not None)
+
+    def _load(self) -> None:
+        # `index.json` maps id -> [segment, offset, length] as of the last flush;
+        # anything appended since is replayed from the segment tails, and a missing
+        # index is rebuilt from the segments. Read-only stores skip torn tails and
+        # orphaned segments in memory instead of truncating or removing them.
+        indexed: Dict[SegmentKey, int] = {}
+        payload: Any = None
+        if os.path.exists(self.index_path):
+            try:
+                payload = read_json(self.index_path)
+            except Exception:
+                payload = None
+        if isinstance(payload, dict) and payload.get("version") == INDEX_VERSION:
+            for name, size in (payload.get("segments") or {}).items():
+                key = _segment_key(name)
+                if key is not None:
+                    indexed[key] = int(size)
+            for activity_id, value in (payload.get("entries") or {}).items():
+                key = _segment_key(str(value[0])) if isinstance(value, list) and len(value) == 3 else None
+                if key is not None and key in indexed:
+                    self.entries[str(activity_id)] = (key, int(value[1]), int(value[2]))
+            through = payload.get("compacted_through")
+            self.compacted_through = _segment_key(through) if through else None
+
+        newest_indexed = max(indexed) if indexed else None
+        for key in self._on_disk_segments():
+            if key not in indexed and (
+                (self.compacted_through is not None and key <= self.compacted_through)
+                or (key[1] and newest_indexed is not None and key < newest_indexed)
+            ):
+                # Sealed segments left behind after a compaction's index swap, or the
+                # output of a compaction interrupted before it.
+                if not self.read_only:
+                    os.remove(self._segment_path(key))
+                continue
+            self.segment_bytes[key] = self._replay(key, indexed.get(key, 0))
+        self._active = max(self.segment_bytes) if self.segment_bytes else None
+
+    def _replay(self, key: SegmentKey, start: int) -> int:
+        """Apply records past `start` (unindexed tail); returns the segment's valid size."""
+        path = self._segment_path(key)
+        size = os.path.getsize(path)
+        if start > size:
+            # The index is ahead of the file (lost writes); rebuild this segment from scratch.
+            self.entries = {k: v for k, v in self.entries.items() if v[0] != key}
+            start = 0
+        if start == size:
+            return size
+        with open(path, "rb") as f:
+            f.seek(start)
+            data = f.read()
+        offset = start
+        for line in data.splitlines(keepends=True):
+            if not line.endswith(b"\n"):
+                break
+            try:
+                record = json.loads(line)
+            except ValueError:
+                break
+            activity_id = str(record.get("id"))
+            if record.get("deleted"):
+                self.entries.pop(activity_id, None)
+            else:
+                self.entries[activity_id] = (key, offset, len(line))
+            self.counts["replayed"] += 1
+            offset += len(line)
+        if offset < size and not self.read_only:
+            # Torn tail from an interrupted append; drop it so offsets stay valid.
+            with open(path, "r+b") as f:
+                f.truncate(offset)
+        self._dirty = self._dirty or offset > start
+        return offset
+
+    # Reads ----------------------------------------------------------------
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self.entries)
+
+    def has(self, activity_id: str) -> bool:
+        with self._lock:
+            return activity_id in self.entries
+
+    def ids(self) -> Set[str]:
+        with self._lock:
+            return set(self.entries)
+
+    def get(self, activity_id: str) -> Optional[Any]:
+        with self._lock:
+            entry = self.entries.get(activity_id)
+            if entry is None:
+                return None
+            if self._handle is not None and entry[0] == self._active:
+                self._handle.flush()
+            key, offset, length = entry
+            with open(self._segment_path(key), "rb") as f:
+                f.seek(offset)
+                return json.loads(f.read(length))["payload"]
+
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        """Live (id, payload) pairs, read segment by segment in file order."""
+        with self._lock:
+            if self._handle is not None:
+                self._handle.flush()
+            by_segment: Dict[SegmentKey, List[Tuple[int, int, str]]] = {}
+            for activity_id, (key, offset, length) in self.entries.items():
+                by_segment.setdefault(key, []).append((offset, length, activity_id))
+        for key in sorted(by_segment):
+            with open(self._segment_path(key), "rb") as f:
+                data = f.read()
+            for offset, length, activity_id in sorted(by_segment[key]):
+                yield activity_id, json.loads(data[offset : offset + length])["payload"]
+
+    # Writes ---------------------------------------------------------------
+
+    def _check_writable(self) -> None:
+        if self.read_only:
+            raise RuntimeError(f"Raw store {self.raw_dir} was opened read-only")
+
+    def _append(self, record: Dict[str, Any]) -> Tuple[SegmentKey, int, int]:
+        self._check_writable()
+        line = _encode(record)
+        if self._active is None or self.segment_bytes.get(self._active, 0) >= self.segment_max_bytes:
+            self._roll()
+        if self._handle is None:
+            os.makedirs(self.root, exist_ok=True)
+            self._handle = open(self._segment_path(self._active), "ab")
+        offset = self.segment_bytes.get(self._active, 0)
+        self._handle.write(line)
+        self.segment_bytes[self._active] = offset + len(line)
+        self._dirty = True
+        return self._active, offset, len(line)
+
+    def _roll(self) -> None:
+        if self._handle is not None:
+            self._handle.flush()
+            os.fsync(self._handle.fileno())
+            self._handle.close()
+            self._handle = None
+        number = max((key[0] for key in self.segment_bytes), default=0) + 1
+        self._active = (number, 0)
+        self.segment_bytes[self._active] = 0
+
+    def put(self, activity_id: str, payload: Any) -> None:
+        # The index points at the newest record, so the last write wins.
+        with self._lock:
+            self.entries[activity_id] = self._append({"id": activity_id, "payload": payload})
+
+    def delete(self, activity_id: str) -> bool:
+        with self._lock:
+            if activity_id not in self.entries:
+                return False
+            # A tombstone, so replay after a crash does not resurrect the record.
+            self._append({"id": activity_id, "deleted": True})
+            del self.entries[activity_id]
+            return True
+
+    def flush(self) -> None:
+        """fsync the active segment and save the index."""
+        with self._lock:
+            if self._handle is not None:
+                self._handle.flush()
+                os.fsync(self._handle.fileno())
+            if not self._dirty or self.read_only:
+                return
+            self._save_index()
+
+    def _save_index(self) -> None:
+        os.makedirs(self.root, exist_ok=True)
+        write_json(
+            self.index_path,
+            {
+                "version": INDEX_VERSION,
+                "compacted_through": _segment_name(self.compacted_through) if self.compacted_through else None,
+                "segments": {_segment_name(key): size for key, size in sorted(self.segment_bytes.items())},
+                "entries": {
+                    activity_id: [_segment_name(key), offset, length]
+                    for activity_id, (key, offset, length) in sorted(self.entries.items())
+                },
+            },
+        )
+        self._dirty = False
+
+    def close(self) -> None:
+        """Wait for a running compaction, then flush and release the active segment."""
+        thread = self._compaction
+        if thread is not None:
+            thread.join()
+        with self._lock:
+            self.flush()
+            if self._handle is not None:
+                self._handle.close()
+                self._handle = None
+        if self._compaction_error is not None:
+            error, self._compaction_error = self._compaction_error, None
+            raise RuntimeError(f"Raw store compaction failed: {error}") from error
+
+    # Migration --------------------------------------------------------------
+
+    def migrate_legacy_files(self) -> int:
+        """Move `<id>.json` files from the old layout into the segments.
+
+        Files are removed only after the imported records are flushed, so an
+        interrupted migration simply runs again on the next open.
+        """
+        names = _legacy_files(self.raw_dir)
+        if not names:
+            return 0
+        for name in names:
+            try:
+                payload = read_json(os.path.join(self.raw_dir, name))
+            except Exception:
+                continue
+            self.put(name[:-5], payload)
+        self.flush()
+        for name in names:
+            os.remove(os.path.join(self.raw_dir, name))
+        self.counts["migrated"] += len(names)
+        return len(names)
+
+    # Compaction -------------------------------------------------------------
+
+    def garbage_bytes(self) -> int:
+        with self._lock:
+            live = sum(length for _key, _offset, length in self.entries.values())
+            return max(0, sum(self.segment_bytes.values()) - live)
+
+    def maybe_compact(
+        self,
+        background: bool = False,
+        min_garbage_bytes: int = COMPACT_MIN_GARBAGE_BYTES,
+        min_garbage_ratio: float = COMPACT_MIN_GARBAGE_RATIO,
+    ) -> bool:
+        """Compact when superseded records and tombstones dominate; returns whether it started."""
+        with self._lock:
+            if self.read_only or (self._compaction is not None and self._compaction.is_alive()):
+                return False
+            total = sum(self.segment_bytes.values())
+            garbage = self.garbage_bytes()
+            if not total or garbage < min_garbage_bytes or garbage / total < min_garbage_ratio:
+                return False
+        if not background:
+            self.compact()
+            return True
+        self._compaction = threading.Thread(target=self._compact_in_background, name="raw-store-compact", daemon=True)
+        self._compaction.start()
+        return True
+
+    def _compact_in_background(self) -> None:
+        try:
+            self.compact()
+        except BaseException as exc:  # surfaced by close()
+            self._compaction_error = exc
+
+    def compact(self) -> None:
+        """Rewrite the live records of sealed segments into one new segment.
+
+        Writes continue on the active segment, so this can run in the background.
+        """
+        self._check_writable()
+        with self._lock:
+            if self._active is not None and self.segment_bytes.get(self._active):
+                self._roll()
+            sealed = sorted(key for key in self.segment_bytes if key != self._active)
+            if not sealed:
+                return
+            sealed_set = set(sealed)
+            live = {
+                activity_id: entry for activity_id, entry in self.entries.items() if entry[0] in sealed_set
+            }
+            self.flush()
+
+        # Copy live records without holding the lock; writes continue on the active segment.
+        number = sealed[-1][0]
+        generation = max(key[1] for key in sealed if key[0] == number) + 1
+        target = (number, generation)
+        moved: Dict[str, Tuple[SegmentKey, int, int]] = {}
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = self._segment_path(target) + ".tmp"
+        offset = 0
+        with open(tmp_path, "wb") as out:
+            by_segment: Dict[SegmentKey, List[Tuple[int, int, str]]] = {}
+            for activity_id, (key, record_offset, length) in live.items():
+                by_segment.setdefault(key, []).append((record_offset, length, activity_id))
+            for key in sorted(by_segment):
+                with open(self._segment_path(key), "rb") as f:
+                    data = f.read()
+                for record_offset, length, activity_id in sorted(by_segment[key]):
+                    out.write(data[record_offset : record_offset + length])
+                    moved[activity_id] = (target, offset, length)
+                    offset += length
+            out.flush()
+            os.fsync(out.fileno())
+        os.replace(tmp_path, self._segment_path(target))
+
+        with self._lock:
+            for activity_id, entry in moved.items():
+                # Records rewritten or deleted meanwhile keep their newer location.
+                if self.entries.get(activity_id) == live[activity_id]:
+                    self.entries[activity_id] = entry
+            for key in sealed:
+                self.segment_bytes.pop(key, None)
+            self.segment_bytes[target] = offset
+            self.compacted_through = target
+            self._save_index()
+            for key in sealed:
+                path = self._segment_path(key)
+                if os.path.exists(path):
+                    os.remove(path)
+            self.counts["compactions"] += 1
+
+
+_STORES: Dict[Tuple[str, str], Any] = {}
+_STORES_LOCK = threading.Lock()
+
+
+def open_raw_store(
+    raw_dir: str, layout: str = DEFAULT_LAYOUT, reload: bool = False, read_only: bool = False
+) -> Any:
+    """Shared store instance for `raw_dir` (a `SegmentedRawStore` or `FileRawStore`)."""
+    key = (os.path.abspath(raw_dir), layout)
+    with _STORES_LOCK:
+        store = _STORES.get(key)
+        if store is None or reload:
+            if store is not None:
+                store.close()
+            if layout == LAYOUT_SEGMENTS:
+                store = SegmentedRawStore(raw_dir, read_only=read_only)
+            else:
+                store = FileRawStore(raw_dir)
+            _STORES[key] = store
+        return store
+
+
+def forget_raw_store(raw_dir: str) -> None:
+    """Drop cached stores for `raw_dir` (after the directory was deleted)."""
+    path = os.path.abspath(raw_dir)
+    with _STORES_LOCK:
+        for key in [key for key in _STORES if key[0] == path]:
+            store = _STORES.pop(key)
+            if isinstance(store, SegmentedRawStore) and store._handle is not None:
+                store._handle.close()
+                store._handle = None
+
+
+def read_raw_activities(raw_dir: str) -> Iterator[Tuple[str, Any]]:
+    """Every raw activity under `raw_dir`, whichever layout wrote it, without changing the directory."""
+    seen: Set[str] = set()
+    if os.path.isdir(os.path.join(raw_dir, SEGMENTS_DIRNAME)):
+        store = SegmentedRawStore(raw_dir, read_only=True)
+        for activity_id, payload in store.items():
+            seen.add(activity_id)
+            yield activity_id, payload
+    # Old-layout files a sync has not migrated into the segments yet.
+    for name in _legacy_files(raw_dir):
+        if name[:-5] in seen:
+            continue
+        try:
+            payload = read_json(os.path.join(raw_dir, name))
+        except Exception:
+            continue
+        yield name[:-5], payload
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Maintain a segmented raw activity store")
+    parser.add_argument("command", choices=["migrate", "compact", "stats"])
+    parser.add_argument("raw_dir", help="e.g. activities/raw/strava")
+    args = parser.parse_args()
+
+    store = SegmentedRawStore(args.raw_dir, migrate=args.command == "migrate")
+    if args.command == "compact":
+        store.compact()
+    store.close()
+    segments = len(store.segment_bytes)
+    print(
+        f"{len(store)} activities in {segments} segment(s); "
+        f"{store.garbage_bytes()} garbage bytes; migrated {store.counts['migrated']} file(s)"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    try:
+        raise SystemExit(main())
+    except Exception as exc:
+        print(f"ERROR: {exc}", file=sys.stderr)
+        raise
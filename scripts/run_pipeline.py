@@ -27,6 +27,9 @@ RESETTABLE_OUTPUTS = [
     os.path.join("data", "last_sync_summary.json"),
     os.path.join("data", "last_sync_summary.txt"),
     os.path.join("site", "data.json"),
+    os.path.join("activities", "raw", "activities.sqlite"),
+    os.path.join("activities", "raw", "activities.sqlite-wal"),
+    os.path.join("activities", "raw", "activities.sqlite-shm"),
 ]
 RESETTABLE_STATE_FILES = [
     os.path.join("data", "source_state.json"),
@@ -36,6 +39,10 @@ RESETTABLE_STATE_FILES = [
     os.path.join("data", "athletes.json"),
     os.path.join("data", "athletes_strava.json"),
     os.path.join("data", "athletes_garmin.json"),
+    os.path.join("data", "detail_queue_strava.json"),
+    os.path.join("data", "duration_cache_garmin.json"),
+    os.path.join("data", "rate_limit_state_strava.json"),
+    os.path.join("data", "session_bootstrap_garmin.json"),
 ]
 RESETTABLE_RAW_DIRS = [
     os.path.join("activities", "raw"),
@@ -0,0 +1,361 @@
+import argparse
+import hashlib
+import hmac
+import json
+import os
+import sys
+import threading
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+WEBHOOK_QUEUE_PATH = os.path.join("data", "webhook_queue_strava.jsonl")
+WEBHOOK_PATH = "/webhook"
+OBJECT_TYPES = {"activity", "athlete"}
+ASPECT_TYPES = {"create", "update", "delete"}
+
+
+def owner_fingerprint(owner_id: int, secret: str) -> str:
+    """HMAC of an athlete id, the only form in which owner ids are persisted."""
+    key = (secret or "").encode("utf-8")
+    return hmac.new(key, str(owner_id).encode("utf-8"), hashlib.sha256).hexdigest()
+
+
+def validate_event(payload: Any) -> Optional[Dict]:
+    """Return the subset of a Strava push event the sync needs, or None if malformed.
+
+    Queued events carry `owner_fingerprint` instead of Strava's `owner_id`;
+    either is accepted.
+    """
+    if not isinstance(payload, dict):
+        return None
+    object_type = payload.get("object_type")
+    aspect_type = payload.get("aspect_type")
+    if object_type not in OBJECT_TYPES or aspect_type not in ASPECT_TYPES:
+        return None
+    fingerprint = payload.get("owner_fingerprint")
+    try:
+        object_id = int(payload.get("object_id"))
+        owner = (
+            {"owner_fingerprint": fingerprint}
+            if isinstance(fingerprint, str) and fingerprint
+            else {"owner_id": int(payload.get("owner_id"))}
+        )
+    except (TypeError, ValueError):
+        return None
+    updates = payload.get("updates")
+    event = {
+        "object_type": object_type,
+        "object_id": object_id,
+        "aspect_type": aspect_type,
+        "event_time": payload.get("event_time"),
+        "subscription_id": payload.get("subscription_id"),
+        "updates": updates if isinstance(updates, dict) else {},
+    }
+    event.update(owner)
+    return event
+
+
+def _lock(handle: Any) -> None:
+    if fcntl is not None:
+        fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+
+
+def _unlock(handle: Any) -> None:
+    if fcntl is not None:
+        fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+
+
+class EventQueue:
+    """Append-only JSONL queue of push events shared by the receiver and the sync.
+
+    The receiver appends one line per event (flushed and fsynced before it
+    answers Strava). The sync claims the backlog by renaming the file to
+    `<path>.processing`, so events that arrive meanwhile start a fresh file,
+    and deletes the claimed file only after it has applied the events. A
+    claimed file left behind by a crashed run is picked up again first.
+
+    With `owner_secret` (the Strava client secret), appended events store an
+    `owner_fingerprint` in place of the athlete's `owner_id`.
+    """
+
+    def __init__(self, path: str = WEBHOOK_QUEUE_PATH, owner_secret: Optional[str] = None) -> None:
+        self.path = path
+        self.owner_secret = owner_secret
+        self.processing_path = f"{path}.processing"
+        self._lock = threading.Lock()
+        self._claimed_bytes = 0
+
+    def append(self, event: Dict) -> None:
+        if self.owner_secret is not None and "owner_id" in event:
+            event = dict(event)
+            event["owner_fingerprint"] = owner_fingerprint(event.pop("owner_id"), self.owner_secret)
+        line = json.dumps(event, sort_keys=True, ensure_ascii=True) + "\n"
+        parent = os.path.dirname(self.path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            _lock(f)
+            try:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+            finally:
+                _unlock(f)
+
+    def peek(self) -> List[Dict]:
+        """Queued events (claimed first), without claiming them."""
+        events: List[Dict] = []
+        for path in (self.processing_path, self.path):
+            events.extend(_read_events(path)[0])
+        return events
+
+    def claim(self) -> List[Dict]:
+        with self._lock:
+            if not os.path.exists(self.processing_path):
+                if not os.path.exists(self.path):
+                    self._claimed_bytes = 0
+                    return []
+                os.replace(self.path, self.processing_path)
+            events, self._claimed_bytes = _read_events(self.processing_path)
+            return events
+
+    def ack(self, requeue: Iterable[Dict] = ()) -> None:
+        """Drop the claimed file; `requeue` events go back on the live queue.
+
+        Lines appended to the claimed file after it was read (a receiver that
+        opened it just before the rename) are carried over as well.
+        """
+        carried: List[Dict] = list(requeue)
+        with self._lock:
+            if os.path.exists(self.processing_path):
+                with open(self.processing_path, "r", encoding="utf-8") as f:
+                    _lock(f)
+                    try:
+                        f.seek(self._claimed_bytes)
+                        carried.extend(_parse_lines(f.read()))
+                    finally:
+                        _unlock(f)
+                os.remove(self.processing_path)
+            self._claimed_bytes = 0
+        for event in carried:
+            self.append(event)
+
+
+def _parse_lines(text: str) -> List[Dict]:
+    events = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            event = validate_event(json.loads(line))
+        except ValueError:
+            # A torn trailing line from an interrupted append; the event was never acknowledged.
+            continue
+        if event is not None:
+            events.append(event)
+    return events
+
+
+def _read_events(path: str) -> Tuple[List[Dict], int]:
+    if not os.path.exists(path):
+        return [], 0
+    with open(path, "r", encoding="utf-8") as f:
+        _lock(f)
+        try:
+            text = f.read()
+            size = f.tell()
+        finally:
+            _unlock(f)
+    return _parse_lines(text), size
+
+
+class WebhookReceiver:
+    """Minimal HTTP endpoint for Strava push subscriptions.
+
+    `GET /webhook` answers the subscription validation handshake when
+    `hub.verify_token` matches; `POST /webhook` appends the event to the
+    queue and returns 200 right away, as Strava expects within two seconds.
+    """
+
+    def __init__(
+        self,
+        queue: EventQueue,
+        verify_token: str,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ) -> None:
+        self.queue = queue
+        self.verify_token = verify_token
+        self.counts: Dict[str, int] = {"received": 0, "queued": 0, "rejected": 0}
+        self._counts_lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), _handler_for(self))
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> str:
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self.base_url
+
+    def serve_forever(self) -> None:
+        self._httpd.serve_forever()
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "WebhookReceiver":
+        self.start()
+        return self
+
+    def __exit__(self, *_exc: Any) -> None:
+        self.stop()
+
+    def _count(self, key: str) -> None:
+        with self._counts_lock:
+            self.counts[key] += 1
+
+
+def _handler_for(receiver: WebhookReceiver) -> type:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *_args: Any) -> None:
+            return
+
+        def _send(self, status: int, payload: Any) -> None:
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self) -> None:  # noqa: N802 - BaseHTTPRequestHandler API
+            url = urlparse(self.path)
+            if url.path != WEBHOOK_PATH:
+                self._send(404, {"message": "Not Found"})
+                return
+            query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            if (
+                query.get("hub.mode") != "subscribe"
+                or not receiver.verify_token
+                or query.get("hub.verify_token") != receiver.verify_token
+            ):
+                self._send(403, {"message": "Forbidden"})
+                return
+            self._send(200, {"hub.challenge": query.get("hub.challenge", "")})
+
+        def do_POST(self) -> None:  # noqa: N802 - BaseHTTPRequestHandler API
+            length = int(self.headers.get("Content-Length") or 0)
+            body = self.rfile.read(length) if length else b""
+            if urlparse(self.path).path != WEBHOOK_PATH:
+                self._send(404, {"message": "Not Found"})
+                return
+            receiver._count("received")
+            try:
+                event = validate_event(json.loads(body or b"null"))
+            except ValueError:
+                event = None
+            if event is None:
+                receiver._count("rejected")
+                self._send(400, {"message": "Invalid event"})
+                return
+            receiver.queue.append(event)
+            receiver._count("queued")
+            self._send(200, {"status": "queued"})
+
+    return Handler
+
+
+def replay_events(base_url: str, events: Iterable[Dict], timeout: float = 5.0) -> List[int]:
+    """POST recorded events to a receiver the way Strava would; returns HTTP statuses."""
+    statuses = []
+    for event in events:
+        request = urllib.request.Request(
+            base_url.rstrip("/") + WEBHOOK_PATH,
+            data=json.dumps(event).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as resp:
+                statuses.append(resp.status)
+        except urllib.error.HTTPError as exc:
+            statuses.append(exc.code)
+    return statuses
+
+
+def _load_event_file(path: str) -> List[Dict]:
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    stripped = text.strip()
+    if stripped.startswith("["):
+        return list(json.loads(stripped))
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Strava push subscription receiver and event replayer")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    serve = subparsers.add_parser("serve", help="Receive push events into the local queue")
+    serve.add_argument("--host", default="0.0.0.0")
+    serve.add_argument("--port", type=int, default=8080)
+    serve.add_argument("--queue", default=WEBHOOK_QUEUE_PATH)
+    serve.add_argument(
+        "--client-secret",
+        default=os.environ.get("STRAVA_CLIENT_SECRET", ""),
+        help="Key for the owner fingerprints stored in the queue (default: $STRAVA_CLIENT_SECRET)",
+    )
+    serve.add_argument(
+        "--verify-token",
+        default=os.environ.get("STRAVA_WEBHOOK_VERIFY_TOKEN", ""),
+        help="Token echoed during subscription validation (default: $STRAVA_WEBHOOK_VERIFY_TOKEN)",
+    )
+
+    replay = subparsers.add_parser("replay", help="POST recorded events (JSON array or JSONL) to a receiver")
+    replay.add_argument("events_file")
+    replay.add_argument("--url", default="http://127.0.0.1:8080")
+
+    args = parser.parse_args()
+    if args.command == "replay":
+        statuses = replay_events(args.url, _load_event_file(args.events_file))
+        accepted = sum(1 for status in statuses if status == 200)
+        print(f"Replayed {len(statuses)} event(s); {accepted} accepted.")
+        return 0 if accepted == len(statuses) else 1
+
+    if not args.client_secret:
+        raise ValueError("A Strava client secret is required so queued events never store raw athlete ids.")
+    queue = EventQueue(args.queue, owner_secret=args.client_secret)
+    receiver = WebhookReceiver(queue, args.verify_token, host=args.host, port=args.port)
+    print(f"Receiving Strava push events on {receiver.base_url}{WEBHOOK_PATH}; queue: {args.queue}")
+    try:
+        receiver.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    try:
+        raise SystemExit(main())
+    except Exception as exc:
+        print(f"ERROR: {exc}", file=sys.stderr)
+        raise
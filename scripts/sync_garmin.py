@@ -3,17 +3,29 @@ import hashlib
 import hmac
 import json
 import os
+import random
 import shutil
 import sys
-from datetime import datetime, timedelta, timezone
-from typing import Any, Dict, List, Optional, Tuple
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
 
+from activity_store import forget_activities
 from garmin_token_store import decode_token_store_b64, write_token_store_bytes
 from provider_fields import (
     coalesce as _shared_coalesce,
     get_nested as _shared_get_nested,
     pick_duration_seconds as _shared_pick_duration_seconds,
 )
+from raw_manifest import (
+    RawManifest,
+    manifest_path_for,
+    payload_digest,
+    write_raw_activity,
+)
+from raw_store import DEFAULT_LAYOUT, forget_raw_store, open_raw_store, raw_store_layout
 from sync_scope import (
     activity_scope_from_config,
     activity_start_ts as _shared_activity_start_ts,
@@ -26,7 +38,31 @@ SUMMARY_JSON = os.path.join("data", "last_sync_summary.json")
 SUMMARY_TXT = os.path.join("data", "last_sync_summary.txt")
 STATE_PATH = os.path.join("data", "backfill_state_garmin.json")
 ATHLETE_PATH = os.path.join("data", "athletes_garmin.json")
+DURATION_CACHE_PATH = os.path.join("data", "duration_cache_garmin.json")
+DURATION_CACHE_VERSION = 1
+SESSION_BOOTSTRAP_PATH = os.path.join("data", "session_bootstrap_garmin.json")
 TOKEN_STORE_PATH = ".garmin_token_store"
+DEFAULT_ENRICH_WORKERS = 4
+DEFAULT_ENRICH_TIMEOUT_SECONDS = 30.0
+ENRICH_RATE_LIMIT_RETRIES = 2
+DEFAULT_REQUESTS_PER_MINUTE = 60.0
+GARMIN_BACKOFF_SECONDS = 30.0
+GARMIN_MAX_BACKOFF_SECONDS = 300.0
+GARMIN_BACKOFF_JITTER = 0.5
+# Consecutive 429s after which Garmin calls stop for the rest of the run.
+GARMIN_MAX_CONSECUTIVE_RATE_LIMITS = 4
+# Client methods every garminconnect HTTP request passes through.
+GARMIN_REQUEST_METHODS = ("connectapi", "download")
+# Newest activities listed first by a recent pass that has stored digests to compare.
+RECENT_PROBE_SIZE = 10
+DEFAULT_COOLDOWN_MINUTES = 60.0
+DEFAULT_RANGE_DAYS = 180
+DEFAULT_BACKFILL_WORKERS = 4
+# Lower bound for range backfills when no start_date/lookback is configured.
+GARMIN_HISTORY_FLOOR = date(2000, 1, 1)
+
+_RAW_MANIFEST: Optional[RawManifest] = None
+_RAW_STORE_LAYOUT = DEFAULT_LAYOUT
 
 
 def _to_bool(value: Any) -> bool:
@@ -156,7 +192,10 @@ def _normalize_activity(activity: Dict[str, Any]) -> Dict[str, Any]:
     return normalized
 
 
-def _fetch_activity_duration_from_summary(client: Any, activity_id: str) -> Optional[float]:
+def _fetch_activity_duration_from_summary(
+    client: Any, activity_id: str
+) -> Tuple[Optional[float], Optional[str]]:
+    """Duration from the first detail endpoint that reports one, and that endpoint's name."""
     methods = [
         ("get_activity", (activity_id,), {}),
         ("getActivity", (activity_id,), {}),
@@ -169,34 +208,376 @@ def _fetch_activity_duration_from_summary(client: Any, activity_id: str) -> Opti
             continue
         try:
             payload = method(*args, **kwargs)
-        except Exception:
+        except Exception as exc:
+            # Other endpoints would be throttled too; let the caller back off.
+            if _is_rate_limited_error(exc):
+                raise
             continue
         if not isinstance(payload, dict):
             continue
         value = _pick_duration_seconds(*_duration_candidates(payload))
         if value > 0:
+            return value, method_name
+    return None, None
+
+
+class _DurationCache:
+    """Resolved detail lookups keyed by activity id, kept in `data/`.
+
+    Raw files do not survive CI runs, so without this every run would look up
+    the same zero-duration activities again. Lookups that answered without a
+    duration are cached too; failed, throttled or timed-out ones are not.
+    """
+
+    def __init__(self, path: str, entries: Optional[Dict[str, Dict[str, Any]]] = None) -> None:
+        self.path = path
+        self.entries: Dict[str, Dict[str, Any]] = entries or {}
+        self.dirty = False
+
+    @classmethod
+    def load(cls, path: str) -> "_DurationCache":
+        if not os.path.exists(path):
+            return cls(path)
+        try:
+            payload = read_json(path)
+        except Exception:
+            return cls(path)
+        if not isinstance(payload, dict) or payload.get("version") != DURATION_CACHE_VERSION:
+            return cls(path)
+        entries = payload.get("entries")
+        return cls(path, dict(entries) if isinstance(entries, dict) else {})
+
+    def get(self, activity_id: str) -> Optional[Dict[str, Any]]:
+        entry = self.entries.get(activity_id)
+        return entry if isinstance(entry, dict) else None
+
+    def put(self, activity_id: str, moving_time: Optional[float], endpoint: Optional[str]) -> None:
+        self.entries[activity_id] = {
+            "moving_time": moving_time,
+            "endpoint": endpoint,
+            "resolved_utc": utc_now().isoformat(),
+        }
+        self.dirty = True
+
+    def remove(self, activity_id: str) -> None:
+        if self.entries.pop(activity_id, None) is not None:
+            self.dirty = True
+
+    def save(self) -> None:
+        if not self.dirty:
+            return
+        parent = os.path.dirname(self.path)
+        if parent:
+            ensure_dir(parent)
+        write_json(self.path, {"version": DURATION_CACHE_VERSION, "entries": self.entries})
+        self.dirty = False
+
+
+class _GarminLimiter:
+    """Client-side pacing and 429 back-off shared by every Garmin call.
+
+    Calls are spaced to `requests_per_minute` (0 disables pacing). A 429 pauses
+    all callers for a jittered, exponentially growing delay; after
+    GARMIN_MAX_CONSECUTIVE_RATE_LIMITS in a row the limiter trips out and
+    records a cool-down of `cooldown_minutes`, which the next run honours
+    instead of walking straight back into an account lockout.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: float = 0.0,
+        backoff_seconds: float = GARMIN_BACKOFF_SECONDS,
+        cooldown_minutes: float = DEFAULT_COOLDOWN_MINUTES,
+        seed: Optional[int] = None,
+    ) -> None:
+        self.requests_per_minute = max(0.0, float(requests_per_minute))
+        self.interval = 60.0 / self.requests_per_minute if self.requests_per_minute else 0.0
+        self.base_seconds = max(0.0, backoff_seconds)
+        self.cooldown_seconds = max(0.0, cooldown_minutes * 60.0)
+        self.resume_at = 0.0
+        self.consecutive = 0
+        self.cooldown_until: Optional[float] = None
+        self.requests = 0
+        self.rate_limited = 0
+        self.sleep_seconds = 0.0
+        self._next_slot = 0.0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @property
+    def tripped_out(self) -> bool:
+        return self.consecutive >= GARMIN_MAX_CONSECUTIVE_RATE_LIMITS
+
+    def wait(self) -> None:
+        # Slots are reserved under the lock and slept out after it, so
+        # concurrent callers queue up one interval apart.
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot, self.resume_at)
+            self._next_slot = slot + self.interval
+            self.requests += 1
+            delay = slot - now
+            if delay > 0:
+                self.sleep_seconds += delay
+        if delay > 0:
+            time.sleep(delay)
+
+    def trip(self) -> None:
+        with self._lock:
+            self.consecutive += 1
+            self.rate_limited += 1
+            delay = min(GARMIN_MAX_BACKOFF_SECONDS, self.base_seconds * 2 ** (self.consecutive - 1))
+            # Upward jitter only, so workers never retry before the base delay.
+            delay *= 1.0 + GARMIN_BACKOFF_JITTER * self._random.random()
+            self.resume_at = max(self.resume_at, time.monotonic() + delay)
+            # Only a run that used up its retries leaves a cool-down for the next one.
+            if self.tripped_out:
+                self.cooldown_until = max(self.cooldown_until or 0.0, time.time() + self.cooldown_seconds)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.consecutive = 0
+
+    def cooldown_until_iso(self) -> Optional[str]:
+        if self.cooldown_until is None or self.cooldown_until <= time.time():
+            return None
+        return datetime.fromtimestamp(self.cooldown_until, tz=timezone.utc).isoformat()
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "requests_per_minute": self.requests_per_minute,
+            "requests": self.requests,
+            "rate_limited": self.rate_limited,
+            "sleep_seconds": round(self.sleep_seconds, 3),
+            "tripped_out": self.tripped_out,
+            "cooldown_until": self.cooldown_until_iso(),
+        }
+
+
+class _PacedClient:
+    """Wraps a Garmin client so every HTTP request goes through a `_GarminLimiter`.
+
+    garminconnect sends each request through `connectapi`/`download`, and
+    methods such as `get_activities_by_date` page internally, so those hooks
+    are paced on the client itself. A client without them is paced per call.
+    """
+
+    def __init__(self, client: Any, limiter: _GarminLimiter) -> None:
+        self._client = client
+        self.limiter = limiter
+        self._request_level = False
+        for name in GARMIN_REQUEST_METHODS:
+            method = getattr(client, name, None)
+            if callable(method):
+                setattr(client, name, self._paced(getattr(method, "_unpaced", method)))
+                self._request_level = True
+
+    def _paced(self, method: Callable[..., Any]) -> Callable[..., Any]:
+        def _call(*args: Any, **kwargs: Any) -> Any:
+            self.limiter.wait()
+            try:
+                result = method(*args, **kwargs)
+            except Exception as exc:
+                if _is_rate_limited_error(exc):
+                    self.limiter.trip()
+                raise
+            self.limiter.reset()
+            return result
+
+        _call._unpaced = method  # type: ignore[attr-defined]
+        return _call
+
+    def __getattr__(self, name: str) -> Any:
+        value = getattr(self._client, name)
+        if not callable(value) or self._request_level:
             return value
-    return None
+        return self._paced(value)
 
 
-def _enrich_missing_duration(
-    client: Any,
-    normalized: Dict[str, Any],
-    stats: Optional[Dict[str, int]] = None,
-) -> Dict[str, Any]:
-    if _safe_float(normalized.get("moving_time"), 0.0) > 0:
-        return normalized
-    activity_id = str(normalized.get("id") or "").strip()
-    if not activity_id:
-        return normalized
-    resolved = _fetch_activity_duration_from_summary(client, activity_id)
-    if not resolved or resolved <= 0:
-        return normalized
-    enriched = dict(normalized)
-    enriched["moving_time"] = resolved
-    if stats is not None:
-        stats["duration_enriched"] = int(stats.get("duration_enriched", 0)) + 1
-    return enriched
+def _with_rate_limit_retries(client: Any, call: Callable[[], Any]) -> Any:
+    """Run `call`, retrying 429s after the shared back-off until the limiter trips out."""
+    limiter = getattr(client, "limiter", None)
+    while True:
+        try:
+            return call()
+        except Exception as exc:
+            if (
+                not isinstance(limiter, _GarminLimiter)
+                or not _is_rate_limited_error(exc)
+                or limiter.tripped_out
+            ):
+                raise
+
+
+class _DurationEnricher:
+    """Resolves zero-duration activities from detail endpoints on a bounded pool.
+
+    Each page's candidates are fetched concurrently. A call that runs longer
+    than `timeout_seconds` is recorded as timed out and makes no further
+    attempts, but a call already in flight cannot be interrupted: it keeps
+    its worker slot until it returns, and new lookups are only submitted
+    into free slots. Lookups go through the client's `_GarminLimiter`, so a
+    429 on any worker pauses all of them (and the listing calls).
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        workers: int = DEFAULT_ENRICH_WORKERS,
+        timeout_seconds: float = DEFAULT_ENRICH_TIMEOUT_SECONDS,
+        backoff_seconds: float = GARMIN_BACKOFF_SECONDS,
+        cache: Optional[_DurationCache] = None,
+    ) -> None:
+        if not isinstance(client, _PacedClient):
+            client = _PacedClient(client, _GarminLimiter(backoff_seconds=backoff_seconds))
+        self.client = client
+        self.limiter = client.limiter
+        self.cache = cache
+        self.workers = max(1, int(workers))
+        self.timeout_seconds = max(0.1, float(timeout_seconds))
+        self.stats: Dict[str, Any] = {
+            "attempted": 0,
+            "enriched": 0,
+            "missing": 0,
+            "failed": 0,
+            "timed_out": 0,
+            "rate_limited": 0,
+            "skipped": 0,
+            "cache_hits": 0,
+            "latency_seconds_total": 0.0,
+            "latency_seconds_max": 0.0,
+        }
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._started: Dict[str, float] = {}
+        self._timed_out: Set[str] = set()
+        self._overdue: Set[Future] = set()
+        self._lock = threading.Lock()
+
+    def _resolve(self, activity_id: str) -> Tuple[Optional[float], Optional[str], str, float, int]:
+        with self._lock:
+            self._started[activity_id] = time.monotonic()
+        rate_limited = 0
+        for attempt in range(ENRICH_RATE_LIMIT_RETRIES + 1):
+            with self._lock:
+                timed_out = activity_id in self._timed_out
+            if timed_out or self.limiter.tripped_out:
+                return None, None, "skipped", 0.0, rate_limited
+            started = time.monotonic()
+            try:
+                value, endpoint = _fetch_activity_duration_from_summary(self.client, activity_id)
+            except Exception as exc:
+                elapsed = time.monotonic() - started
+                if not _is_rate_limited_error(exc):
+                    return None, None, "failed", elapsed, rate_limited
+                rate_limited += 1
+                if attempt == ENRICH_RATE_LIMIT_RETRIES:
+                    return None, None, "failed", elapsed, rate_limited
+                continue
+            elapsed = time.monotonic() - started
+            outcome = "enriched" if value and value > 0 else "missing"
+            return value, endpoint, outcome, elapsed, rate_limited
+        return None, None, "failed", 0.0, rate_limited
+
+    def enrich(self, activities: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        candidates = {}
+        results = list(activities)
+        for index, activity in enumerate(activities):
+            activity_id = str(activity.get("id") or "").strip()
+            if not activity_id or _safe_float(activity.get("moving_time"), 0.0) > 0:
+                continue
+            cached = self.cache.get(activity_id) if self.cache is not None else None
+            if cached is None:
+                candidates[index] = activity_id
+                continue
+            self.stats["cache_hits"] += 1
+            cached_value = _safe_float(cached.get("moving_time"), 0.0)
+            if cached_value > 0:
+                results[index] = dict(activity, moving_time=cached_value)
+        if not candidates:
+            return results
+        if self.limiter.tripped_out:
+            self.stats["skipped"] += len(candidates)
+            return results
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix="garmin-enrich"
+            )
+
+        queued = list(candidates.items())
+        futures: Dict[Future, int] = {}
+        pending: Set[Future] = set()
+        while queued or pending:
+            # Timed-out calls still running hold their worker; only fill free slots.
+            self._overdue = {future for future in self._overdue if not future.done()}
+            free = self.workers - len(pending) - len(self._overdue)
+            if queued and not pending and free <= 0:
+                released, _ = wait(self._overdue, timeout=self.timeout_seconds, return_when=FIRST_COMPLETED)
+                if not released:
+                    # Every worker is stuck on a timed-out call; leave the rest for a later run.
+                    self.stats["skipped"] += len(queued)
+                    break
+                continue
+            while queued and free > 0:
+                index, activity_id = queued.pop(0)
+                future = self._executor.submit(self._resolve, activity_id)
+                futures[future] = index
+                pending.add(future)
+                free -= 1
+            waiting = pending | self._overdue
+            done, _ = wait(waiting, timeout=min(1.0, self.timeout_seconds), return_when=FIRST_COMPLETED)
+            for future in done & pending:
+                pending.discard(future)
+                index = futures[future]
+                value, endpoint, outcome, elapsed, rate_limited = future.result()
+                self._record(outcome, elapsed, rate_limited)
+                if self.cache is not None and outcome in {"enriched", "missing"}:
+                    self.cache.put(candidates[index], value, endpoint)
+                if outcome == "enriched":
+                    enriched = dict(results[index])
+                    enriched["moving_time"] = value
+                    results[index] = enriched
+            now = time.monotonic()
+            for future in list(pending):
+                activity_id = candidates[futures[future]]
+                with self._lock:
+                    started = self._started.get(activity_id)
+                # Time spent queued or sleeping out a shared back-off does not count.
+                if started is not None and now - max(started, self.limiter.resume_at) > self.timeout_seconds:
+                    pending.discard(future)
+                    with self._lock:
+                        self._timed_out.add(activity_id)
+                    if not future.cancel():
+                        self._overdue.add(future)
+                    self._record("timed_out", now - started, 0)
+        return results
+
+    def _record(self, outcome: str, elapsed: float, rate_limited: int) -> None:
+        stats = self.stats
+        stats["rate_limited"] += rate_limited
+        if outcome == "skipped":
+            stats["skipped"] += 1
+            return
+        stats["attempted"] += 1
+        stats[outcome] += 1
+        stats["latency_seconds_total"] += elapsed
+        stats["latency_seconds_max"] = max(stats["latency_seconds_max"], elapsed)
+
+    def summary(self) -> Dict[str, Any]:
+        stats = dict(self.stats)
+        attempted = stats["attempted"]
+        stats["latency_seconds_total"] = round(stats["latency_seconds_total"], 3)
+        stats["latency_seconds_max"] = round(stats["latency_seconds_max"], 3)
+        stats["latency_seconds_avg"] = (
+            round(self.stats["latency_seconds_total"] / attempted, 3) if attempted else None
+        )
+        stats["workers"] = self.workers
+        return stats
+
+    def close(self) -> None:
+        if self._executor is not None:
+            # Nothing is queued; do not block the run on a timed-out call that is still in flight.
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
 
 
 def _activity_start_ts(activity: Dict[str, Any]) -> Optional[int]:
@@ -290,12 +671,18 @@ def _reset_persisted_data() -> None:
         os.path.join("data", "last_sync_summary.json"),
         os.path.join("data", "last_sync_summary.txt"),
         os.path.join("site", "data.json"),
+        DURATION_CACHE_PATH,
+        SESSION_BOOTSTRAP_PATH,
     ]
     for path in paths:
         if os.path.exists(path):
             os.remove(path)
     if os.path.exists(RAW_DIR):
         shutil.rmtree(RAW_DIR)
+    forget_raw_store(RAW_DIR)
+    manifest_path = manifest_path_for(RAW_DIR)
+    if os.path.exists(manifest_path):
+        os.remove(manifest_path)
 
 
 def _maybe_reset_for_new_account(config: Dict[str, Any]) -> None:
@@ -328,23 +715,17 @@ def _write_token_store(token_bytes: bytes) -> str:
 
 def _candidate_clients(
     garmin_cls: Any, email: str, password: str, allow_credentials: bool
-) -> List[Any]:
-    factories = []
+) -> List[Tuple[str, Callable[[], Any]]]:
+    factories: List[Tuple[str, Callable[[], Any]]] = []
     if allow_credentials and email and password:
         factories.extend(
             [
-                lambda: garmin_cls(email=email, password=password),
-                lambda: garmin_cls(email, password),
+                ("email_password_kwargs", lambda: garmin_cls(email=email, password=password)),
+                ("email_password_args", lambda: garmin_cls(email, password)),
             ]
         )
-    factories.append(lambda: garmin_cls())
-    clients: List[Any] = []
-    for factory in factories:
-        try:
-            clients.append(factory())
-        except Exception:
-            continue
-    return clients
+    factories.append(("default", lambda: garmin_cls()))
+    return factories
 
 
 def _login_variants(
@@ -354,38 +735,113 @@ def _login_variants(
     token_store: Optional[str],
     allow_credentials: bool,
     allow_default_login: bool,
-) -> bool:
-    attempts = []
+) -> List[Tuple[str, Callable[[], Any]]]:
+    attempts: List[Tuple[str, Callable[[], Any]]] = []
     if token_store:
         attempts.extend(
             [
-                lambda: client.login(tokenstore=token_store),
-                lambda: client.login(token_store=token_store),
-                lambda: client.login(token_store),
+                ("tokenstore_kwarg", lambda: client.login(tokenstore=token_store)),
+                ("token_store_kwarg", lambda: client.login(token_store=token_store)),
+                ("token_store_arg", lambda: client.login(token_store)),
             ]
         )
     if allow_credentials and email and password:
         attempts.extend(
             [
-                lambda: client.login(email, password),
-                lambda: client.login(email=email, password=password),
+                ("credentials_args", lambda: client.login(email, password)),
+                ("credentials_kwargs", lambda: client.login(email=email, password=password)),
             ]
         )
     if allow_default_login:
-        attempts.append(lambda: client.login())
+        attempts.append(("default", lambda: client.login()))
+    if token_store:
+        # Some library versions rely on the resumed garth session and do not require login().
+        attempts.append(("resumed_session", lambda: client.get_activities(0, 1)))
+    return attempts
 
-    for attempt in attempts:
-        try:
-            attempt()
-            return True
-        except TypeError:
-            continue
-        except Exception:
-            continue
-    return False
+
+def _session_bootstrap_key(
+    token_bytes: Optional[bytes], email: str, password: str, strict_token_mode: bool
+) -> str:
+    # Keyed by the secrets, so the published record cannot be matched against guessed emails.
+    secret = hashlib.sha256((token_bytes or b"") + b"\0" + password.encode("utf-8")).digest()
+    message = f"{email.lower()}:{int(strict_token_mode)}".encode("utf-8")
+    return hmac.new(secret, message, hashlib.sha256).hexdigest()
+
+
+def _load_session_bootstrap(key: str) -> Optional[Dict[str, Any]]:
+    if not os.path.exists(SESSION_BOOTSTRAP_PATH):
+        return None
+    try:
+        payload = read_json(SESSION_BOOTSTRAP_PATH)
+    except Exception:
+        return None
+    if not isinstance(payload, dict) or payload.get("key") != key:
+        return None
+    if not payload.get("constructor") or not payload.get("login"):
+        return None
+    return payload
+
+
+def _save_session_bootstrap(key: str, constructor: str, login: str) -> None:
+    ensure_dir(os.path.dirname(SESSION_BOOTSTRAP_PATH) or ".")
+    write_json(
+        SESSION_BOOTSTRAP_PATH,
+        {
+            "key": key,
+            "constructor": constructor,
+            "login": login,
+            "updated_utc": utc_now().isoformat(),
+            "version": 1,
+        },
+    )
 
 
-def _load_garmin_client(config: Dict[str, Any]) -> Any:
+def _try_bootstrap(
+    factory: Callable[[], Any],
+    attempts_for: Callable[[Any], List[Tuple[str, Callable[[], Any]]]],
+    accept: Callable[[str], bool],
+    limiter: Optional[_GarminLimiter] = None,
+) -> Tuple[Optional[Any], Optional[str]]:
+    try:
+        client = factory()
+    except Exception:
+        return None, None
+    for login_name, attempt in attempts_for(client):
+        if not accept(login_name):
+            continue
+        while True:
+            if limiter is not None:
+                limiter.wait()
+            try:
+                attempt()
+                if limiter is not None:
+                    limiter.reset()
+                return client, login_name
+            except Exception as exc:
+                if limiter is None or not _is_rate_limited_error(exc):
+                    break
+                # A throttled login is Garmin's SSO lockout; other variants would only
+                # extend it, so retry this one after the back-off until the limiter trips.
+                limiter.trip()
+                if limiter.tripped_out:
+                    raise
+    return None, None
+
+
+def _load_garmin_client(
+    config: Dict[str, Any], limiter: Optional[_GarminLimiter] = None, persist: bool = True
+) -> Tuple[Any, Dict[str, Any]]:
+    """Authenticated Garmin client plus how it was obtained.
+
+    The constructor and login variant that worked last time are recorded
+    (keyed by a hash of the token store and account) in
+    `data/session_bootstrap_garmin.json` and tried first, so a normal run
+    needs a single login instead of probing every variant (`persist=False`
+    reads the record but never writes it). Login attempts are paced by
+    `limiter`; a rate-limited login aborts the search.
+    """
+    started = time.monotonic()
     try:
         from garminconnect import Garmin
     except ImportError as exc:
@@ -417,39 +873,62 @@ def _load_garmin_client(config: Dict[str, Any]) -> Any:
             "Garmin strict token-only mode is enabled, but no garmin.token_store_b64 is configured."
         )
 
-    clients = _candidate_clients(
+    factories = _candidate_clients(
         Garmin,
         email,
         password,
         allow_credentials=not strict_token_mode,
     )
-    if not clients:
-        raise RuntimeError("Unable to initialize Garmin API client.")
 
-    for client in clients:
-        if _login_variants(
+    def _attempts_for(client: Any) -> List[Tuple[str, Callable[[], Any]]]:
+        return _login_variants(
             client,
             email,
             password,
             token_store,
             allow_credentials=not strict_token_mode,
             allow_default_login=not strict_token_mode,
-        ):
-            if garth and token_store and hasattr(garth, "save"):
-                try:
-                    garth.save(token_store)
-                except Exception:
-                    pass
-            return client
+        )
 
-    if token_store and garth and hasattr(garth, "resume"):
-        for client in clients:
+    def _finish(client: Any, constructor: str, login: str, path: str) -> Tuple[Any, Dict[str, Any]]:
+        if garth and token_store and login != "resumed_session" and hasattr(garth, "save"):
             try:
-                # Some library versions rely on resumed garth session and do not require login().
-                client.get_activities(0, 1)
-                return client
+                garth.save(token_store)
             except Exception:
+                pass
+        if path == "search" and persist:
+            _save_session_bootstrap(bootstrap_key, constructor, login)
+        return client, {
+            "path": path,
+            "constructor": constructor,
+            "login": login,
+            "seconds": round(time.monotonic() - started, 3),
+        }
+
+    bootstrap_key = _session_bootstrap_key(token_bytes, email, password, strict_token_mode)
+    cached = _load_session_bootstrap(bootstrap_key)
+    if cached:
+        for constructor, factory in factories:
+            if constructor != cached["constructor"]:
                 continue
+            client, login = _try_bootstrap(
+                factory, _attempts_for, lambda name: name == cached["login"], limiter
+            )
+            if client is not None and login is not None:
+                return _finish(client, constructor, login, "cached")
+        print("Cached Garmin login path failed; trying every login variant.")
+
+    # Full search: login variants first on every client, the resumed-session probe last.
+    for probe_pass in (False, True):
+        for constructor, factory in factories:
+            client, login = _try_bootstrap(
+                factory,
+                _attempts_for,
+                lambda name, probe=probe_pass: (name == "resumed_session") == probe,
+                limiter,
+            )
+            if client is not None and login is not None:
+                return _finish(client, constructor, login, "search")
 
     if strict_token_mode:
         raise RuntimeError(
@@ -472,8 +951,10 @@ def _fetch_page(client: Any, start: int, limit: int) -> List[Dict[str, Any]]:
         if not callable(method):
             continue
         try:
-            payload = method(*args, **kwargs)
+            payload = _with_rate_limit_retries(client, lambda: method(*args, **kwargs))
         except Exception as exc:
+            if _is_rate_limited_error(exc):
+                raise
             errors.append(f"{method_name}: {exc}")
             continue
         if isinstance(payload, list):
@@ -488,6 +969,49 @@ def _fetch_page(client: Any, start: int, limit: int) -> List[Dict[str, Any]]:
     raise RuntimeError(f"Unable to fetch Garmin activities ({detail}).")
 
 
+def _date_range_method(client: Any) -> Optional[Any]:
+    for method_name in ("get_activities_by_date", "getActivitiesByDate"):
+        method = getattr(client, method_name, None)
+        if callable(method):
+            return method
+    return None
+
+
+def _fetch_range(client: Any, start_date: date, end_date: date) -> List[Dict[str, Any]]:
+    """Every activity whose (local) start date falls within [start_date, end_date]."""
+    method = _date_range_method(client)
+    if method is None:
+        raise RuntimeError("Garmin client has no date-range activities API method.")
+    payload = _with_rate_limit_retries(client, lambda: method(start_date.isoformat(), end_date.isoformat()))
+    if isinstance(payload, dict):
+        payload = payload.get("activities")
+    if not isinstance(payload, list):
+        return []
+    return [item for item in payload if isinstance(item, dict)]
+
+
+def _split_date_ranges(start_date: date, end_date: date, range_days: int) -> List[Dict[str, Any]]:
+    """Contiguous inclusive date ranges covering [start_date, end_date], newest first."""
+    range_days = max(1, range_days)
+    ranges = []
+    cursor = end_date
+    while cursor >= start_date:
+        lower = max(start_date, cursor - timedelta(days=range_days - 1))
+        ranges.append({"start": lower.isoformat(), "end": cursor.isoformat(), "completed": False})
+        cursor = lower - timedelta(days=1)
+    return ranges
+
+
+def _range_backfill_bounds(after: int) -> Tuple[date, date]:
+    # Range queries match on local dates, which can sit a day either side of UTC.
+    start = (
+        datetime.fromtimestamp(after, tz=timezone.utc).date() - timedelta(days=1)
+        if after > 0
+        else GARMIN_HISTORY_FLOOR
+    )
+    return start, utc_now().date() + timedelta(days=1)
+
+
 def _is_rate_limited_error(exc: Exception) -> bool:
     name = exc.__class__.__name__.lower()
     text = str(exc).lower()
@@ -503,16 +1027,34 @@ def _write_activity(activity: Dict[str, Any]) -> bool:
     if "/" in activity_id or "\\" in activity_id or ".." in activity_id:
         return False
 
-    path = os.path.join(RAW_DIR, f"{activity_id}.json")
-    if os.path.exists(path):
-        try:
-            existing = read_json(path)
-            if existing == activity:
-                return False
-        except Exception:
-            pass
-    write_json(path, activity)
-    return True
+    return write_raw_activity(
+        _raw_store(), _raw_manifest(), activity_id, activity, _activity_start_ts(activity)
+    )
+
+
+def _raw_manifest(reload: bool = False) -> RawManifest:
+    global _RAW_MANIFEST
+    path = manifest_path_for(RAW_DIR)
+    if reload or _RAW_MANIFEST is None or _RAW_MANIFEST.path != path:
+        _RAW_MANIFEST = RawManifest.load(path)
+    return _RAW_MANIFEST
+
+
+def _raw_store() -> Any:
+    return open_raw_store(RAW_DIR, _RAW_STORE_LAYOUT)
+
+
+def _open_raw_store(config: Dict[str, Any], dry_run: bool) -> Any:
+    """Open this run's raw store, migrating the old layout and starting compaction if due.
+
+    A dry run opens it read-only, so no recovery or migration touches the disk.
+    """
+    global _RAW_STORE_LAYOUT
+    _RAW_STORE_LAYOUT = raw_store_layout(config)
+    store = open_raw_store(RAW_DIR, _RAW_STORE_LAYOUT, reload=True, read_only=dry_run)
+    if not dry_run:
+        store.maybe_compact(background=True)
+    return store
 
 
 def _sync_recent(
@@ -520,8 +1062,21 @@ def _sync_recent(
     per_page: int,
     recent_days: int,
     dry_run: bool,
-    enrich_stats: Optional[Dict[str, int]] = None,
+    enricher: _DurationEnricher,
+    known_digests: Optional[Dict[str, Any]] = None,
+    high_water_ts: Optional[int] = None,
 ) -> Dict[str, Any]:
+    """Refresh the last `recent_days` of activities.
+
+    `known_digests` maps each activity id seen by earlier recent passes to
+    `[start_ts, payload digest]`; it lives in the backfill state under
+    `data/`, so it survives runs that start without `activities/raw/`. With
+    digests stored, the pass first lists only the newest `RECENT_PROBE_SIZE`
+    activities and stops there if they all match and are no newer than the
+    previous run's high-water mark, so a quiet day costs one small request.
+    Offset paging also stops after the first full page that matches.
+    """
+    known_digests = known_digests if isinstance(known_digests, dict) else {}
     if recent_days <= 0:
         return {
             "fetched": 0,
@@ -530,7 +1085,10 @@ def _sync_recent(
             "newest_ts": None,
             "rate_limited": False,
             "rate_limit_message": "",
+            "pages": 0,
+            "early_stopped": False,
             "activity_ids": [],
+            "digests": {},
         }
 
     after = int((utc_now() - timedelta(days=recent_days)).timestamp())
@@ -540,39 +1098,94 @@ def _sync_recent(
     oldest_ts = None
     newest_ts = None
     fetched_ids = set()
+    digests: Dict[str, List[Any]] = {}
     rate_limited = False
     rate_limit_message = ""
+    pages = 0
+    early_stopped = False
+    use_range = _date_range_method(client) is not None
 
-    while True:
-        try:
-            activities = _fetch_page(client, offset, per_page)
-        except Exception as exc:
-            if _is_rate_limited_error(exc):
-                rate_limited = True
-                rate_limit_message = str(exc)
-                break
-            raise
-        if not activities:
-            break
-
+    def _take(activities: List[Any]) -> Tuple[bool, bool]:
+        """Store one listing; returns (every activity already known, reached `after`)."""
+        nonlocal total, new_or_updated, oldest_ts, newest_ts
         reached_boundary = False
+        in_range = []
         for raw_activity in activities:
             activity = _normalize_activity(raw_activity)
             if not activity:
                 continue
-            activity = _enrich_missing_duration(client, activity, enrich_stats)
             ts = _activity_start_ts(activity)
             if ts is not None and ts < after:
                 reached_boundary = True
                 continue
+            if str(activity["id"]) not in fetched_ids:
+                in_range.append(activity)
+        known = bool(in_range) and high_water_ts is not None
+        for activity in enricher.enrich(in_range):
+            ts = _activity_start_ts(activity)
+            activity_id = str(activity["id"])
+            digest = payload_digest(activity)[0]
+            if known and (ts is None or ts > high_water_ts or known_digests.get(activity_id) != [ts, digest]):
+                known = False
             total += 1
             if ts is not None:
                 oldest_ts = ts if oldest_ts is None else min(oldest_ts, ts)
                 newest_ts = ts if newest_ts is None else max(newest_ts, ts)
-            fetched_ids.add(str(activity["id"]))
+            fetched_ids.add(activity_id)
+            digests[activity_id] = [ts, digest]
             if not dry_run and _write_activity(activity):
                 new_or_updated += 1
+        return known, reached_boundary
+
+    done = False
+    if known_digests and high_water_ts is not None:
+        # A quiet day costs one small request: list only the newest few first.
+        try:
+            activities = _fetch_page(client, 0, RECENT_PROBE_SIZE)
+        except Exception as exc:
+            if not _is_rate_limited_error(exc):
+                raise
+            rate_limited = True
+            rate_limit_message = str(exc)
+            activities = []
+        pages += 1
+        known, reached_boundary = _take(activities)
+        offset = len(activities)
+        complete = reached_boundary or len(activities) < RECENT_PROBE_SIZE
+        early_stopped = known and not complete
+        done = rate_limited or complete or known
+
+    if not done and use_range:
+        # One bounded query instead of paging back from the newest activity.
+        start_date, end_date = _range_backfill_bounds(after)
+        try:
+            activities = _fetch_range(client, start_date, end_date)
+        except Exception as exc:
+            if not _is_rate_limited_error(exc):
+                raise
+            rate_limited = True
+            rate_limit_message = str(exc)
+            activities = []
+        pages += 1
+        _take(activities)
 
+    while not done and not use_range:
+        try:
+            activities = _fetch_page(client, offset, per_page)
+        except Exception as exc:
+            if _is_rate_limited_error(exc):
+                rate_limited = True
+                rate_limit_message = str(exc)
+                break
+            raise
+        if not activities:
+            break
+        pages += 1
+        page_known, reached_boundary = _take(activities)
+        if page_known and not reached_boundary and len(activities) >= per_page:
+            # Everything older was stored by an earlier run.
+            early_stopped = True
+            break
         if reached_boundary or len(activities) < per_page:
             break
         offset += len(activities)
@@ -584,27 +1197,197 @@ def _sync_recent(
         "newest_ts": newest_ts,
         "rate_limited": rate_limited,
         "rate_limit_message": rate_limit_message,
+        "pages": pages,
+        "early_stopped": early_stopped,
         "activity_ids": sorted(fetched_ids),
+        # Entries a shortened pass did not reach are kept while still inside the window.
+        "digests": dict(
+            {
+                activity_id: entry
+                for activity_id, entry in known_digests.items()
+                if isinstance(entry, list) and len(entry) == 2 and _safe_int(entry[0]) is not None and entry[0] >= after
+            },
+            **digests,
+        ),
+    }
+
+
+def _backfill_ranges(
+    client: Any,
+    ranges: List[Dict[str, Any]],
+    after: int,
+    dry_run: bool,
+    enricher: _DurationEnricher,
+    workers: int,
+) -> Dict[str, Any]:
+    """Fetch the open date ranges concurrently; marks each range completed in place.
+
+    Results are processed (enriched and written) on the calling thread as
+    ranges finish, so enrichment and the raw manifest stay single-writer.
+    """
+    result: Dict[str, Any] = {
+        "fetched": 0,
+        "new_or_updated": 0,
+        "activity_ids": set(),
+        "min_ts": None,
+        "max_ts": None,
+        "rate_limited": False,
+        "rate_limit_message": "",
+    }
+    open_ranges = [item for item in ranges if not item.get("completed")]
+    if not open_ranges:
+        return result
+
+    executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="garmin-range")
+    try:
+        futures = {
+            executor.submit(
+                _fetch_range,
+                client,
+                date.fromisoformat(item["start"]),
+                date.fromisoformat(item["end"]),
+            ): item
+            for item in open_ranges
+        }
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                item = futures[future]
+                try:
+                    activities = future.result()
+                except Exception as exc:
+                    if not _is_rate_limited_error(exc):
+                        for other in pending:
+                            other.cancel()
+                        raise
+                    if not result["rate_limited"]:
+                        result["rate_limited"] = True
+                        result["rate_limit_message"] = str(exc)
+                        # Ranges already running finish; queued ones wait for the next run.
+                        for other in pending:
+                            other.cancel()
+                    continue
+                in_range = []
+                for raw_activity in activities:
+                    activity = _normalize_activity(raw_activity)
+                    ts = _activity_start_ts(activity) if activity else None
+                    if activity and not (ts is not None and ts < after):
+                        in_range.append(activity)
+                for activity in enricher.enrich(in_range):
+                    ts = _activity_start_ts(activity)
+                    result["fetched"] += 1
+                    result["activity_ids"].add(str(activity["id"]))
+                    if ts is not None:
+                        result["min_ts"] = ts if result["min_ts"] is None else min(result["min_ts"], ts)
+                        result["max_ts"] = ts if result["max_ts"] is None else max(result["max_ts"], ts)
+                    if not dry_run and _write_activity(activity):
+                        result["new_or_updated"] += 1
+                item["completed"] = True
+            pending = {future for future in pending if not future.cancelled()}
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+    return result
+
+
+def _active_cooldown() -> Optional[str]:
+    """ISO timestamp of a persisted rate-limit cool-down that has not expired yet."""
+    until = str(_load_state().get("cooldown_until") or "").strip()
+    if not until:
+        return None
+    try:
+        parsed = datetime.fromisoformat(until.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return until if parsed > utc_now() else None
+
+
+def _cooldown_summary(config: Dict[str, Any], cooldown_until: Optional[str], message: str) -> Dict[str, Any]:
+    return {
+        "source": "garmin",
+        "fetched": 0,
+        "new_or_updated": 0,
+        "deleted": 0,
+        "lookback_start_ts": _start_after_ts(config),
+        "timestamp_utc": utc_now().isoformat(),
+        "rate_limited": True,
+        "rate_limit_message": message,
+        "cooldown_until": cooldown_until,
     }
 
 
 def sync_garmin(dry_run: bool, prune_deleted: bool) -> Dict[str, Any]:
     config = load_config()
+    garmin_cfg = config.get("garmin", {}) or {}
+    cooldown_until = _active_cooldown()
+    if cooldown_until:
+        message = f"Garmin rate-limit cool-down active until {cooldown_until}; skipping sync."
+        print(message)
+        return _cooldown_summary(config, cooldown_until, message)
+    if not dry_run:
+        _maybe_reset_for_new_account(config)
+
+    limiter = _GarminLimiter(
+        requests_per_minute=float(garmin_cfg.get("requests_per_minute", DEFAULT_REQUESTS_PER_MINUTE)),
+        backoff_seconds=float(garmin_cfg.get("backoff_seconds", GARMIN_BACKOFF_SECONDS)),
+        cooldown_minutes=float(garmin_cfg.get("cooldown_minutes", DEFAULT_COOLDOWN_MINUTES)),
+    )
+    try:
+        raw_client, client_startup = _load_garmin_client(config, limiter, persist=not dry_run)
+    except Exception as exc:
+        if not _is_rate_limited_error(exc):
+            raise
+        cooldown_until = limiter.cooldown_until_iso()
+        if not dry_run:
+            state = _load_state()
+            state["cooldown_until"] = cooldown_until
+            _save_state(state)
+        message = f"Garmin login rate limited: {exc}"
+        print(message)
+        return _cooldown_summary(config, cooldown_until, message)
+
+    client = _PacedClient(raw_client, limiter)
+    ensure_dir(RAW_DIR)
+    manifest = _raw_manifest(reload=True)
+    _open_raw_store(config, dry_run)
+
+    enricher = _DurationEnricher(
+        client,
+        workers=int(garmin_cfg.get("enrich_workers", DEFAULT_ENRICH_WORKERS)),
+        timeout_seconds=float(garmin_cfg.get("enrich_timeout_seconds", DEFAULT_ENRICH_TIMEOUT_SECONDS)),
+        cache=_DurationCache.load(DURATION_CACHE_PATH),
+    )
+    try:
+        summary = _sync_with_client(config, client, enricher, manifest, dry_run, prune_deleted)
+    finally:
+        enricher.close()
+    summary["client_startup"] = client_startup
+    return summary
+
+
+def _sync_with_client(
+    config: Dict[str, Any],
+    client: Any,
+    enricher: _DurationEnricher,
+    manifest: RawManifest,
+    dry_run: bool,
+    prune_deleted: bool,
+) -> Dict[str, Any]:
     sync_cfg = config.get("sync", {}) or {}
+    garmin_cfg = config.get("garmin", {}) or {}
     per_page = int(sync_cfg.get("per_page", 200))
     after = _start_after_ts(config)
     activity_scope = _activity_scope(config)
     recent_days = int(sync_cfg.get("recent_days", 7))
     resume_backfill = bool(sync_cfg.get("resume_backfill", True))
 
-    if not dry_run:
-        _maybe_reset_for_new_account(config)
-
-    client = _load_garmin_client(config)
-    ensure_dir(RAW_DIR)
-
-    enrich_stats: Dict[str, int] = {"duration_enriched": 0}
-    recent_summary = _sync_recent(client, per_page, recent_days, dry_run, enrich_stats)
+    previous_state = _load_state()
+    high_water_ts = _safe_int(previous_state.get("high_water_ts"))
+    recent_summary = _sync_recent(
+        client, per_page, recent_days, dry_run, enricher, previous_state.get("recent_digests"), high_water_ts
+    )
 
     total = 0
     new_or_updated = 0
@@ -628,12 +1411,53 @@ def sync_garmin(dry_run: bool, prune_deleted: bool) -> Dict[str, Any]:
         elif state.get("completed"):
             skip_backfill = True
 
-    next_offset = _safe_int(state.get("next_offset")) if state else None
-    if next_offset is None:
-        next_offset = 0
+    backfill_mode = "range" if _date_range_method(client) is not None else "offset"
+    if state and not skip_backfill and state.get("backfill_mode", "offset") != backfill_mode:
+        print(f"Garmin backfill mode changed to {backfill_mode}; restarting cursor.")
+        state = {}
+
+    # Offset mode resumes from the oldest start time already fetched; the stored
+    # offset is only a hint because new uploads shift every offset.
+    cursor_ts = _safe_int(state.get("cursor_ts")) if state else None
+    cursor_ids = {str(item) for item in (state.get("cursor_ids") or [])} if state else set()
+    offset_hint = _safe_int(_coalesce(state.get("offset_hint"), state.get("next_offset"))) if state else None
+    if offset_hint is None:
+        offset_hint = 0
+    resumed_backfill = cursor_ts is not None or offset_hint > 0
+    ranges: List[Dict[str, Any]] = []
+    if backfill_mode == "range" and not skip_backfill:
+        stored_ranges = state.get("ranges") if state else None
+        if isinstance(stored_ranges, list) and stored_ranges:
+            ranges = [dict(item) for item in stored_ranges if isinstance(item, dict)]
+            resumed_backfill = True
+        else:
+            ranges = _split_date_ranges(
+                *_range_backfill_bounds(after),
+                int(garmin_cfg.get("range_days", DEFAULT_RANGE_DAYS)),
+            )
 
-    if not rate_limited and not skip_backfill:
-        offset = next_offset
+    if not rate_limited and not skip_backfill and backfill_mode == "range":
+        result = _backfill_ranges(
+            client,
+            ranges,
+            after,
+            dry_run,
+            enricher,
+            int(garmin_cfg.get("backfill_workers", DEFAULT_BACKFILL_WORKERS)),
+        )
+        total = result["fetched"]
+        new_or_updated = result["new_or_updated"]
+        fetched_ids.update(result["activity_ids"])
+        min_ts = result["min_ts"]
+        max_ts = result["max_ts"]
+        if result["rate_limited"]:
+            rate_limited = True
+            rate_limit_message = result["rate_limit_message"]
+        exhausted = all(item.get("completed") for item in ranges)
+    elif not rate_limited and not skip_backfill:
+        offset = offset_hint
+        locate_cursor = cursor_ts is not None
+        step_back = per_page
         while True:
             try:
                 activities = _fetch_page(client, offset, per_page)
@@ -644,29 +1468,61 @@ def sync_garmin(dry_run: bool, prune_deleted: bool) -> Dict[str, Any]:
                     break
                 raise
             if not activities:
+                if locate_cursor and offset > 0:
+                    # Deletions since the last run pushed the hint past the end; search backwards.
+                    offset = max(0, offset - step_back)
+                    step_back *= 2
+                    continue
                 exhausted = True
                 break
 
+            page = [_normalize_activity(raw_activity) for raw_activity in activities]
+            page = [activity for activity in page if activity]
+            page_ts = [ts for ts in (_activity_start_ts(activity) for activity in page) if ts is not None]
+            if locate_cursor and offset > 0 and page_ts and max(page_ts) < cursor_ts:
+                # Deletions since the last run moved the cursor to a lower offset; step back.
+                offset = max(0, offset - step_back)
+                step_back *= 2
+                continue
+            locate_cursor = False
+
             reached_boundary = False
-            for raw_activity in activities:
-                activity = _normalize_activity(raw_activity)
-                if not activity:
-                    continue
-                activity = _enrich_missing_duration(client, activity, enrich_stats)
+            in_range = []
+            for activity in page:
+                activity_id = str(activity["id"])
                 ts = _activity_start_ts(activity)
                 if ts is not None and ts < after:
                     reached_boundary = True
                     continue
+                if activity_id in fetched_ids:
+                    # Page boundaries shift when activities are added mid-run.
+                    continue
+                if (
+                    ts is not None
+                    and cursor_ts is not None
+                    and (ts > cursor_ts or (ts == cursor_ts and activity_id in cursor_ids))
+                ):
+                    continue
+                in_range.append(activity)
+            for activity in enricher.enrich(in_range):
+                ts = _activity_start_ts(activity)
+                activity_id = str(activity["id"])
                 total += 1
-                fetched_ids.add(str(activity["id"]))
+                fetched_ids.add(activity_id)
                 if ts is not None:
                     min_ts = ts if min_ts is None else min(min_ts, ts)
                     max_ts = ts if max_ts is None else max(max_ts, ts)
                 if not dry_run and _write_activity(activity):
                     new_or_updated += 1
+                if ts is not None:
+                    if cursor_ts is None or ts < cursor_ts:
+                        cursor_ts = ts
+                        cursor_ids = {activity_id}
+                    elif ts == cursor_ts:
+                        cursor_ids.add(activity_id)
 
             offset += len(activities)
-            next_offset = offset
+            offset_hint = offset
             if reached_boundary or len(activities) < per_page:
                 exhausted = True
                 break
@@ -675,26 +1531,35 @@ def sync_garmin(dry_run: bool, prune_deleted: bool) -> Dict[str, Any]:
         prune_deleted
         and not dry_run
         and not skip_backfill
+        and not resumed_backfill
         and exhausted
         and not rate_limited
     )
     deleted = 0
     if can_prune_deleted:
-        for filename in os.listdir(RAW_DIR):
-            if not filename.endswith(".json"):
-                continue
-            activity_id = filename[:-5]
-            if activity_id not in fetched_ids:
-                os.remove(os.path.join(RAW_DIR, filename))
-                deleted += 1
+        # Payloads stored before the manifest existed are not indexed yet.
+        raw_store = _raw_store()
+        stored_ids = manifest.ids() | raw_store.ids()
+        pruned = sorted(stored_ids - fetched_ids)
+        for activity_id in pruned:
+            raw_store.delete(activity_id)
+            manifest.remove(activity_id)
+            if enricher.cache is not None:
+                enricher.cache.remove(activity_id)
+            deleted += 1
+        if pruned:
+            forget_activities(config, "garmin", pruned)
     elif prune_deleted and not dry_run:
         print(
-            "Skipping prune_deleted for Garmin: pruning requires a full backfill scan in this run."
+            "Skipping prune_deleted for Garmin: pruning requires a full backfill scan in this run "
+            "(no resume cursor, no rate-limit)."
         )
 
     completed = True if skip_backfill else (exhausted and not rate_limited)
-    if completed:
-        next_offset = None
+    if completed or backfill_mode != "offset":
+        cursor_ts = None
+        cursor_ids = set()
+        offset_hint = None
 
     if not dry_run:
         if skip_backfill and state:
@@ -705,7 +1570,11 @@ def sync_garmin(dry_run: bool, prune_deleted: bool) -> Dict[str, Any]:
         else:
             state_update = {
                 "after": after,
-                "next_offset": next_offset,
+                "backfill_mode": backfill_mode,
+                "cursor_ts": cursor_ts,
+                "cursor_ids": sorted(cursor_ids),
+                "offset_hint": offset_hint,
+                "ranges": None if completed or backfill_mode != "range" else ranges,
                 "completed": completed,
                 "oldest_seen_ts": min_ts,
                 "newest_seen_ts": max_ts,
@@ -713,7 +1582,18 @@ def sync_garmin(dry_run: bool, prune_deleted: bool) -> Dict[str, Any]:
                 "last_run_utc": utc_now().isoformat(),
             }
         state_update["activity_scope"] = activity_scope
+        # Newest start time stored so far; the next recent pass can stop below it.
+        high_water_candidates = [
+            ts for ts in (high_water_ts, recent_summary.get("newest_ts"), max_ts) if ts is not None
+        ]
+        state_update["high_water_ts"] = max(high_water_candidates) if high_water_candidates else None
+        state_update["recent_digests"] = recent_summary.get("digests", {})
+        state_update["cooldown_until"] = enricher.limiter.cooldown_until_iso()
         _save_state(state_update)
+        _raw_store().close()
+        manifest.save()
+        if enricher.cache is not None:
+            enricher.cache.save()
 
     total_fetched = total + int(recent_summary.get("fetched", 0))
     total_new_or_updated = new_or_updated + int(recent_summary.get("new_or_updated", 0))
@@ -722,14 +1602,20 @@ def sync_garmin(dry_run: bool, prune_deleted: bool) -> Dict[str, Any]:
         "source": "garmin",
         "fetched": total_fetched,
         "new_or_updated": total_new_or_updated,
+        "new": manifest.counts["new"],
+        "updated": manifest.counts["updated"],
         "deleted": deleted,
         "lookback_start_ts": after,
         "timestamp_utc": utc_now().isoformat(),
         "rate_limited": rate_limited,
         "backfill_completed": completed,
-        "backfill_next_offset": next_offset,
-        "duration_enriched": int(enrich_stats.get("duration_enriched", 0)),
-        "recent_sync": recent_summary,
+        "backfill_cursor_ts": cursor_ts,
+        "backfill_mode": backfill_mode,
+        "backfill_ranges_remaining": sum(1 for item in ranges if not item.get("completed")),
+        "duration_enriched": int(enricher.stats["enriched"]),
+        "duration_enrichment": enricher.summary(),
+        "rate_limiter": enricher.limiter.summary(),
+        "recent_sync": {key: value for key, value in recent_summary.items() if key != "digests"},
     }
     if rate_limited:
         summary["rate_limit_message"] = rate_limit_message
@@ -0,0 +1,182 @@
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, List
+from urllib.parse import urlparse
+
+# Upper bounds (seconds) of the latency histogram buckets; +Inf is implicit.
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+METRIC_PREFIX = "activity_sync"
+_NUMERIC_SEGMENT_RE = re.compile(r"/\d+(?=/|$)")
+
+
+def endpoint_label(url: str) -> str:
+    """URL path with numeric ids collapsed, e.g. /api/v3/activities/{id}."""
+    path = urlparse(url).path or "/"
+    return _NUMERIC_SEGMENT_RE.sub("/{id}", path)
+
+
+class _EndpointStats:
+    def __init__(self) -> None:
+        self.bucket_counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.latency_sum = 0.0
+        self.responses = 0
+        self.statuses: Dict[str, int] = {}
+        self.bytes_received = 0
+        self.calls = 0
+        self.attempts = 0
+        self.failed_calls = 0
+
+    def observe(self, seconds: float, status: str, size: int) -> None:
+        index = len(LATENCY_BUCKETS)
+        for position, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                index = position
+                break
+        self.bucket_counts[index] += 1
+        self.latency_sum += seconds
+        self.responses += 1
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        self.bytes_received += max(0, size)
+
+
+class SyncMetrics:
+    """Thread-safe request accounting for one sync run.
+
+    Records per-endpoint latency histograms, response statuses, bytes received,
+    attempts per logical call and retry back-off sleeps. Rate-limiter sleeps are
+    supplied by the caller when the summary is built.
+    """
+
+    def __init__(self, source: str) -> None:
+        self.source = source
+        self.started_at = time.time()
+        self._endpoints: Dict[str, _EndpointStats] = {}
+        self._retry_sleeps: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def _endpoint(self, endpoint: str) -> _EndpointStats:
+        stats = self._endpoints.get(endpoint)
+        if stats is None:
+            stats = self._endpoints[endpoint] = _EndpointStats()
+        return stats
+
+    def observe_response(self, endpoint: str, seconds: float, status: Any, size: int = 0) -> None:
+        with self._lock:
+            self._endpoint(endpoint).observe(seconds, str(status), size)
+
+    def record_call(self, endpoint: str, attempts: int, ok: bool) -> None:
+        with self._lock:
+            stats = self._endpoint(endpoint)
+            stats.calls += 1
+            stats.attempts += attempts
+            if not ok:
+                stats.failed_calls += 1
+
+    def record_retry_sleep(self, reason: str, seconds: float) -> None:
+        with self._lock:
+            self._retry_sleeps[reason] = self._retry_sleeps.get(reason, 0.0) + seconds
+
+    def summary(self, limiter_sleep_seconds: float = 0.0) -> Dict[str, Any]:
+        with self._lock:
+            endpoints = {}
+            for name, stats in sorted(self._endpoints.items()):
+                cumulative = 0
+                buckets = {}
+                for bound, count in zip(list(LATENCY_BUCKETS) + ["+Inf"], stats.bucket_counts):
+                    cumulative += count
+                    buckets[str(bound)] = cumulative
+                endpoints[name] = {
+                    "calls": stats.calls,
+                    "attempts": stats.attempts,
+                    "failed_calls": stats.failed_calls,
+                    "responses": stats.responses,
+                    "statuses": dict(sorted(stats.statuses.items())),
+                    "bytes_received": stats.bytes_received,
+                    "latency_seconds_sum": round(stats.latency_sum, 4),
+                    "latency_seconds_avg": (
+                        round(stats.latency_sum / stats.responses, 4) if stats.responses else None
+                    ),
+                    "latency_buckets": buckets,
+                }
+            retry_sleeps = {key: round(value, 3) for key, value in sorted(self._retry_sleeps.items())}
+            return {
+                "endpoints": endpoints,
+                "retry_sleep_seconds": retry_sleeps,
+                "retry_sleep_seconds_total": round(sum(self._retry_sleeps.values()), 3),
+                "limiter_sleep_seconds": round(limiter_sleep_seconds, 3),
+                "wall_seconds": round(time.time() - self.started_at, 3),
+            }
+
+    def prometheus_lines(self, limiter_sleep_seconds: float = 0.0) -> List[str]:
+        summary = self.summary(limiter_sleep_seconds)
+        source = _label_value(self.source)
+        prefix = METRIC_PREFIX
+        lines: List[str] = []
+
+        def _header(name: str, kind: str, help_text: str) -> None:
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+
+        # Every value covers this run only, so all of them are gauges suffixed
+        # `_last_run`; counter or histogram types would imply accumulation.
+        _header(
+            "request_duration_seconds_bucket_last_run", "gauge", "HTTP responses per latency bucket in the last run."
+        )
+        for endpoint, stats in summary["endpoints"].items():
+            labels = f'source="{source}",endpoint="{_label_value(endpoint)}"'
+            for bound, count in stats["latency_buckets"].items():
+                lines.append(f'{prefix}_request_duration_seconds_bucket_last_run{{{labels},le="{bound}"}} {count}')
+        _header("request_duration_seconds_sum_last_run", "gauge", "Summed HTTP response latency in the last run.")
+        for endpoint, stats in summary["endpoints"].items():
+            labels = f'source="{source}",endpoint="{_label_value(endpoint)}"'
+            lines.append(f"{prefix}_request_duration_seconds_sum_last_run{{{labels}}} {stats['latency_seconds_sum']}")
+
+        _header("responses_last_run", "gauge", "HTTP responses per endpoint and status in the last run.")
+        for endpoint, stats in summary["endpoints"].items():
+            for status, count in stats["statuses"].items():
+                lines.append(
+                    f'{prefix}_responses_last_run{{source="{source}",endpoint="{_label_value(endpoint)}",'
+                    f'status="{_label_value(status)}"}} {count}'
+                )
+
+        for name, key, help_text in (
+            ("calls_last_run", "calls", "Logical API calls per endpoint in the last run."),
+            ("attempts_last_run", "attempts", "HTTP attempts per endpoint, including retries, in the last run."),
+            ("failed_calls_last_run", "failed_calls", "Calls that failed after all retries in the last run."),
+            ("response_bytes_last_run", "bytes_received", "Response bytes received per endpoint in the last run."),
+        ):
+            _header(name, "gauge", help_text)
+            for endpoint, stats in summary["endpoints"].items():
+                lines.append(
+                    f'{prefix}_{name}{{source="{source}",endpoint="{_label_value(endpoint)}"}} {stats[key]}'
+                )
+
+        _header("retry_sleep_seconds_last_run", "gauge", "Seconds slept before retrying, by reason, in the last run.")
+        for reason, seconds in summary["retry_sleep_seconds"].items():
+            lines.append(
+                f'{prefix}_retry_sleep_seconds_last_run{{source="{source}",reason="{_label_value(reason)}"}} {seconds}'
+            )
+        _header("limiter_sleep_seconds_last_run", "gauge", "Seconds slept by the rate limiter in the last run.")
+        lines.append(f'{prefix}_limiter_sleep_seconds_last_run{{source="{source}"}} {summary["limiter_sleep_seconds"]}')
+        _header("wall_seconds", "gauge", "Wall-clock duration of the last sync run.")
+        lines.append(f'{prefix}_wall_seconds{{source="{source}"}} {summary["wall_seconds"]}')
+        _header("last_run_timestamp_seconds", "gauge", "Unix time the last sync run finished.")
+        lines.append(f'{prefix}_last_run_timestamp_seconds{{source="{source}"}} {int(time.time())}')
+        return lines
+
+    def write_prometheus(self, path: str, limiter_sleep_seconds: float = 0.0) -> None:
+        """Write a node_exporter textfile-collector file atomically."""
+        parent = os.path.dirname(path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write("\n".join(self.prometheus_lines(limiter_sleep_seconds)) + "\n")
+        os.replace(tmp, path)
+
+
+def _label_value(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
@@ -1,16 +1,24 @@
 import argparse
 import hashlib
-import hmac
 import json
 import os
+import queue
 import shutil
 import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from typing import Any, Callable, Dict, List, Optional, Tuple
 
 import requests
 
+from activity_store import forget_activities
+from provider_fields import DETAIL_FIELDS
+from raw_manifest import RawManifest, manifest_path_for, write_raw_activity
+from raw_store import DEFAULT_LAYOUT, forget_raw_store, open_raw_store, raw_store_layout
+from strava_webhook import WEBHOOK_QUEUE_PATH, EventQueue, owner_fingerprint
+from sync_metrics import SyncMetrics, endpoint_label
 from sync_scope import (
     activity_scope_from_config,
     activity_start_ts,
@@ -19,6 +27,8 @@ from sync_scope import (
 from utils import ensure_dir, load_config, raw_activity_dir, read_json, utc_now, write_json
 
 TOKEN_CACHE = ".strava_token.json"
+# Overridable so benchmarks can point the sync at a local stand-in server.
+STRAVA_BASE_URL = os.environ.get("STRAVA_BASE_URL", "https://www.strava.com").rstrip("/")
 RAW_DIR = raw_activity_dir("strava")
 SUMMARY_JSON = os.path.join("data", "last_sync_summary.json")
 SUMMARY_TXT = os.path.join("data", "last_sync_summary.txt")
@@ -26,8 +36,41 @@ STATE_PATH = os.path.join("data", "backfill_state_strava.json")
 LEGACY_STATE_PATH = os.path.join("data", "backfill_state.json")
 ATHLETE_PATH = os.path.join("data", "athletes_strava.json")
 LEGACY_ATHLETE_PATH = os.path.join("data", "athletes.json")
+RATE_LIMIT_STATE_PATH = os.path.join("data", "rate_limit_state_strava.json")
+DETAIL_QUEUE_PATH = os.path.join("data", "detail_queue_strava.json")
+# Keys of Strava's SummaryActivity, the shape /athlete/activities lists.
+SUMMARY_ACTIVITY_FIELDS = frozenset(
+    {
+        "achievement_count", "athlete", "athlete_count", "average_cadence", "average_heartrate",
+        "average_speed", "average_temp", "average_watts", "comment_count", "commute",
+        "device_watts", "display_hide_heartrate_option", "distance", "elapsed_time", "elev_high",
+        "elev_low", "end_latlng", "external_id", "flagged", "from_accepted_tag", "gear_id",
+        "has_heartrate", "has_kudoed", "heartrate_opt_out", "id", "kilojoules", "kudos_count",
+        "location_city", "location_country", "location_state", "manual", "map", "max_heartrate",
+        "max_speed", "max_watts", "moving_time", "name", "photo_count", "pr_count", "private",
+        "resource_state", "sport_type", "start_date", "start_date_local", "start_latlng",
+        "suffer_score", "timezone", "total_elevation_gain", "total_photo_count", "trainer", "type",
+        "upload_id", "upload_id_str", "utc_offset", "visibility", "weighted_average_watts",
+        "workout_type",
+    }
+)
+NORMALIZED_PATH = os.path.join("data", "activities_normalized.json")
+DETAIL_QUEUE_VERSION = 1
+DETAIL_MAX_ATTEMPTS = 3
+# Strava's short-term limits reset on the quarter hour (:00/:15/:30/:45) and the
+# daily limits at UTC midnight, regardless of when a client's first request lands.
+RATE_LIMIT_WINDOW_SECONDS = 900
 TRANSIENT_HTTP_STATUS_CODES = {408, 425, 429, 500, 502, 503, 504, 597}
 MAX_REQUEST_ATTEMPTS = 5
+# Lower edge used when splitting an unbounded history into backfill windows;
+# the oldest window still extends down to the configured `after`.
+BACKFILL_FLOOR_TS = int(datetime(2009, 1, 1, tzinfo=timezone.utc).timestamp())
+# Fetched pages allowed to wait for the writer thread before fetching blocks.
+DEFAULT_WRITE_QUEUE_PAGES = 2
+
+_TOKEN_REFRESH_LOCK = threading.Lock()
+_RAW_MANIFEST: Optional[RawManifest] = None
+_RAW_STORE_LAYOUT = DEFAULT_LAYOUT
 
 
 class RateLimitExceeded(RuntimeError):
@@ -41,65 +84,93 @@ def _request_json_with_retry(
     limiter: Optional["RateLimiter"],
     request_kind: str,
     timeout: int = 30,
+    client: Optional["StravaClient"] = None,
     **kwargs,
 ) -> Any:
+    send = client.request if client else requests.request
+    metrics = client.metrics if client else None
+    endpoint = endpoint_label(url)
     last_exc: Optional[Exception] = None
-    for attempt in range(1, MAX_REQUEST_ATTEMPTS + 1):
-        if limiter:
-            limiter.before_request(request_kind)
-        try:
-            resp = requests.request(method, url, timeout=timeout, **kwargs)
+    attempt = 0
+    ok = False
+
+    def _backoff(reason: str, seconds: float) -> None:
+        if metrics:
+            metrics.record_retry_sleep(reason, seconds)
+        time.sleep(seconds)
+
+    try:
+        for attempt in range(1, MAX_REQUEST_ATTEMPTS + 1):
             if limiter:
-                limiter.record_request(request_kind)
-                limiter.apply_headers(resp.headers)
+                limiter.before_request(request_kind)
+            started = time.perf_counter()
+            try:
+                resp = send(method, url, timeout=timeout, **kwargs)
+                if metrics:
+                    content = getattr(resp, "content", b"")
+                    metrics.observe_response(
+                        endpoint,
+                        time.perf_counter() - started,
+                        resp.status_code,
+                        len(content) if isinstance(content, (bytes, bytearray)) else 0,
+                    )
+                if limiter:
+                    limiter.apply_headers(resp.headers)
+
+                if resp.status_code in TRANSIENT_HTTP_STATUS_CODES and attempt < MAX_REQUEST_ATTEMPTS:
+                    retry_after = resp.headers.get("Retry-After")
+                    if retry_after and retry_after.isdigit():
+                        sleep_seconds = max(1, int(retry_after))
+                    else:
+                        sleep_seconds = min(30, 2 ** (attempt - 1))
+                    print(
+                        f"Transient Strava API error ({resp.status_code}) on {url}; "
+                        f"retrying in {sleep_seconds}s (attempt {attempt}/{MAX_REQUEST_ATTEMPTS})."
+                    )
+                    _backoff("rate_limited" if resp.status_code == 429 else "server_error", sleep_seconds)
+                    continue
 
-            if resp.status_code in TRANSIENT_HTTP_STATUS_CODES and attempt < MAX_REQUEST_ATTEMPTS:
-                retry_after = resp.headers.get("Retry-After")
+                resp.raise_for_status()
+                payload = resp.json()
+                ok = True
+                return payload
+            except requests.HTTPError as exc:
+                status_code = None
+                if exc.response is not None:
+                    status_code = exc.response.status_code
+                # Non-transient HTTP errors (e.g., 400 invalid_grant) should fail fast.
+                if status_code is not None and status_code not in TRANSIENT_HTTP_STATUS_CODES:
+                    raise
+                last_exc = exc
+                if attempt >= MAX_REQUEST_ATTEMPTS:
+                    break
+                retry_after = None
+                if exc.response is not None and exc.response.headers is not None:
+                    retry_after = exc.response.headers.get("Retry-After")
                 if retry_after and retry_after.isdigit():
                     sleep_seconds = max(1, int(retry_after))
                 else:
                     sleep_seconds = min(30, 2 ** (attempt - 1))
                 print(
-                    f"Transient Strava API error ({resp.status_code}) on {url}; "
+                    f"Transient HTTP error on {url}: {exc}; "
                     f"retrying in {sleep_seconds}s (attempt {attempt}/{MAX_REQUEST_ATTEMPTS})."
                 )
-                time.sleep(sleep_seconds)
-                continue
-
-            resp.raise_for_status()
-            return resp.json()
-        except requests.HTTPError as exc:
-            status_code = None
-            if exc.response is not None:
-                status_code = exc.response.status_code
-            # Non-transient HTTP errors (e.g., 400 invalid_grant) should fail fast.
-            if status_code is not None and status_code not in TRANSIENT_HTTP_STATUS_CODES:
-                raise
-            last_exc = exc
-            if attempt >= MAX_REQUEST_ATTEMPTS:
-                break
-            retry_after = None
-            if exc.response is not None and exc.response.headers is not None:
-                retry_after = exc.response.headers.get("Retry-After")
-            if retry_after and retry_after.isdigit():
-                sleep_seconds = max(1, int(retry_after))
-            else:
+                _backoff("rate_limited" if status_code == 429 else "server_error", sleep_seconds)
+            except requests.RequestException as exc:
+                if metrics:
+                    metrics.observe_response(endpoint, time.perf_counter() - started, "network_error")
+                last_exc = exc
+                if attempt >= MAX_REQUEST_ATTEMPTS:
+                    break
                 sleep_seconds = min(30, 2 ** (attempt - 1))
-            print(
-                f"Transient HTTP error on {url}: {exc}; "
-                f"retrying in {sleep_seconds}s (attempt {attempt}/{MAX_REQUEST_ATTEMPTS})."
-            )
-            time.sleep(sleep_seconds)
-        except requests.RequestException as exc:
-            last_exc = exc
-            if attempt >= MAX_REQUEST_ATTEMPTS:
-                break
-            sleep_seconds = min(30, 2 ** (attempt - 1))
-            print(
-                f"Network/HTTP error on {url}: {exc}; "
-                f"retrying in {sleep_seconds}s (attempt {attempt}/{MAX_REQUEST_ATTEMPTS})."
-            )
-            time.sleep(sleep_seconds)
+                print(
+                    f"Network/HTTP error on {url}: {exc}; "
+                    f"retrying in {sleep_seconds}s (attempt {attempt}/{MAX_REQUEST_ATTEMPTS})."
+                )
+                _backoff("network_error", sleep_seconds)
+    finally:
+        if metrics and attempt:
+            metrics.record_call(endpoint, attempt, ok)
 
     if last_exc:
         raise last_exc
@@ -112,6 +183,65 @@ def _http_error_status(exc: Exception) -> Optional[int]:
     return None
 
 
+def _window_start_for(ts: float) -> float:
+    return ts - (ts % RATE_LIMIT_WINDOW_SECONDS)
+
+
+class StravaClient:
+    """Pooled keep-alive HTTP session shared by every Strava API call in a run."""
+
+    def __init__(
+        self,
+        pool_maxsize: int = 4,
+        session: Optional[Any] = None,
+        metrics: Optional[SyncMetrics] = None,
+    ) -> None:
+        self.pool_maxsize = max(1, pool_maxsize)
+        self.metrics = metrics
+        self._session = session
+        self._pools: Dict[int, Any] = {}
+        self._lock = threading.Lock()
+        self.requests_sent = 0
+
+    @property
+    def session(self) -> Any:
+        if self._session is None:
+            from requests.adapters import HTTPAdapter
+
+            session = requests.Session()
+            session.headers.update(
+                {"Accept-Encoding": "gzip, deflate", "Connection": "keep-alive"}
+            )
+            # Retries are handled by _request_json_with_retry; urllib3 must not
+            # retry behind the RateLimiter's back.
+            adapter = HTTPAdapter(
+                pool_connections=2, pool_maxsize=self.pool_maxsize, max_retries=0
+            )
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            self._session = session
+        return self._session
+
+    def request(self, method: str, url: str, **kwargs) -> Any:
+        resp = self.session.request(method, url, **kwargs)
+        pool = getattr(getattr(resp, "raw", None), "_pool", None)
+        with self._lock:
+            self.requests_sent += 1
+            if pool is not None:
+                self._pools[id(pool)] = pool
+        return resp
+
+    def connection_stats(self) -> Dict[str, int]:
+        with self._lock:
+            opened = sum(int(getattr(pool, "num_connections", 0)) for pool in self._pools.values())
+            sent = self.requests_sent
+        return {"requests": sent, "opened": opened, "reused": max(0, sent - opened)}
+
+    def close(self) -> None:
+        if self._session is not None:
+            self._session.close()
+
+
 class RateLimiter:
     def __init__(
         self,
@@ -121,6 +251,9 @@ class RateLimiter:
         read_day_limit: int,
         safety_buffer: int,
         min_interval_seconds: float,
+        burst_fraction: float = 0.5,
+        max_interval_seconds: float = 30.0,
+        daily_reserve: int = 0,
     ) -> None:
         self.overall_15_limit = overall_15_limit
         self.overall_day_limit = overall_day_limit
@@ -128,66 +261,203 @@ class RateLimiter:
         self.read_day_limit = read_day_limit
         self.safety_buffer = max(0, safety_buffer)
         self.min_interval_seconds = max(0.0, min_interval_seconds)
+        self.burst_fraction = min(max(0.0, burst_fraction), 0.99)
+        self.max_interval_seconds = max(0.0, max_interval_seconds)
+        # Daily requests left untouched for other apps sharing the client id.
+        self.daily_reserve = max(0, daily_reserve)
 
-        self.window_start = time.time()
-        self.day_start = datetime.now(timezone.utc).date()
+        self.window_start = _window_start_for(time.time())
+        self.day_start = datetime.fromtimestamp(time.time(), tz=timezone.utc).date()
 
         self.overall_15 = 0
         self.overall_day = 0
         self.read_15 = 0
         self.read_day = 0
         self.last_request_at = 0.0
+        self.requests_made = 0
+        self.sleep_seconds = 0.0
+        self.started_at = time.time()
+        # Backfill workers share one limiter; checks and the slot reservation
+        # happen under this lock so concurrent callers never overshoot the
+        # budget between check and count. Sleeps happen after releasing it.
+        self._lock = threading.RLock()
 
     def _reset_if_needed(self) -> None:
         now = time.time()
-        if now - self.window_start >= 900:
-            self.window_start = now
+        if now - self.window_start >= RATE_LIMIT_WINDOW_SECONDS:
+            self.window_start = _window_start_for(now)
             self.overall_15 = 0
             self.read_15 = 0
 
-        current_day = datetime.now(timezone.utc).date()
+        current_day = datetime.fromtimestamp(now, tz=timezone.utc).date()
         if current_day != self.day_start:
             self.day_start = current_day
             self.overall_day = 0
             self.read_day = 0
 
     def _sleep_until_window_reset(self) -> None:
+        with self._lock:
+            # Small margin so the request lands after Strava's own reset.
+            delay = self.window_start + RATE_LIMIT_WINDOW_SECONDS - time.time() + 1
+            if delay > 1:
+                self.sleep_seconds += delay
+        if delay > 1:
+            time.sleep(delay)
+        with self._lock:
+            self._reset_if_needed()
+
+    def pacing_interval(self, kind: str) -> float:
+        """Seconds to leave between requests given the remaining headroom.
+
+        Requests burst freely until a budget is `burst_fraction` used; past that
+        the interval ramps up smoothly towards spreading the remaining headroom
+        evenly over the time left until that budget resets.
+        """
         now = time.time()
-        remaining = 900 - (now - self.window_start)
-        if remaining > 0:
-            time.sleep(remaining)
-        self._reset_if_needed()
-
-    def before_request(self, kind: str) -> None:
-        self._reset_if_needed()
-
-        if self.min_interval_seconds > 0 and self.last_request_at:
-            elapsed = time.time() - self.last_request_at
-            if elapsed < self.min_interval_seconds:
-                time.sleep(self.min_interval_seconds - elapsed)
-                self._reset_if_needed()
-
-        if self.overall_15 >= self.overall_15_limit - self.safety_buffer:
-            self._sleep_until_window_reset()
+        window_left = self.window_start + RATE_LIMIT_WINDOW_SECONDS - now
+        day_end = datetime.combine(self.day_start, datetime.min.time(), tzinfo=timezone.utc)
+        day_left = (day_end + timedelta(days=1)).timestamp() - now
+        budgets = [
+            (self.overall_15, self.overall_15_limit, window_left),
+            (self.overall_day, self.overall_day_limit - self.daily_reserve, day_left),
+        ]
+        if kind == "read":
+            budgets.extend(
+                [
+                    (self.read_15, self.read_15_limit, window_left),
+                    (self.read_day, self.read_day_limit - self.daily_reserve, day_left),
+                ]
+            )
 
-        if kind == "read" and self.read_15 >= self.read_15_limit - self.safety_buffer:
-            self._sleep_until_window_reset()
+        interval = 0.0
+        for used, limit, seconds_left in budgets:
+            usable = limit - self.safety_buffer
+            headroom = usable - used
+            if usable <= 0 or headroom <= 0 or seconds_left <= 0:
+                continue
+            used_fraction = used / usable
+            if used_fraction <= self.burst_fraction:
+                continue
+            ramp = (used_fraction - self.burst_fraction) / (1.0 - self.burst_fraction)
+            interval = max(interval, ramp * seconds_left / headroom)
+        interval = min(interval, self.max_interval_seconds)
+        return max(interval, self.min_interval_seconds)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            elapsed = max(time.time() - self.started_at, 1e-6)
+            return {
+                "requests": self.requests_made,
+                "sleep_seconds": round(self.sleep_seconds, 3),
+                "effective_rate_per_min": round(self.requests_made * 60.0 / elapsed, 3),
+            }
 
-        if self.overall_day >= self.overall_day_limit - self.safety_buffer:
-            raise RateLimitExceeded("Overall daily limit reached; try again after UTC midnight.")
+    def read_headroom(self) -> Dict[str, int]:
+        """Read requests still available (after the safety buffer) per budget."""
+        with self._lock:
+            self._reset_if_needed()
+            window = min(
+                self.overall_15_limit - self.overall_15, self.read_15_limit - self.read_15
+            )
+            day = min(
+                self.overall_day_limit - self.overall_day, self.read_day_limit - self.read_day
+            )
+            return {
+                "15_min": max(0, window - self.safety_buffer),
+                "daily": max(0, day - self.safety_buffer - self.daily_reserve),
+            }
 
-        if kind == "read" and self.read_day >= self.read_day_limit - self.safety_buffer:
-            raise RateLimitExceeded("Read daily limit reached; try again after UTC midnight.")
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            self._reset_if_needed()
+            return {
+                "observed_at": time.time(),
+                "window_start": self.window_start,
+                "day": self.day_start.isoformat(),
+                "overall_15": self.overall_15,
+                "overall_day": self.overall_day,
+                "read_15": self.read_15,
+                "read_day": self.read_day,
+                "overall_15_limit": self.overall_15_limit,
+                "overall_day_limit": self.overall_day_limit,
+                "read_15_limit": self.read_15_limit,
+                "read_day_limit": self.read_day_limit,
+            }
 
-    def record_request(self, kind: str) -> None:
-        self._reset_if_needed()
+    def restore(self, snapshot: Dict[str, Any]) -> None:
+        try:
+            observed_at = float(snapshot["observed_at"])
+        except (KeyError, TypeError, ValueError):
+            return
+        with self._lock:
+            self._reset_if_needed()
+            # Usage only carries over while the window it was observed in is
+            # still open; limits are account settings and always carry over.
+            for key in ("overall_15_limit", "overall_day_limit", "read_15_limit", "read_day_limit"):
+                value = snapshot.get(key)
+                if isinstance(value, int) and value > 0:
+                    setattr(self, key, value)
+            if _window_start_for(observed_at) == self.window_start:
+                self.overall_15 = max(self.overall_15, int(snapshot.get("overall_15") or 0))
+                self.read_15 = max(self.read_15, int(snapshot.get("read_15") or 0))
+            observed_day = datetime.fromtimestamp(observed_at, tz=timezone.utc).date()
+            if observed_day == self.day_start:
+                self.overall_day = max(self.overall_day, int(snapshot.get("overall_day") or 0))
+                self.read_day = max(self.read_day, int(snapshot.get("read_day") or 0))
+
+    def _count_request(self, kind: str) -> None:
         self.overall_15 += 1
         self.overall_day += 1
         if kind == "read":
             self.read_15 += 1
             self.read_day += 1
+        self.requests_made += 1
         self.last_request_at = time.time()
 
+    def _window_full(self, kind: str) -> bool:
+        if self.overall_15 >= self.overall_15_limit - self.safety_buffer:
+            return True
+        return kind == "read" and self.read_15 >= self.read_15_limit - self.safety_buffer
+
+    def before_request(self, kind: str) -> None:
+        while True:
+            with self._lock:
+                self._reset_if_needed()
+                reserve_note = (
+                    f" (keeping {self.daily_reserve} requests in reserve)" if self.daily_reserve else ""
+                )
+                day_buffer = self.safety_buffer + self.daily_reserve
+                if self.overall_day >= self.overall_day_limit - day_buffer:
+                    raise RateLimitExceeded(
+                        f"Overall daily limit reached{reserve_note}; try again after UTC midnight."
+                    )
+
+                if kind == "read" and self.read_day >= self.read_day_limit - day_buffer:
+                    raise RateLimitExceeded(
+                        f"Read daily limit reached{reserve_note}; try again after UTC midnight."
+                    )
+
+                if not self._window_full(kind):
+                    # Reserve the slot before the request leaves so other workers
+                    # see it; `last_request_at` may be in the future, which queues
+                    # concurrent callers one pacing interval apart.
+                    now = time.time()
+                    slot = now
+                    interval = self.pacing_interval(kind)
+                    if interval > 0 and self.last_request_at:
+                        slot = max(now, self.last_request_at + interval)
+                    self._count_request(kind)
+                    self.last_request_at = slot
+                    delay = slot - now
+                    if delay > 0:
+                        self.sleep_seconds += delay
+                    break
+            # Sleep outside the lock so other workers can still apply headers,
+            # then re-check the budgets against the fresh window.
+            self._sleep_until_window_reset()
+        if delay > 0:
+            time.sleep(delay)
+
     def apply_headers(self, headers: Dict[str, str]) -> None:
         def _parse_pair(value: Optional[str]) -> Optional[Tuple[int, int]]:
             if not value:
@@ -205,20 +475,22 @@ class RateLimiter:
         if overall_limit and overall_usage:
             limit_15, limit_day = overall_limit
             usage_15, usage_day = overall_usage
-            self.overall_15_limit = limit_15
-            self.overall_day_limit = limit_day
-            self.overall_15 = max(self.overall_15, usage_15)
-            self.overall_day = max(self.overall_day, usage_day)
+            with self._lock:
+                self.overall_15_limit = limit_15
+                self.overall_day_limit = limit_day
+                self.overall_15 = max(self.overall_15, usage_15)
+                self.overall_day = max(self.overall_day, usage_day)
 
         read_limit = _parse_pair(headers.get("X-ReadRateLimit-Limit"))
         read_usage = _parse_pair(headers.get("X-ReadRateLimit-Usage"))
         if read_limit and read_usage:
             limit_15, limit_day = read_limit
             usage_15, usage_day = read_usage
-            self.read_15_limit = limit_15
-            self.read_day_limit = limit_day
-            self.read_15 = max(self.read_15, usage_15)
-            self.read_day = max(self.read_day, usage_day)
+            with self._lock:
+                self.read_15_limit = limit_15
+                self.read_day_limit = limit_day
+                self.read_15 = max(self.read_15, usage_15)
+                self.read_day = max(self.read_day, usage_day)
 
 
 def _load_token_cache() -> Dict:
@@ -260,26 +532,61 @@ def _load_athlete_fingerprint() -> Optional[str]:
     return None
 
 
-def _write_athlete_fingerprint(fingerprint: str) -> None:
+def _write_athlete_fingerprint(fingerprint: str, credentials_key: Optional[str] = None) -> None:
     ensure_dir("data")
-    write_json(
-        ATHLETE_PATH,
-        {
-            "fingerprint": fingerprint,
-            "updated_utc": utc_now().isoformat(),
-            "version": 1,
-        },
-    )
+    payload = {
+        "fingerprint": fingerprint,
+        "updated_utc": utc_now().isoformat(),
+        "version": 1,
+    }
+    if credentials_key:
+        # Lets later runs skip the live identity check while credentials are unchanged.
+        payload["credentials_key"] = credentials_key
+        payload["verified_utc"] = payload["updated_utc"]
+    write_json(ATHLETE_PATH, payload)
+
+
+def _identity_credentials_key(config: Dict) -> Optional[str]:
+    strava = config.get("strava", {}) or {}
+    refresh_token = str(strava.get("refresh_token") or "")
+    if not refresh_token:
+        return None
+    material = f"{strava.get('client_id') or ''}:{refresh_token}".encode("utf-8")
+    return hashlib.sha256(material).hexdigest()
+
+
+def _identity_verification_cached(config: Dict) -> bool:
+    sync_cfg = config.get("sync", {}) or {}
+    ttl_hours = float(sync_cfg.get("identity_cache_ttl_hours", 168))
+    credentials_key = _identity_credentials_key(config)
+    if ttl_hours <= 0 or not credentials_key or not os.path.exists(ATHLETE_PATH):
+        return False
+    try:
+        payload = read_json(ATHLETE_PATH)
+    except Exception:
+        return False
+    if not isinstance(payload, dict) or not payload.get("fingerprint"):
+        return False
+    if payload.get("credentials_key") != credentials_key:
+        return False
+    try:
+        verified = datetime.fromisoformat(str(payload.get("verified_utc")))
+    except ValueError:
+        return False
+    if verified.tzinfo is None:
+        verified = verified.replace(tzinfo=timezone.utc)
+    return utc_now() - verified < timedelta(hours=ttl_hours)
 
 
 def _athlete_fingerprint(athlete_id: int, secret: str) -> str:
-    key = (secret or "").encode("utf-8")
-    msg = str(athlete_id).encode("utf-8")
-    return hmac.new(key, msg, hashlib.sha256).hexdigest()
+    return owner_fingerprint(athlete_id, secret)
 
 
 def _get_access_token(
-    config: Dict, limiter: Optional[RateLimiter], force_refresh: bool = False
+    config: Dict,
+    limiter: Optional[RateLimiter],
+    force_refresh: bool = False,
+    client: Optional[StravaClient] = None,
 ) -> str:
     strava = config.get("strava", {})
     client_id = strava.get("client_id")
@@ -309,9 +616,10 @@ def _get_access_token(
         try:
             payload = _request_json_with_retry(
                 "POST",
-                "https://www.strava.com/oauth/token",
+                f"{STRAVA_BASE_URL}/oauth/token",
                 limiter=limiter,
                 request_kind="overall",
+                client=client,
                 data={
                     "client_id": client_id,
                     "client_secret": client_secret,
@@ -349,6 +657,7 @@ def _run_with_token_refresh(
     limiter: Optional[RateLimiter],
     request_label: str,
     call: Callable[[str], Any],
+    client: Optional[StravaClient] = None,
 ) -> Tuple[Any, str]:
     try:
         return call(token), token
@@ -359,16 +668,34 @@ def _run_with_token_refresh(
             f"Strava API returned 401 during {request_label}; "
             "refreshing access token and retrying once."
         )
-        refreshed_token = _get_access_token(config, limiter, force_refresh=True)
+        with _TOKEN_REFRESH_LOCK:
+            # Another backfill worker may already have refreshed the token.
+            cache = _load_token_cache()
+            cached_token = cache.get("access_token")
+            cached_expires_at = cache.get("expires_at") or 0
+            if (
+                isinstance(cached_token, str)
+                and cached_token
+                and cached_token != token
+                and cached_expires_at - 60 > int(utc_now().timestamp())
+            ):
+                refreshed_token = cached_token
+            else:
+                refreshed_token = _get_access_token(
+                    config, limiter, force_refresh=True, client=client
+                )
         return call(refreshed_token), refreshed_token
 
 
-def _fetch_athlete(token: str, limiter: Optional[RateLimiter]) -> Dict:
+def _fetch_athlete(
+    token: str, limiter: Optional[RateLimiter], client: Optional[StravaClient] = None
+) -> Dict:
     return _request_json_with_retry(
         "GET",
-        "https://www.strava.com/api/v3/athlete",
+        f"{STRAVA_BASE_URL}/api/v3/athlete",
         limiter=limiter,
         request_kind="read",
+        client=client,
         headers={"Authorization": f"Bearer {token}"},
     )
 
@@ -390,23 +717,46 @@ def _fetch_page(
     token: str,
     per_page: int,
     page: int,
-    after: int,
+    after: Optional[int],
     before: Optional[int],
     limiter: Optional[RateLimiter],
+    client: Optional[StravaClient] = None,
 ) -> List[Dict]:
-    params = {"per_page": per_page, "page": page, "after": after}
+    # Strava lists newest first, except that any `after` (even 0) flips the
+    # order to oldest first.
+    params = {"per_page": per_page, "page": page}
+    if after is not None:
+        params["after"] = after
     if before is not None:
         params["before"] = before
     return _request_json_with_retry(
         "GET",
-        "https://www.strava.com/api/v3/athlete/activities",
+        f"{STRAVA_BASE_URL}/api/v3/athlete/activities",
         limiter=limiter,
         request_kind="read",
+        client=client,
         headers={"Authorization": f"Bearer {token}"},
         params=params,
     )
 
 
+def _fetch_activity_detail(
+    token: str,
+    activity_id: str,
+    limiter: Optional[RateLimiter],
+    client: Optional[StravaClient] = None,
+) -> Dict:
+    return _request_json_with_retry(
+        "GET",
+        f"{STRAVA_BASE_URL}/api/v3/activities/{activity_id}",
+        limiter=limiter,
+        request_kind="read",
+        client=client,
+        headers={"Authorization": f"Bearer {token}"},
+        params={"include_all_efforts": "false"},
+    )
+
+
 def _load_existing_activity_ids() -> set:
     path = os.path.join("data", "activities_normalized.json")
     if not os.path.exists(path):
@@ -452,6 +802,7 @@ def _reset_persisted_data() -> None:
         os.path.join("data", "last_sync_summary.txt"),
         os.path.join("data", "athletes_strava.json"),
         os.path.join("data", "athletes.json"),
+        DETAIL_QUEUE_PATH,
         os.path.join("site", "data.json"),
     ]
     for path in paths:
@@ -460,6 +811,10 @@ def _reset_persisted_data() -> None:
 
     if os.path.exists(RAW_DIR):
         shutil.rmtree(RAW_DIR)
+    forget_raw_store(RAW_DIR)
+    manifest_path = manifest_path_for(RAW_DIR)
+    if os.path.exists(manifest_path):
+        os.remove(manifest_path)
     legacy_raw_root = os.path.join("activities", "raw")
     if os.path.isdir(legacy_raw_root):
         for filename in os.listdir(legacy_raw_root):
@@ -469,7 +824,11 @@ def _reset_persisted_data() -> None:
 
 
 def _fetch_recent_activity_ids(
-    config: Dict, token: str, per_page: int, limiter: Optional[RateLimiter]
+    config: Dict,
+    token: str,
+    per_page: int,
+    limiter: Optional[RateLimiter],
+    client: Optional[StravaClient] = None,
 ) -> Tuple[Optional[List[str]], str]:
     try:
         activities, token = _run_with_token_refresh(
@@ -478,8 +837,9 @@ def _fetch_recent_activity_ids(
             limiter,
             "recent activity overlap check",
             lambda access_token: _fetch_page(
-                access_token, min(per_page, 50), 1, 0, None, limiter
+                access_token, min(per_page, 50), 1, None, None, limiter, client
             ),
+            client,
         )
     except Exception:
         return None, token
@@ -492,7 +852,11 @@ def _fetch_recent_activity_ids(
 
 
 def _maybe_reset_for_new_athlete(
-    config: Dict, token: str, per_page: int, limiter: Optional[RateLimiter]
+    config: Dict,
+    token: str,
+    per_page: int,
+    limiter: Optional[RateLimiter],
+    client: Optional[StravaClient] = None,
 ) -> str:
     strava = config.get("strava", {}) or {}
     secret = strava.get("client_secret") or strava.get("refresh_token") or ""
@@ -505,7 +869,8 @@ def _maybe_reset_for_new_athlete(
             token,
             limiter,
             "athlete profile lookup",
-            lambda access_token: _fetch_athlete(access_token, limiter),
+            lambda access_token: _fetch_athlete(access_token, limiter, client),
+            client,
         )
     except Exception as exc:
         print(f"Warning: unable to fetch athlete profile; skipping reset ({exc})")
@@ -517,33 +882,37 @@ def _maybe_reset_for_new_athlete(
 
     current_fingerprint = _athlete_fingerprint(int(athlete_id), secret)
     stored_fingerprint = _load_athlete_fingerprint()
+    credentials_key = _identity_credentials_key(config)
 
     if stored_fingerprint and stored_fingerprint == current_fingerprint:
+        _write_athlete_fingerprint(current_fingerprint, credentials_key)
         return token
 
     if stored_fingerprint and stored_fingerprint != current_fingerprint:
         print("Detected different athlete; resetting persisted data.")
         _reset_persisted_data()
-        _write_athlete_fingerprint(current_fingerprint)
+        _write_athlete_fingerprint(current_fingerprint, credentials_key)
         return token
 
     if not _has_existing_data():
-        _write_athlete_fingerprint(current_fingerprint)
+        _write_athlete_fingerprint(current_fingerprint, credentials_key)
         return token
 
-    recent_ids, token = _fetch_recent_activity_ids(config, token, per_page, limiter)
+    recent_ids, token = _fetch_recent_activity_ids(
+        config, token, per_page, limiter, client
+    )
     if recent_ids is None:
         print("Warning: unable to verify recent activity overlap; skipping reset")
         return token
 
     existing_ids = _load_existing_activity_ids()
     if recent_ids and any(activity_id in existing_ids for activity_id in recent_ids):
-        _write_athlete_fingerprint(current_fingerprint)
+        _write_athlete_fingerprint(current_fingerprint, credentials_key)
         return token
 
     print("No athlete fingerprint found and data does not match; resetting persisted data.")
     _reset_persisted_data()
-    _write_athlete_fingerprint(current_fingerprint)
+    _write_athlete_fingerprint(current_fingerprint, credentials_key)
     return token
 
 
@@ -559,16 +928,102 @@ def _write_activity(activity: Dict) -> bool:
     if "/" in activity_id_str or "\\" in activity_id_str or ".." in activity_id_str:
         return False
 
-    path = os.path.join(RAW_DIR, f"{activity_id_str}.json")
-    if os.path.exists(path):
-        try:
-            existing = read_json(path)
-            if existing == activity:
-                return False
-        except Exception:
-            pass
-    write_json(path, activity)
-    return True
+    return write_raw_activity(
+        _raw_store(), _raw_manifest(), activity_id_str, activity, _activity_start_ts(activity)
+    )
+
+
+def _raw_manifest(reload: bool = False) -> RawManifest:
+    global _RAW_MANIFEST
+    path = manifest_path_for(RAW_DIR)
+    if reload or _RAW_MANIFEST is None or _RAW_MANIFEST.path != path:
+        _RAW_MANIFEST = RawManifest.load(path)
+    return _RAW_MANIFEST
+
+
+def _raw_store() -> Any:
+    return open_raw_store(RAW_DIR, _RAW_STORE_LAYOUT)
+
+
+def _open_raw_store(config: Dict[str, Any], dry_run: bool) -> Any:
+    """Open this run's raw store, migrating the old layout and starting compaction if due.
+
+    A dry run opens it read-only, so no recovery or migration touches the disk.
+    """
+    global _RAW_STORE_LAYOUT
+    _RAW_STORE_LAYOUT = raw_store_layout(config)
+    store = open_raw_store(RAW_DIR, _RAW_STORE_LAYOUT, reload=True, read_only=dry_run)
+    if not dry_run:
+        store.maybe_compact(background=True)
+    return store
+
+
+class _PageWriter:
+    """Persists fetched pages on a background thread.
+
+    The fetch loop hands each page to `submit` and immediately requests the next
+    one. Pages are written in order; a page's `on_written` callback (used to
+    advance cursors) runs only after every activity on it is on disk. The queue
+    is bounded so a slow disk applies back-pressure to fetching. A write error is
+    re-raised from the next `submit` or from `close`. `max_pages <= 0` writes
+    inline on the calling thread.
+    """
+
+    def __init__(self, dry_run: bool, max_pages: int = DEFAULT_WRITE_QUEUE_PAGES) -> None:
+        self.dry_run = dry_run
+        self.new_or_updated = 0
+        self._error: Optional[BaseException] = None
+        self._queue: Optional[queue.Queue] = None
+        self._thread: Optional[threading.Thread] = None
+        if max_pages > 0:
+            self._queue = queue.Queue(maxsize=max_pages)
+            self._thread = threading.Thread(
+                target=self._run, name="strava-page-writer", daemon=True
+            )
+            self._thread.start()
+
+    def submit(
+        self, activities: List[Dict], on_written: Optional[Callable[[], None]] = None
+    ) -> None:
+        self._raise_if_failed()
+        if self._queue is None:
+            self._write_page(activities, on_written)
+            return
+        self._queue.put((activities, on_written))
+
+    def close(self) -> None:
+        if self._queue is not None and self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._queue = None
+        self._raise_if_failed()
+
+    def _raise_if_failed(self) -> None:
+        if self._error is not None:
+            raise self._error
+
+    def _write_page(
+        self, activities: List[Dict], on_written: Optional[Callable[[], None]]
+    ) -> None:
+        for activity in activities:
+            if not self.dry_run and _write_activity(activity):
+                self.new_or_updated += 1
+        if on_written:
+            on_written()
+
+    def _run(self) -> None:
+        assert self._queue is not None
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            if self._error is not None:
+                # Keep draining so a blocked producer can still reach `close`.
+                continue
+            try:
+                self._write_page(*item)
+            except BaseException as exc:  # noqa: BLE001 - re-raised on the fetch thread
+                self._error = exc
 
 
 def _load_state() -> Dict:
@@ -589,6 +1044,245 @@ def _save_state(state: Dict) -> None:
     write_json(STATE_PATH, state)
 
 
+def _recent_sync_plan(
+    sync_cfg: Dict, stored_state: Dict, now: datetime
+) -> Tuple[str, Optional[int]]:
+    """Pick how this run refreshes recent history.
+
+    Returns ("incremental", after_ts) to fetch only past the stored high-water
+    mark (minus a small overlap for late edits), or ("edit_sweep", None) to
+    rescan the last `recent_days` when no mark exists or the sweep is due.
+    """
+    if not bool(sync_cfg.get("incremental", True)):
+        return "edit_sweep", None
+    try:
+        high_water_ts = int(stored_state.get("high_water_ts"))
+    except (TypeError, ValueError):
+        return "edit_sweep", None
+
+    sweep_interval_days = float(sync_cfg.get("edit_sweep_interval_days", 7))
+    last_sweep = stored_state.get("last_edit_sweep_utc")
+    if not isinstance(last_sweep, str) or not last_sweep:
+        return "edit_sweep", None
+    try:
+        last_sweep_at = datetime.fromisoformat(last_sweep.replace("Z", "+00:00"))
+    except ValueError:
+        return "edit_sweep", None
+    if last_sweep_at.tzinfo is None:
+        last_sweep_at = last_sweep_at.replace(tzinfo=timezone.utc)
+    if now - last_sweep_at >= timedelta(days=sweep_interval_days):
+        return "edit_sweep", None
+
+    overlap_seconds = int(float(sync_cfg.get("incremental_overlap_hours", 6)) * 3600)
+    return "incremental", max(0, high_water_ts - overlap_seconds)
+
+
+def _rate_limit_client_key(config: Dict) -> str:
+    client_id = str((config.get("strava", {}) or {}).get("client_id") or "")
+    return hashlib.sha256(client_id.encode("utf-8")).hexdigest()
+
+
+def _load_rate_limit_state(limiter: RateLimiter, config: Dict) -> None:
+    if not os.path.exists(RATE_LIMIT_STATE_PATH):
+        return
+    try:
+        payload = read_json(RATE_LIMIT_STATE_PATH)
+    except Exception:
+        return
+    if not isinstance(payload, dict):
+        return
+    # Usage is tracked per API application; ignore state left by another client id.
+    if payload.get("client_key") != _rate_limit_client_key(config):
+        return
+    limiter.restore(payload)
+
+
+def _save_rate_limit_state(limiter: RateLimiter, config: Dict) -> None:
+    payload = limiter.snapshot()
+    payload["client_key"] = _rate_limit_client_key(config)
+    payload["observed_utc"] = utc_now().isoformat()
+    ensure_dir("data")
+    write_json(RATE_LIMIT_STATE_PATH, payload)
+
+
+def _detail_dir() -> str:
+    return os.path.join(RAW_DIR, "details")
+
+
+def _load_detail_queue() -> Dict:
+    queue_state = {"version": DETAIL_QUEUE_VERSION, "pending": {}, "fetched": {}, "details": {}}
+    if not os.path.exists(DETAIL_QUEUE_PATH):
+        return queue_state
+    try:
+        payload = read_json(DETAIL_QUEUE_PATH)
+    except Exception:
+        return queue_state
+    if not isinstance(payload, dict) or payload.get("version") != DETAIL_QUEUE_VERSION:
+        return queue_state
+    for key in ("pending", "fetched", "details"):
+        if isinstance(payload.get(key), dict):
+            queue_state[key] = dict(payload[key])
+    return queue_state
+
+
+def _save_detail_queue(queue_state: Dict) -> None:
+    ensure_dir("data")
+    write_json(DETAIL_QUEUE_PATH, queue_state)
+
+
+def _refresh_detail_queue(queue_state: Dict, manifest: RawManifest, deleted_ids: set) -> None:
+    """Queue activities whose summary changed since their detail was fetched.
+
+    `fetched` maps activity id -> manifest hash of the summary the detail was
+    fetched for, so an edited activity is queued again. It lives in `data/`
+    because raw files (and the manifest) do not survive CI runs; `details`
+    keeps the enrichment fields normalize needs for the same reason. A
+    fetched id with neither those fields nor a detail file is queued again.
+    """
+    pending = queue_state["pending"]
+    fetched = queue_state["fetched"]
+    details = queue_state.setdefault("details", {})
+    for activity_id in deleted_ids:
+        pending.pop(activity_id, None)
+        fetched.pop(activity_id, None)
+        details.pop(activity_id, None)
+        detail_path = os.path.join(_detail_dir(), f"{activity_id}.json")
+        if os.path.exists(detail_path):
+            os.remove(detail_path)
+    for activity_id in manifest.ids():
+        entry = manifest.get(activity_id) or {}
+        digest = entry.get("sha256")
+        if not digest:
+            continue
+        if fetched.get(activity_id) == digest and (
+            activity_id in details or os.path.exists(os.path.join(_detail_dir(), f"{activity_id}.json"))
+        ):
+            continue
+        queued = pending.get(activity_id)
+        if isinstance(queued, dict) and queued.get("summary_sha256") == digest:
+            continue
+        pending[activity_id] = {
+            "start_ts": entry.get("start_ts"),
+            "summary_sha256": digest,
+            "attempts": 0,
+        }
+
+
+def _detail_enrichment_fields(detail: Any) -> Dict[str, Any]:
+    if not isinstance(detail, dict):
+        return {}
+    return {field: detail[field] for field in DETAIL_FIELDS if detail.get(field) is not None}
+
+
+def _summary_from_detail(detail: Dict) -> Dict:
+    """Project a `/activities/{id}` payload onto the listing's summary shape.
+
+    Webhook fetches return the detailed representation; storing it as the raw
+    summary would make its hash differ from every later listing of the same
+    activity and count it as updated on each sync.
+    """
+    summary = {key: value for key, value in detail.items() if key in SUMMARY_ACTIVITY_FIELDS}
+    if "resource_state" in summary:
+        summary["resource_state"] = 2
+    activity_map = detail.get("map")
+    if isinstance(activity_map, dict):
+        summary["map"] = {
+            key: activity_map[key] for key in ("id", "summary_polyline") if key in activity_map
+        }
+        summary["map"]["resource_state"] = 2
+    return summary
+
+
+def _detail_priority(item: Tuple[str, Dict]) -> Tuple[int, str]:
+    activity_id, entry = item
+    start_ts = entry.get("start_ts") if isinstance(entry, dict) else None
+    # Newest activities first; they are the ones the dashboard shows up front.
+    return (-(start_ts if isinstance(start_ts, int) else 0), activity_id)
+
+
+def _drain_detail_queue(
+    config: Dict,
+    token: str,
+    limiter: RateLimiter,
+    queue_state: Dict,
+    client: Optional[StravaClient] = None,
+) -> Tuple[Dict, str]:
+    """Fetch queued activity details using only spare read headroom.
+
+    Stops (without sleeping) once the current 15-minute window is used up,
+    once the daily read headroom falls to `detail_daily_reserve`, or after
+    `detail_max_per_run` requests. Whatever is left stays queued.
+    """
+    sync_cfg = config.get("sync", {}) or {}
+    max_per_run = max(0, int(sync_cfg.get("detail_max_per_run", 50)))
+    daily_reserve = max(0, int(sync_cfg.get("detail_daily_reserve", 500)))
+    pending = queue_state["pending"]
+    fetched = queue_state["fetched"]
+    details = queue_state.setdefault("details", {})
+    fetched_count = 0
+    failed = 0
+    stop_reason = "queue_empty"
+
+    for activity_id, entry in sorted(pending.items(), key=_detail_priority):
+        if not isinstance(entry, dict):
+            # Entries written by older versions may not be dicts.
+            entry = pending[activity_id] = {}
+        if fetched_count + failed >= max_per_run:
+            stop_reason = "max_per_run"
+            break
+        headroom = limiter.read_headroom()
+        if headroom["15_min"] <= 0:
+            stop_reason = "window_headroom"
+            break
+        if headroom["daily"] <= daily_reserve:
+            stop_reason = "daily_reserve"
+            break
+        try:
+            detail, token = _run_with_token_refresh(
+                config,
+                token,
+                limiter,
+                "activity detail enrichment",
+                lambda access_token: _fetch_activity_detail(
+                    access_token, activity_id, limiter, client
+                ),
+                client,
+            )
+        except RateLimitExceeded:
+            stop_reason = "rate_limited"
+            break
+        except requests.RequestException as exc:
+            failed += 1
+            status_code = _http_error_status(exc)
+            attempts = int(entry.get("attempts") or 0) + 1
+            if status_code == 404 or attempts >= DETAIL_MAX_ATTEMPTS:
+                print(f"Warning: dropping activity {activity_id} from detail queue: {exc}")
+                pending.pop(activity_id, None)
+                fetched[activity_id] = entry.get("summary_sha256")
+                details[activity_id] = {}
+            else:
+                entry["attempts"] = attempts
+            continue
+        ensure_dir(_detail_dir())
+        write_json(os.path.join(_detail_dir(), f"{activity_id}.json"), detail)
+        pending.pop(activity_id, None)
+        fetched[activity_id] = entry.get("summary_sha256")
+        details[activity_id] = _detail_enrichment_fields(detail)
+        fetched_count += 1
+
+    if not pending:
+        stop_reason = "queue_empty"
+    return (
+        {
+            "fetched": fetched_count,
+            "failed": failed,
+            "pending": len(pending),
+            "stopped": stop_reason,
+        },
+        token,
+    )
+
+
 def _sync_recent(
     config: Dict,
     token: str,
@@ -596,8 +1290,11 @@ def _sync_recent(
     recent_days: int,
     limiter: RateLimiter,
     dry_run: bool,
+    client: Optional[StravaClient] = None,
+    after_ts: Optional[int] = None,
+    write_queue_pages: int = DEFAULT_WRITE_QUEUE_PAGES,
 ) -> Tuple[Dict, str]:
-    if recent_days <= 0:
+    if recent_days <= 0 and after_ts is None:
         return (
             {
                 "fetched": 0,
@@ -610,52 +1307,61 @@ def _sync_recent(
             token,
         )
 
-    after = int((utc_now() - timedelta(days=recent_days)).timestamp())
+    if after_ts is not None:
+        after = int(after_ts)
+    else:
+        after = int((utc_now() - timedelta(days=recent_days)).timestamp())
     page = 1
     total = 0
-    new_or_updated = 0
     oldest_ts = None
     newest_ts = None
     rate_limited = False
     rate_limit_message = ""
     activity_ids = set()
+    writer = _PageWriter(dry_run, write_queue_pages)
 
-    while True:
-        try:
-            activities, token = _run_with_token_refresh(
-                config,
-                token,
-                limiter,
-                "recent activity sync",
-                lambda access_token: _fetch_page(
-                    access_token, per_page, page, after, None, limiter
-                ),
-            )
-        except RateLimitExceeded as exc:
-            rate_limited = True
-            rate_limit_message = str(exc)
-            break
-        if not activities:
-            break
-        for activity in activities:
-            total += 1
-            ts = _activity_start_ts(activity)
-            if ts is not None:
-                oldest_ts = ts if oldest_ts is None else min(oldest_ts, ts)
-                newest_ts = ts if newest_ts is None else max(newest_ts, ts)
-            activity_id = activity.get("id")
-            if activity_id:
-                activity_ids.add(str(activity_id))
-            if dry_run:
-                continue
-            if _write_activity(activity):
-                new_or_updated += 1
-        page += 1
+    try:
+        while True:
+            try:
+                activities, token = _run_with_token_refresh(
+                    config,
+                    token,
+                    limiter,
+                    "recent activity sync",
+                    lambda access_token: _fetch_page(
+                        access_token, per_page, page, after, None, limiter, client
+                    ),
+                    client,
+                )
+            except RateLimitExceeded as exc:
+                rate_limited = True
+                rate_limit_message = str(exc)
+                break
+            if not activities:
+                break
+            for activity in activities:
+                total += 1
+                ts = _activity_start_ts(activity)
+                if ts is not None:
+                    oldest_ts = ts if oldest_ts is None else min(oldest_ts, ts)
+                    newest_ts = ts if newest_ts is None else max(newest_ts, ts)
+                activity_id = activity.get("id")
+                if activity_id:
+                    activity_ids.add(str(activity_id))
+            writer.submit(activities)
+            # A short page is the last one; skipping the trailing empty request keeps
+            # a steady-state incremental run to a single call.
+            if len(activities) < per_page:
+                break
+            page += 1
+    finally:
+        writer.close()
 
     return (
         {
+            "after_ts": after,
             "fetched": total,
-            "new_or_updated": new_or_updated,
+            "new_or_updated": writer.new_or_updated,
             "oldest_ts": oldest_ts,
             "newest_ts": newest_ts,
             "rate_limited": rate_limited,
@@ -666,8 +1372,472 @@ def _sync_recent(
     )
 
 
-def sync_strava(dry_run: bool, prune_deleted: bool) -> Dict:
-    config = load_config()
+def _split_backfill_windows(after: int, before: int, count: int) -> List[Dict]:
+    count = max(1, count)
+    floor = max(after, BACKFILL_FLOOR_TS) if count > 1 else after
+    if floor >= before:
+        floor = after
+    span = max(0, before - floor)
+    edges = [floor + (span * index) // count for index in range(count + 1)]
+    edges[0] = after
+    edges[-1] = before
+    windows = []
+    for lower, upper in zip(edges, edges[1:]):
+        if upper <= lower:
+            continue
+        windows.append(
+            {
+                "after": int(lower),
+                "before": int(upper),
+                "next_before": int(upper),
+                "completed": False,
+            }
+        )
+    if not windows:
+        windows.append(
+            {"after": int(after), "before": int(before), "next_before": int(before), "completed": False}
+        )
+    # Newest window first so recent history lands before deep history.
+    windows.reverse()
+    return windows
+
+
+def _load_backfill_windows(state: Dict, after: int) -> Optional[List[Dict]]:
+    raw_windows = state.get("windows")
+    if not isinstance(raw_windows, list) or not raw_windows:
+        return None
+    windows = []
+    for item in raw_windows:
+        if not isinstance(item, dict):
+            return None
+        try:
+            window = {
+                "after": int(item["after"]),
+                "before": int(item["before"]),
+                "next_before": int(item.get("next_before") or item["before"]),
+                "completed": bool(item.get("completed")),
+            }
+        except (KeyError, TypeError, ValueError):
+            return None
+        if window["after"] < after or window["next_before"] <= 0:
+            return None
+        windows.append(window)
+    return windows
+
+
+def _open_backfill_cursor(windows: List[Dict]) -> Optional[int]:
+    open_cursors = [window["next_before"] for window in windows if not window.get("completed")]
+    return int(max(open_cursors)) if open_cursors else None
+
+
+def _delete_local_activities(activity_ids: set, manifest: RawManifest, config: Dict) -> None:
+    """Remove raw payloads, manifest entries and normalized rows for deleted activities."""
+    raw_store = _raw_store()
+    for activity_id in sorted(activity_ids):
+        raw_store.delete(activity_id)
+        manifest.remove(activity_id)
+    forget_activities(config, "strava", activity_ids)
+    # Normalization overlays raw files on the persisted rows, so deleted
+    # activities must also leave the normalized dataset.
+    path = NORMALIZED_PATH
+    if not os.path.exists(path):
+        return
+    try:
+        items = read_json(path) or []
+    except Exception:
+        return
+    kept = [
+        item for item in items if not (isinstance(item, dict) and str(item.get("id")) in activity_ids)
+    ]
+    if len(kept) != len(items):
+        write_json(path, kept)
+
+
+def _local_activity_ids_between(manifest: RawManifest, lower: int, upper: int) -> set:
+    """Locally stored ids whose start lies strictly inside (lower, upper).
+
+    Manifest entries carry the UTC start. Normalized rows only keep the local
+    start time, which can be up to ~14 h off UTC, so they only count when at
+    least a day inside the slice; edge activities are audited with a neighbour.
+    """
+    ids = set()
+    for activity_id in manifest.ids():
+        start_ts = (manifest.get(activity_id) or {}).get("start_ts")
+        if isinstance(start_ts, int) and lower < start_ts < upper:
+            ids.add(activity_id)
+    path = NORMALIZED_PATH
+    if not os.path.exists(path):
+        return ids
+    try:
+        items = read_json(path) or []
+    except Exception:
+        return ids
+    for item in items:
+        if not isinstance(item, dict) or item.get("id") is None:
+            continue
+        local_ts = activity_start_ts({"start_date": str(item.get("start_date_local") or "")})
+        if local_ts is not None and lower + 86400 <= local_ts <= upper - 86400:
+            ids.add(str(item["id"]))
+    return ids
+
+
+def _audit_deletion_slice(
+    config: Dict,
+    token: str,
+    per_page: int,
+    after: int,
+    limiter: RateLimiter,
+    manifest: RawManifest,
+    seen_ids: set,
+    audit_state: Optional[Dict],
+    client: Optional[StravaClient] = None,
+) -> Tuple[Dict, Optional[Dict], set, str]:
+    """Re-list one slice of history and find local activities Strava no longer has.
+
+    The slice cursor walks from now towards `after` and wraps around, so every
+    activity is re-checked once per cycle at a cost of one slice per run.
+    """
+    sync_cfg = config.get("sync", {}) or {}
+    slice_seconds = max(1, int(sync_cfg.get("deletion_audit_slice_days", 90))) * 86400
+    now_ts = int(utc_now().timestamp())
+    upper = None
+    if isinstance(audit_state, dict) and isinstance(audit_state.get("cursor_before"), int):
+        upper = audit_state["cursor_before"]
+    if upper is None or upper <= after or upper > now_ts:
+        upper = now_ts
+    lower = max(after, upper - slice_seconds)
+
+    window = {"after": lower, "before": upper, "next_before": upper, "completed": False}
+    result = _backfill_window(
+        config,
+        token,
+        per_page,
+        after,
+        window,
+        limiter,
+        True,
+        threading.Event(),
+        client,
+    )
+    summary: Dict[str, Any] = {
+        "slice_after": lower,
+        "slice_before": upper,
+        "listed": int(result.get("fetched", 0)),
+        "deleted": 0,
+    }
+    if not result.get("exhausted"):
+        # Partial listings cannot prove absence; retry the same slice next run.
+        summary["rate_limited"] = bool(result.get("rate_limited"))
+        summary["rate_limit_message"] = result.get("rate_limit_message", "")
+        return summary, audit_state, set(), token
+
+    remote_ids = set(result.get("activity_ids", ())) | set(seen_ids)
+    missing = _local_activity_ids_between(manifest, lower, upper) - remote_ids
+    summary["deleted"] = len(missing)
+    next_state = {
+        "cursor_before": lower if lower > after else None,
+        "last_slice_utc": utc_now().isoformat(),
+    }
+    if missing:
+        print(f"Deletion audit: {len(missing)} activities no longer on Strava; removing them.")
+    return summary, next_state, missing, token
+
+
+def _stored_backfill_density(state: Dict) -> Optional[float]:
+    density = state.get("backfill_density")
+    if not isinstance(density, dict):
+        return None
+    try:
+        activities = int(density.get("activities") or 0)
+        seconds = int(density.get("seconds") or 0)
+    except (TypeError, ValueError):
+        return None
+    # Require a day of scanned history before trusting the sample.
+    if seconds < 86400:
+        return None
+    return activities / seconds
+
+
+def _normalized_density() -> Optional[float]:
+    path = os.path.join("data", "activities_normalized.json")
+    if not os.path.exists(path):
+        return None
+    try:
+        items = read_json(path) or []
+    except Exception:
+        return None
+    dates = sorted(str(item.get("date")) for item in items if isinstance(item, dict) and item.get("date"))
+    if len(dates) < 2:
+        return None
+    try:
+        first = datetime.strptime(dates[0], "%Y-%m-%d")
+        last = datetime.strptime(dates[-1], "%Y-%m-%d")
+    except ValueError:
+        return None
+    seconds = (last - first).total_seconds() + 86400
+    return len(dates) / seconds
+
+
+def _backfill_scan_progress(start_windows: List[Dict], end_windows: List[Dict]) -> int:
+    """Seconds of history scanned between two snapshots of the same windows."""
+    scanned = 0
+    for start, end in zip(start_windows, end_windows):
+        if start.get("completed"):
+            continue
+        lower = end["after"] if end.get("completed") else end["next_before"]
+        scanned += max(0, int(start["next_before"]) - int(lower))
+    return scanned
+
+
+def _plan_backfill(
+    windows: List[Dict], per_page: int, limiter: RateLimiter, stored_state: Dict
+) -> Dict:
+    """Estimate the requests the remaining backfill needs and when it will finish.
+
+    Density (activities per second of history) comes from earlier backfill runs,
+    else from the normalized dataset, else one activity per day. Every open
+    window also costs one final (empty) page.
+    """
+    open_windows = [window for window in windows if not window.get("completed")]
+    span_seconds = sum(
+        max(0, int(window["next_before"]) - int(window["after"])) for window in open_windows
+    )
+    density = _stored_backfill_density(stored_state)
+    density_source = "backfill_history"
+    if density is None:
+        density = _normalized_density()
+        density_source = "normalized_data"
+    if density is None:
+        density = 1.0 / 86400
+        density_source = "default"
+    estimated_activities = int(round(span_seconds * density))
+    estimated_pages = (
+        -(-estimated_activities // max(1, per_page)) + len(open_windows) if open_windows else 0
+    )
+
+    headroom = limiter.read_headroom()["daily"]
+    daily_budget = max(
+        0,
+        min(limiter.read_day_limit, limiter.overall_day_limit)
+        - limiter.safety_buffer
+        - limiter.daily_reserve,
+    )
+    if estimated_pages <= headroom:
+        eta_days = 0
+    elif daily_budget > 0:
+        eta_days = -(-(estimated_pages - headroom) // daily_budget)
+    else:
+        eta_days = None
+    return {
+        "open_windows": len(open_windows),
+        "history_days_remaining": round(span_seconds / 86400, 1),
+        "density_per_day": round(density * 86400, 3),
+        "density_source": density_source,
+        "estimated_activities": estimated_activities,
+        "estimated_pages": estimated_pages,
+        "daily_headroom": headroom,
+        "daily_budget": daily_budget,
+        "daily_reserve": limiter.daily_reserve,
+        "fits_this_run": estimated_pages <= headroom,
+        # One scheduled run per day: today's run plus one per extra day.
+        "eta_runs": None if eta_days is None else eta_days + 1,
+        "eta_days": eta_days,
+    }
+
+
+def _format_backfill_plan(plan: Dict) -> str:
+    eta = (
+        "never (no daily budget)"
+        if plan["eta_days"] is None
+        else f"{plan['eta_runs']} run(s) / {plan['eta_days']} day(s)"
+    )
+    return (
+        f"Backfill plan: ~{plan['estimated_pages']} page(s) for ~{plan['estimated_activities']} "
+        f"activities over {plan['history_days_remaining']} days in {plan['open_windows']} window(s) "
+        f"({plan['density_per_day']}/day from {plan['density_source']}); "
+        f"daily headroom {plan['daily_headroom']} "
+        f"(reserve {plan['daily_reserve']}); ETA {eta}."
+    )
+
+
+def _backfill_window(
+    config: Dict,
+    token: str,
+    per_page: int,
+    global_after: int,
+    window: Dict,
+    limiter: RateLimiter,
+    dry_run: bool,
+    stop_event: threading.Event,
+    client: Optional[StravaClient] = None,
+    on_progress: Optional[Callable[[Dict], None]] = None,
+    write_queue_pages: int = DEFAULT_WRITE_QUEUE_PAGES,
+) -> Dict:
+    # Windows share their edges; widen `after` by one second on inner edges so an
+    # activity starting exactly on a boundary is not excluded by both neighbours.
+    query_after = max(global_after, window["after"] - 1)
+    window_update = dict(window)
+    total = 0
+    fetched_ids = set()
+    min_ts = None
+    max_ts = None
+    exhausted = False
+    rate_limited = False
+    rate_limit_message = ""
+    writer = _PageWriter(dry_run, write_queue_pages)
+    # `before` is the fetch cursor and runs ahead of the durable cursor in
+    # `window_update`, which the writer advances only once a page is on disk.
+    before = window_update["next_before"]
+
+    def _advance(next_before: int) -> None:
+        window_update["next_before"] = next_before
+        if on_progress:
+            on_progress(dict(window_update))
+
+    # Keyset pagination: always request page 1 and move `before` down to the
+    # oldest start seen, so every request is a cheap range query and the cursor
+    # is exact after each page. `after` is not sent, because it would flip the
+    # listing to oldest first; the window floor is applied locally instead and
+    # the first activity at or below it closes the window.
+    try:
+        while not stop_event.is_set():
+            try:
+                activities, token = _run_with_token_refresh(
+                    config,
+                    token,
+                    limiter,
+                    "historical backfill sync",
+                    lambda access_token: _fetch_page(
+                        access_token, per_page, 1, None, before, limiter, client
+                    ),
+                    client,
+                )
+            except RateLimitExceeded as exc:
+                rate_limited = True
+                rate_limit_message = str(exc)
+                stop_event.set()
+                break
+            if not activities:
+                exhausted = True
+                break
+
+            page_min_ts = None
+            page_activities = []
+            reached_floor = False
+            for activity in activities:
+                ts = _activity_start_ts(activity)
+                if ts is not None:
+                    page_min_ts = ts if page_min_ts is None else min(page_min_ts, ts)
+                    if ts <= query_after:
+                        reached_floor = True
+                        continue
+                activity_id = activity.get("id")
+                if activity_id:
+                    if str(activity_id) in fetched_ids:
+                        continue
+                    fetched_ids.add(str(activity_id))
+                page_activities.append(activity)
+                total += 1
+                if ts is not None:
+                    min_ts = ts if min_ts is None else min(min_ts, ts)
+                    max_ts = ts if max_ts is None else max(max_ts, ts)
+
+            if page_min_ts is None:
+                print("Warning: backfill page had no parseable start dates; closing window.")
+                writer.submit(page_activities)
+                exhausted = True
+                break
+            if reached_floor:
+                writer.submit(page_activities)
+                exhausted = True
+                break
+            # Re-include the oldest second so same-second siblings past the page
+            # edge are not skipped; already-seen ids are deduped above. Step strictly
+            # past that second when the cursor would otherwise not move.
+            next_before = page_min_ts + 1
+            if not page_activities or next_before >= before:
+                next_before = page_min_ts
+            writer.submit(
+                page_activities, lambda cursor=int(next_before): _advance(cursor)
+            )
+            before = int(next_before)
+    finally:
+        writer.close()
+
+    if exhausted:
+        window_update["completed"] = True
+        if on_progress:
+            on_progress(dict(window_update))
+
+    return {
+        "window": window_update,
+        "fetched": total,
+        "new_or_updated": writer.new_or_updated,
+        "activity_ids": fetched_ids,
+        "min_ts": min_ts,
+        "max_ts": max_ts,
+        "exhausted": exhausted,
+        "rate_limited": rate_limited,
+        "rate_limit_message": rate_limit_message,
+    }
+
+
+def _run_backfill_windows(
+    config: Dict,
+    token: str,
+    per_page: int,
+    after: int,
+    windows: List[Dict],
+    limiter: RateLimiter,
+    dry_run: bool,
+    workers: int,
+    client: Optional[StravaClient] = None,
+    on_progress: Optional[Callable[[int, Dict], None]] = None,
+    write_queue_pages: int = DEFAULT_WRITE_QUEUE_PAGES,
+) -> List[Dict]:
+    stop_event = threading.Event()
+    pending = [index for index, window in enumerate(windows) if not window.get("completed")]
+    results: Dict[int, Dict] = {}
+    if not pending:
+        return [{"window": dict(window), "exhausted": True} for window in windows]
+
+    def _run(index: int) -> Dict:
+        window_progress = None
+        if on_progress:
+            window_progress = lambda update: on_progress(index, update)  # noqa: E731
+        try:
+            return _backfill_window(
+                config,
+                token,
+                per_page,
+                after,
+                windows[index],
+                limiter,
+                dry_run,
+                stop_event,
+                client,
+                window_progress,
+                write_queue_pages,
+            )
+        except Exception:
+            stop_event.set()
+            raise
+
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(pending)))) as pool:
+        futures = {index: pool.submit(_run, index) for index in pending}
+        for index in pending:
+            results[index] = futures[index].result()
+
+    ordered = []
+    for index, window in enumerate(windows):
+        if index in results:
+            ordered.append(results[index])
+        else:
+            ordered.append({"window": dict(window), "exhausted": True})
+    return ordered
+
+
+def _build_limiter(config: Dict) -> RateLimiter:
     rate_cfg = config.get("rate_limits", {}) or {}
     limiter = RateLimiter(
         overall_15_limit=int(rate_cfg.get("overall_15_min", 200)),
@@ -676,35 +1846,120 @@ def sync_strava(dry_run: bool, prune_deleted: bool) -> Dict:
         read_day_limit=int(rate_cfg.get("read_daily", 1000)),
         safety_buffer=int(rate_cfg.get("safety_buffer", 2)),
         min_interval_seconds=float(rate_cfg.get("min_interval_seconds", 10)),
+        burst_fraction=float(rate_cfg.get("burst_fraction", 0.5)),
+        max_interval_seconds=float(rate_cfg.get("max_interval_seconds", 30)),
+        daily_reserve=int(rate_cfg.get("reserve_daily", 0)),
     )
-    per_page = int(config.get("sync", {}).get("per_page", 200))
+    _load_rate_limit_state(limiter, config)
+    return limiter
+
+
+def estimate_backfill(config: Dict) -> Dict:
+    """Backfill plan from saved state and rate-limit usage, without API calls."""
+    sync_cfg = config.get("sync", {}) or {}
+    per_page = int(sync_cfg.get("per_page", 200))
     after = _start_after_ts(config)
-    activity_scope = _activity_scope(config)
-    recent_days = int(config.get("sync", {}).get("recent_days", 7))
-    resume_backfill = bool(config.get("sync", {}).get("resume_backfill", True))
+    backfill_windows = max(
+        1, int(sync_cfg.get("backfill_windows", sync_cfg.get("backfill_workers", 1)))
+    )
+    limiter = _build_limiter(config)
+    state = _load_state()
+    same_scope = state.get("after") == after and state.get("activity_scope") == _activity_scope(config)
+    if same_scope and state.get("completed"):
+        return {"backfill_completed": True, "estimated_pages": 0}
+    windows = _load_backfill_windows(state, after) if same_scope else None
+    if windows is None:
+        before = state.get("next_before") if same_scope else None
+        if not isinstance(before, int) or before <= 0:
+            before = int(utc_now().timestamp())
+        windows = _split_backfill_windows(after, before, backfill_windows)
+    return _plan_backfill(windows, per_page, limiter, state)
+
+
+def sync_strava(dry_run: bool, prune_deleted: bool) -> Dict:
+    config = load_config()
+    limiter = _build_limiter(config)
+    backfill_workers = max(1, int((config.get("sync", {}) or {}).get("backfill_workers", 1)))
+
+    metrics = SyncMetrics("strava")
+    client = StravaClient(pool_maxsize=backfill_workers + 1, metrics=metrics)
+    try:
+        summary = _sync_with_client(config, client, limiter, dry_run, prune_deleted)
+    finally:
+        client.close()
+        if not dry_run:
+            _save_rate_limit_state(limiter, config)
+
+    limiter_sleep = float(limiter.stats()["sleep_seconds"])
+    summary["request_metrics"] = metrics.summary(limiter_sleep)
+    textfile = str((config.get("sync", {}) or {}).get("prometheus_textfile") or "").strip()
+    if textfile and not dry_run:
+        try:
+            metrics.write_prometheus(textfile, limiter_sleep)
+        except OSError as exc:
+            print(f"Warning: unable to write Prometheus metrics to {textfile}: {exc}")
+    return summary
+
 
-    token = _get_access_token(config, limiter)
+def _sync_with_client(
+    config: Dict,
+    client: StravaClient,
+    limiter: RateLimiter,
+    dry_run: bool,
+    prune_deleted: bool,
+) -> Dict:
+    sync_cfg = config.get("sync", {}) or {}
+    per_page = int(sync_cfg.get("per_page", 200))
+    after = _start_after_ts(config)
+    activity_scope = _activity_scope(config)
+    recent_days = int(sync_cfg.get("recent_days", 7))
+    resume_backfill = bool(sync_cfg.get("resume_backfill", True))
+    backfill_workers = max(1, int(sync_cfg.get("backfill_workers", 1)))
+    backfill_windows = max(1, int(sync_cfg.get("backfill_windows", backfill_workers)))
+    write_queue_pages = int(sync_cfg.get("write_queue_pages", DEFAULT_WRITE_QUEUE_PAGES))
+
+    token = _get_access_token(config, limiter, client=client)
+    identity_verification = "skipped"
     if not dry_run:
-        token = _maybe_reset_for_new_athlete(config, token, per_page, limiter)
+        if _identity_verification_cached(config):
+            identity_verification = "cached"
+        else:
+            token = _maybe_reset_for_new_athlete(config, token, per_page, limiter, client)
+            identity_verification = "live"
 
     ensure_dir(RAW_DIR)
-
+    manifest = _raw_manifest(reload=True)
+    raw_store = _open_raw_store(config, dry_run)
+
+    stored_state = _load_state()
+    if recent_days > 0:
+        recent_mode, recent_after = _recent_sync_plan(sync_cfg, stored_state, utc_now())
+    else:
+        recent_mode, recent_after = "disabled", None
     recent_summary, token = _sync_recent(
-        config, token, per_page, recent_days, limiter, dry_run
+        config,
+        token,
+        per_page,
+        recent_days,
+        limiter,
+        dry_run,
+        client,
+        after_ts=recent_after,
+        write_queue_pages=write_queue_pages,
     )
+    recent_summary["mode"] = recent_mode
 
-    page = 1
     total = 0
     new_or_updated = 0
     fetched_ids = set(recent_summary.get("activity_ids", []))
     min_ts = None
     max_ts = None
     exhausted = False
-    before = None
+    windows: List[Dict] = []
     skip_backfill = False
     used_resume_cursor = False
 
-    state = _load_state() if resume_backfill and not dry_run else {}
+    state = dict(stored_state) if resume_backfill and not dry_run else {}
     state_after: Optional[int] = None
     if state:
         try:
@@ -721,57 +1976,94 @@ def sync_strava(dry_run: bool, prune_deleted: bool) -> Dict:
         state_after = None
     if state and state.get("completed"):
         skip_backfill = True
-    elif state and state_after == after and state.get("next_before") is not None:
-        try:
-            before = int(state["next_before"])
-            if before <= 0:
-                raise ValueError("cursor must be positive epoch seconds")
+    elif state and state_after == after:
+        stored_windows = _load_backfill_windows(state, after)
+        if stored_windows is not None:
+            windows = stored_windows
             used_resume_cursor = True
-        except (TypeError, ValueError):
-            print("Invalid backfill cursor; restarting from current time.")
+        elif state.get("next_before") is not None:
+            try:
+                before = int(state["next_before"])
+                if before <= 0:
+                    raise ValueError("cursor must be positive epoch seconds")
+                windows = _split_backfill_windows(after, before, backfill_windows)
+                used_resume_cursor = True
+            except (TypeError, ValueError):
+                print("Invalid backfill cursor; restarting from current time.")
+                state = {}
+                state_after = None
+        elif state.get("windows") is not None:
+            print("Invalid backfill windows; restarting from current time.")
             state = {}
             state_after = None
-            before = None
 
-    if before is None and not skip_backfill:
-        before = int(utc_now().timestamp())
+    if not windows and not skip_backfill:
+        windows = _split_backfill_windows(
+            after, int(utc_now().timestamp()), backfill_windows
+        )
 
     rate_limited = bool(recent_summary.get("rate_limited"))
     rate_limit_message = recent_summary.get("rate_limit_message", "")
 
+    backfill_plan: Optional[Dict] = None
+    backfill_density = stored_state.get("backfill_density")
+    start_windows = [dict(window) for window in windows]
     if not rate_limited and not skip_backfill:
-        while True:
-            try:
-                activities, token = _run_with_token_refresh(
-                    config,
-                    token,
-                    limiter,
-                    "historical backfill sync",
-                    lambda access_token: _fetch_page(
-                        access_token, per_page, page, after, before, limiter
-                    ),
+        # Headroom reflects the headers of the responses received so far.
+        backfill_plan = _plan_backfill(windows, per_page, limiter, stored_state)
+        print(_format_backfill_plan(backfill_plan))
+
+    if not rate_limited and not skip_backfill:
+        checkpoint_lock = threading.Lock()
+        checkpoint_windows = [dict(window) for window in windows]
+
+        def _checkpoint(index: int, window_update: Dict) -> None:
+            # Persist the exact per-window cursor after every durable page so an
+            # interrupted run resumes without refetching.
+            with checkpoint_lock:
+                checkpoint_windows[index] = window_update
+                _save_state(
+                    {
+                        "after": after,
+                        "next_before": _open_backfill_cursor(checkpoint_windows),
+                        "windows": [dict(window) for window in checkpoint_windows],
+                        "completed": False,
+                        "rate_limited": False,
+                        "last_run_utc": utc_now().isoformat(),
+                        "activity_scope": activity_scope,
+                        "high_water_ts": stored_state.get("high_water_ts"),
+                        "last_edit_sweep_utc": stored_state.get("last_edit_sweep_utc"),
+                        "backfill_density": backfill_density,
+                        "deletion_audit": stored_state.get("deletion_audit"),
+                    }
                 )
-            except RateLimitExceeded as exc:
+
+        results = _run_backfill_windows(
+            config,
+            token,
+            per_page,
+            after,
+            windows,
+            limiter,
+            dry_run,
+            backfill_workers,
+            client,
+            None if dry_run else _checkpoint,
+            write_queue_pages,
+        )
+        windows = [result["window"] for result in results]
+        exhausted = all(result.get("exhausted") for result in results)
+        for result in results:
+            total += int(result.get("fetched", 0))
+            new_or_updated += int(result.get("new_or_updated", 0))
+            fetched_ids.update(result.get("activity_ids", ()))
+            if result.get("min_ts") is not None:
+                min_ts = result["min_ts"] if min_ts is None else min(min_ts, result["min_ts"])
+            if result.get("max_ts") is not None:
+                max_ts = result["max_ts"] if max_ts is None else max(max_ts, result["max_ts"])
+            if result.get("rate_limited") and not rate_limited:
                 rate_limited = True
-                rate_limit_message = str(exc)
-                break
-            if not activities:
-                exhausted = True
-                break
-            for activity in activities:
-                total += 1
-                activity_id = activity.get("id")
-                if activity_id:
-                    fetched_ids.add(str(activity_id))
-                ts = _activity_start_ts(activity)
-                if ts is not None:
-                    min_ts = ts if min_ts is None else min(min_ts, ts)
-                    max_ts = ts if max_ts is None else max(max_ts, ts)
-                if dry_run:
-                    continue
-                if _write_activity(activity):
-                    new_or_updated += 1
-            page += 1
+                rate_limit_message = result.get("rate_limit_message", "")
 
     can_prune_deleted = (
         prune_deleted
@@ -781,25 +2073,59 @@ def sync_strava(dry_run: bool, prune_deleted: bool) -> Dict:
         and exhausted
         and not rate_limited
     )
-    deleted = 0
+    deleted_ids: set = set()
     if can_prune_deleted:
-        for filename in os.listdir(RAW_DIR):
-            if not filename.endswith(".json"):
-                continue
-            activity_id = filename[:-5]
-            if activity_id not in fetched_ids:
-                os.remove(os.path.join(RAW_DIR, filename))
-                deleted += 1
+        # Payloads stored before the manifest existed are not indexed yet.
+        stored_ids = manifest.ids() | _raw_store().ids()
+        deleted_ids = stored_ids - fetched_ids
     elif prune_deleted and not dry_run:
         print(
-            "Skipping prune_deleted: pruning requires a full backfill scan in this run "
-            "(no resume cursor, no rate-limit)."
+            "Skipping full prune_deleted: it requires a full backfill scan in this run "
+            "(no resume cursor, no rate-limit); running the rolling deletion audit instead."
         )
 
     completed = True if skip_backfill else (exhausted and not rate_limited)
-    next_before = None
-    if not completed and min_ts is not None:
-        next_before = int(min_ts + 1)
+    deletion_audit_state = stored_state.get("deletion_audit")
+    audit_summary: Optional[Dict] = None
+    if prune_deleted and not dry_run and not can_prune_deleted and completed and not rate_limited:
+        audit_summary, deletion_audit_state, audit_deleted, token = _audit_deletion_slice(
+            config,
+            token,
+            per_page,
+            after,
+            limiter,
+            manifest,
+            fetched_ids,
+            deletion_audit_state,
+            client,
+        )
+        deleted_ids |= audit_deleted
+        if audit_summary.get("rate_limited"):
+            rate_limited = True
+            rate_limit_message = audit_summary.get("rate_limit_message", "")
+
+    if deleted_ids:
+        _delete_local_activities(deleted_ids, manifest, config)
+    deleted = len(deleted_ids)
+
+    detail_summary: Dict[str, Any] = {"enabled": False}
+    if bool(sync_cfg.get("detail_enrichment", False)) and not dry_run:
+        detail_queue = _load_detail_queue()
+        _refresh_detail_queue(detail_queue, manifest, deleted_ids)
+        if rate_limited:
+            detail_summary = {"fetched": 0, "failed": 0, "pending": len(detail_queue["pending"])}
+            detail_summary["stopped"] = "rate_limited"
+        else:
+            detail_summary, token = _drain_detail_queue(
+                config, token, limiter, detail_queue, client
+            )
+        detail_summary["enabled"] = True
+        _save_detail_queue(detail_queue)
+    elif not dry_run and os.path.exists(DETAIL_QUEUE_PATH):
+        # The queue keeps health and device fields in data/; stop publishing them once disabled.
+        os.remove(DETAIL_QUEUE_PATH)
+
+    next_before = None if completed else _open_backfill_cursor(windows)
 
     if not dry_run:
         if skip_backfill and state:
@@ -807,22 +2133,44 @@ def sync_strava(dry_run: bool, prune_deleted: bool) -> Dict:
             state_update["completed"] = True
             state_update["rate_limited"] = rate_limited
             state_update["last_run_utc"] = utc_now().isoformat()
-        elif rate_limited and min_ts is None and state:
-            state_update = dict(state)
-            state_update["rate_limited"] = True
-            state_update["last_run_utc"] = utc_now().isoformat()
         else:
             state_update = {
                 "after": after,
                 "next_before": next_before,
+                "windows": [] if completed else windows,
                 "completed": completed,
                 "oldest_seen_ts": min_ts,
                 "newest_seen_ts": max_ts,
                 "rate_limited": rate_limited,
                 "last_run_utc": utc_now().isoformat(),
             }
+            scanned_seconds = _backfill_scan_progress(start_windows, windows)
+            if scanned_seconds:
+                previous = backfill_density if isinstance(backfill_density, dict) else {}
+                state_update["backfill_density"] = {
+                    "activities": int(previous.get("activities") or 0) + total,
+                    "seconds": int(previous.get("seconds") or 0) + scanned_seconds,
+                }
+            elif backfill_density:
+                state_update["backfill_density"] = backfill_density
         state_update["activity_scope"] = activity_scope
+        state_update["deletion_audit"] = deletion_audit_state
+        high_water_candidates = [
+            value
+            for value in (
+                stored_state.get("high_water_ts"),
+                recent_summary.get("newest_ts"),
+                max_ts,
+            )
+            if isinstance(value, int)
+        ]
+        state_update["high_water_ts"] = max(high_water_candidates) if high_water_candidates else None
+        state_update["last_edit_sweep_utc"] = stored_state.get("last_edit_sweep_utc")
+        if recent_mode == "edit_sweep" and not recent_summary.get("rate_limited"):
+            state_update["last_edit_sweep_utc"] = utc_now().isoformat()
         _save_state(state_update)
+        raw_store.close()
+        manifest.save()
 
     total_fetched = total + int(recent_summary.get("fetched", 0))
     total_new_or_updated = new_or_updated + int(recent_summary.get("new_or_updated", 0))
@@ -831,19 +2179,174 @@ def sync_strava(dry_run: bool, prune_deleted: bool) -> Dict:
         "source": "strava",
         "fetched": total_fetched,
         "new_or_updated": total_new_or_updated,
+        "new": manifest.counts["new"],
+        "updated": manifest.counts["updated"],
         "deleted": deleted,
         "lookback_start_ts": after,
         "timestamp_utc": utc_now().isoformat(),
         "rate_limited": rate_limited,
         "backfill_completed": completed,
         "backfill_next_before": next_before,
+        "backfill_windows_remaining": sum(
+            1 for window in windows if not window.get("completed")
+        ),
+        "backfill_plan": backfill_plan,
         "recent_sync": recent_summary,
+        "deletion_audit": audit_summary,
+        "identity_verification": identity_verification,
+        "detail_enrichment": detail_summary,
+        "http_connections": client.connection_stats(),
+        "rate_limiter": limiter.stats(),
     }
     if rate_limited:
         summary["rate_limit_message"] = rate_limit_message
     return summary
 
 
+def _collapse_webhook_events(events: List[Dict], athlete_fingerprint: Optional[str], secret: str) -> Dict:
+    """Reduce queued push events to one action per activity, in arrival order."""
+    actions: Dict[str, str] = {}
+    latest: Dict[str, Dict] = {}
+    foreign = 0
+    deauthorized = False
+    for event in events:
+        fingerprint = event.get("owner_fingerprint") or _athlete_fingerprint(event["owner_id"], secret)
+        if athlete_fingerprint and fingerprint != athlete_fingerprint:
+            foreign += 1
+            continue
+        if event["object_type"] == "athlete":
+            if str(event["updates"].get("authorized", "")).lower() == "false":
+                deauthorized = True
+            continue
+        activity_id = str(event["object_id"])
+        action = "delete" if event["aspect_type"] == "delete" else "fetch"
+        actions.pop(activity_id, None)
+        actions[activity_id] = action
+        latest[activity_id] = event
+    return {"actions": actions, "events": latest, "foreign": foreign, "deauthorized": deauthorized}
+
+
+def sync_strava_events(dry_run: bool) -> Dict:
+    """Apply queued push events: fetch created/updated activities, drop deleted ones."""
+    config = load_config()
+    limiter = _build_limiter(config)
+    metrics = SyncMetrics("strava")
+    client = StravaClient(pool_maxsize=1, metrics=metrics)
+    try:
+        summary = _sync_events_with_client(config, client, limiter, dry_run)
+    finally:
+        client.close()
+        if not dry_run:
+            _save_rate_limit_state(limiter, config)
+    summary["request_metrics"] = metrics.summary(float(limiter.stats()["sleep_seconds"]))
+    return summary
+
+
+def _sync_events_with_client(
+    config: Dict,
+    client: StravaClient,
+    limiter: RateLimiter,
+    dry_run: bool,
+) -> Dict:
+    sync_cfg = config.get("sync", {}) or {}
+    secret = str((config.get("strava", {}) or {}).get("client_secret") or "")
+    event_queue = EventQueue(WEBHOOK_QUEUE_PATH, owner_secret=secret)
+    events = event_queue.peek() if dry_run else event_queue.claim()
+    collapsed = _collapse_webhook_events(events, _load_athlete_fingerprint(), secret)
+    actions = collapsed["actions"]
+    after = _start_after_ts(config)
+
+    summary: Dict[str, Any] = {
+        "source": "strava",
+        "mode": "webhook_events",
+        "events": len(events),
+        "foreign_events": collapsed["foreign"],
+        "deauthorized": collapsed["deauthorized"],
+        "fetched": 0,
+        "new_or_updated": 0,
+        "deleted": 0,
+        "failed": 0,
+        "requeued": 0,
+        "lookback_start_ts": after,
+        "timestamp_utc": utc_now().isoformat(),
+        "rate_limited": False,
+    }
+    if dry_run:
+        summary["planned"] = {
+            "fetch": sorted(key for key, value in actions.items() if value == "fetch"),
+            "delete": sorted(key for key, value in actions.items() if value == "delete"),
+        }
+        return summary
+    if collapsed["deauthorized"]:
+        # The refresh token no longer works; leave local data alone until setup is rerun.
+        print("Strava deauthorized this app; skipping queued activity events.")
+        event_queue.ack()
+        return summary
+
+    ensure_dir(RAW_DIR)
+    manifest = _raw_manifest(reload=True)
+    raw_store = _open_raw_store(config, dry_run)
+    deleted_ids = {activity_id for activity_id, action in actions.items() if action == "delete"}
+    fetch_ids = [activity_id for activity_id, action in actions.items() if action == "fetch"]
+    detail_enrichment = bool(sync_cfg.get("detail_enrichment", False))
+    detail_queue = _load_detail_queue() if detail_enrichment else None
+    requeue: List[Dict] = []
+    token = _get_access_token(config, limiter, client=client) if fetch_ids else ""
+
+    for position, activity_id in enumerate(fetch_ids):
+        try:
+            activity, token = _run_with_token_refresh(
+                config,
+                token,
+                limiter,
+                "webhook activity fetch",
+                lambda access_token: _fetch_activity_detail(access_token, activity_id, limiter, client),
+                client,
+            )
+        except RateLimitExceeded as exc:
+            summary["rate_limited"] = True
+            summary["rate_limit_message"] = str(exc)
+            requeue = [collapsed["events"][pending_id] for pending_id in fetch_ids[position:]]
+            break
+        except requests.RequestException as exc:
+            if _http_error_status(exc) == 404:
+                # Deleted (or made private to another athlete) before we got to it.
+                deleted_ids.add(activity_id)
+            else:
+                print(f"Warning: unable to fetch activity {activity_id} from webhook event: {exc}")
+                summary["failed"] += 1
+            continue
+        summary["fetched"] += 1
+        start_ts = _activity_start_ts(activity)
+        if start_ts is not None and start_ts <= after:
+            continue
+        if _write_activity(_summary_from_detail(activity)):
+            summary["new_or_updated"] += 1
+        if detail_queue is not None:
+            # The payload already is the detailed representation; no second read needed.
+            ensure_dir(_detail_dir())
+            write_json(os.path.join(_detail_dir(), f"{activity_id}.json"), activity)
+            detail_queue["pending"].pop(activity_id, None)
+            detail_queue["fetched"][activity_id] = (manifest.get(activity_id) or {}).get("sha256")
+            detail_queue.setdefault("details", {})[activity_id] = _detail_enrichment_fields(activity)
+
+    if deleted_ids:
+        _delete_local_activities(deleted_ids, manifest, config)
+        if detail_queue is not None:
+            _refresh_detail_queue(detail_queue, manifest, deleted_ids)
+    if detail_queue is not None:
+        _save_detail_queue(detail_queue)
+    raw_store.close()
+    manifest.save()
+    event_queue.ack(requeue)
+
+    summary["deleted"] = len(deleted_ids)
+    summary["requeued"] = len(requeue)
+    summary["new"] = manifest.counts["new"]
+    summary["updated"] = manifest.counts["updated"]
+    return summary
+
+
 def main() -> int:
     parser = argparse.ArgumentParser(description="Sync Strava activities")
     parser.add_argument("--dry-run", action="store_true")
@@ -852,14 +2355,33 @@ def main() -> int:
         action="store_true",
         help="Remove local raw activities not returned by Strava",
     )
+    parser.add_argument(
+        "--from-webhook-queue",
+        action="store_true",
+        help="Apply queued Strava push events (see strava_webhook.py) instead of polling",
+    )
+    parser.add_argument(
+        "--estimate",
+        action="store_true",
+        help="Print the remaining backfill cost and ETA from saved state without calling Strava",
+    )
     args = parser.parse_args()
 
     config = load_config()
+    if args.estimate:
+        plan = estimate_backfill(config)
+        if "eta_days" in plan:
+            print(_format_backfill_plan(plan))
+        print(json.dumps(plan, indent=2))
+        return 0
     prune_deleted = args.prune_deleted or bool(
         config.get("sync", {}).get("prune_deleted", False)
     )
 
-    summary = sync_strava(args.dry_run, prune_deleted)
+    if args.from_webhook_queue:
+        summary = sync_strava_events(args.dry_run)
+    else:
+        summary = sync_strava(args.dry_run, prune_deleted)
 
     ensure_dir("data")
     if not args.dry_run:
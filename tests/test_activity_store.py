@@ -0,0 +1,218 @@
+import os
+import sys
+import tempfile
+import types
+import unittest
+from unittest import mock
+
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SCRIPTS_DIR = os.path.join(ROOT_DIR, "scripts")
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
+
+yaml_stub = types.ModuleType("yaml")
+yaml_stub.safe_load = lambda *_args, **_kwargs: {}
+sys.modules.setdefault("yaml", yaml_stub)
+requests_stub = types.ModuleType("requests")
+
+
+class _RequestException(Exception):
+    pass
+
+
+class _HTTPError(_RequestException):
+    def __init__(self, message: str, response=None):
+        super().__init__(message)
+        self.response = response
+
+
+def _default_request(*_args, **_kwargs):
+    raise NotImplementedError("requests.request stub was not patched")
+
+
+requests_stub.RequestException = _RequestException
+requests_stub.HTTPError = _HTTPError
+requests_stub.request = _default_request
+sys.modules.setdefault("requests", requests_stub)
+
+import activity_store  # noqa: E402
+import aggregate  # noqa: E402
+import generate_heatmaps  # noqa: E402
+import normalize  # noqa: E402
+import sync_strava  # noqa: E402
+from raw_store import SegmentedRawStore, forget_raw_store  # noqa: E402
+
+
+def _row(activity_id, date, activity_type="Run", distance=1000.0, **extra):
+    row = {
+        "id": activity_id,
+        "date": date,
+        "year": int(date[:4]),
+        "type": activity_type,
+        "raw_type": activity_type,
+        "start_date_local": f"{date}T07:30:00Z",
+        "distance": distance,
+        "moving_time": 600.0,
+        "elevation_gain": 10.0,
+    }
+    row.update(extra)
+    return row
+
+
+def _strava(activity_id, start, sport_type="Run", distance=1000.0):
+    return {
+        "id": activity_id,
+        "start_date_local": start,
+        "sport_type": sport_type,
+        "type": sport_type,
+        "distance": distance,
+        "moving_time": 600,
+        "total_elevation_gain": 5,
+        "name": f"Activity {activity_id}",
+    }
+
+
+class ActivityStoreTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.path = os.path.join(self._tmp.name, "data", "activities.sqlite")
+
+    def test_raw_generations_track_only_changed_payloads(self) -> None:
+        with activity_store.ActivityStore(self.path) as store:
+            self.assertEqual(store.put_raw("strava", [("1", {"v": 1}, None), ("2", {"v": 2}, None)]), 2)
+            first = store.raw_generation("strava")
+            self.assertEqual(store.put_raw("strava", [("1", {"v": 1}, None), ("2", {"v": 2}, {"calories": 5})]), 1)
+
+            changed = list(store.raw_changed_since("strava", first))
+            self.assertEqual(changed, [("2", {"v": 2}, {"calories": 5})])
+            self.assertEqual([item[0] for item in store.raw_changed_since("strava")], ["1", "2"])
+            self.assertEqual(list(store.raw_changed_since("garmin")), [])
+
+    def test_transaction_rolls_back_every_write(self) -> None:
+        with activity_store.ActivityStore(self.path) as store:
+            store.replace_activities([_row("a", "2025-12-31")])
+            with self.assertRaises(RuntimeError):
+                with store.transaction():
+                    store.replace_activities([_row("b", "2026-01-01")])
+                    store.set_state("normalize.strava.raw_generation", 3)
+                    raise RuntimeError("crash mid-update")
+            self.assertEqual([item["id"] for item in store.iter_activities()], ["a"])
+            self.assertIsNone(store.get_state("normalize.strava.raw_generation"))
+
+        with activity_store.ActivityStore(self.path) as reopened:
+            self.assertEqual(reopened.activity_count(), 1)
+
+    def test_queries_filter_on_indexed_columns(self) -> None:
+        rows = [
+            _row("b", "2026-02-01", distance=250.0),
+            _row("a", "2026-02-01"),
+            _row("c", "2026-02-01", "Ride"),
+            _row("d", "2025-06-01", name="Old"),
+        ]
+        with activity_store.ActivityStore(self.path) as store:
+            self.assertEqual(store.replace_activities(rows), (4, 0))
+            self.assertEqual(store.replace_activities(rows[:3] + [_row("e", "2026-03-01")]), (1, 1))
+
+            self.assertEqual(store.years(), [2026])
+            self.assertEqual(store.type_counts(), {"Run": 3, "Ride": 1})
+            self.assertEqual([item["id"] for item in store.iter_activities(activity_type="Run")], ["a", "b", "e"])
+            self.assertEqual([item["id"] for item in store.iter_activities(since="2026-02-15")], ["e"])
+            self.assertEqual(
+                next(store.iter_activities(year=2026, activity_type="Ride", columns=("date", "type"))),
+                {"id": "c", "date": "2026-02-01", "type": "Ride"},
+            )
+            with self.assertRaises(ValueError):
+                list(store.iter_activities(columns=("row",)))
+
+            run_day = next(store.daily_totals(year=2026, activity_type="Run"))
+            self.assertEqual(run_day["count"], 2)
+            self.assertEqual(run_day["distance"], 1250.0)
+            self.assertEqual(run_day["activity_ids"], ["a", "b"])
+
+
+class ActivityStorePipelineTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        previous_cwd = os.getcwd()
+        os.chdir(self._tmp.name)
+        self.addCleanup(os.chdir, previous_cwd)
+        self.raw = SegmentedRawStore(os.path.join("activities", "raw", "strava"))
+        self.raw.put("1", _strava(1, "2026-02-01T07:00:00Z"))
+        self.raw.put("2", _strava(2, "2026-02-01T18:00:00Z", distance=500.0))
+        self.raw.put("3", _strava(3, "2026-02-03T07:00:00Z", "Ride"))
+        self.raw.close()
+
+    def _config(self, sqlite: bool):
+        return {"source": "strava", "activities": {"types": ["Run", "Ride"]}, "storage": {"sqlite": sqlite}}
+
+    def _run(self, sqlite: bool):
+        config = self._config(sqlite)
+        with (
+            mock.patch("normalize.load_config", return_value=config),
+            mock.patch("aggregate.load_config", return_value=config),
+            mock.patch.object(normalize, "_normalize_activity", wraps=normalize._normalize_activity) as normalized,
+        ):
+            items = normalize.normalize()
+            normalize.ensure_dir("data")
+            normalize.write_json(normalize.OUT_PATH, items)
+            years = aggregate.aggregate()["years"]
+        return items, years, normalized.call_count
+
+    def test_store_backed_stages_match_json_and_only_renormalize_changes(self) -> None:
+        json_items, json_years, _calls = self._run(sqlite=False)
+        os.remove(normalize.OUT_PATH)
+
+        items, years, calls = self._run(sqlite=True)
+        self.assertEqual(items, json_items)
+        self.assertEqual(calls, 3)
+        self.assertEqual(years["2026"]["Run"]["2026-02-01"], json_years["2026"]["Run"]["2026-02-01"])
+        self.assertEqual(years["2026"]["Run"]["2026-02-01"]["activity_ids"], ["1", "2"])
+
+        _items, _years, calls = self._run(sqlite=True)
+        self.assertEqual(calls, 0)
+        # Raw payloads never land in the published data/ directory.
+        self.assertTrue(os.path.exists(activity_store.DEFAULT_STORE_PATH))
+        self.assertEqual([name for name in os.listdir("data") if "sqlite" in name], [])
+
+        raw = SegmentedRawStore(os.path.join("activities", "raw", "strava"))
+        raw.put("2", _strava(2, "2026-02-01T18:00:00Z", distance=750.0))
+        raw.close()
+        items, years, calls = self._run(sqlite=True)
+        self.assertEqual(calls, 1)
+        self.assertEqual(years["2026"]["Run"]["2026-02-01"]["distance"], 1750.0)
+
+        with activity_store.ActivityStore(activity_store.DEFAULT_STORE_PATH) as store:
+            site_activities = generate_heatmaps._load_activities(store=store)
+        self.assertEqual([(item["date"], item["type"], item["hour"]) for item in site_activities][:2], [
+            ("2026-02-01", "Run", 7),
+            ("2026-02-01", "Run", 18),
+        ])
+
+    def test_deleted_activity_does_not_come_back_from_the_store(self) -> None:
+        self._run(sqlite=True)
+        # Activity 2 now holds the newest raw generation.
+        raw = SegmentedRawStore(os.path.join("activities", "raw", "strava"))
+        raw.put("2", _strava(2, "2026-02-01T18:00:00Z", distance=750.0))
+        raw.close()
+        self._run(sqlite=True)
+
+        # The fixture wrote the opt-in segment layout.
+        with mock.patch.object(sync_strava, "_RAW_STORE_LAYOUT", "segments"):
+            sync_strava._delete_local_activities({"2"}, sync_strava._raw_manifest(reload=True), self._config(sqlite=True))
+            sync_strava._raw_store().close()
+        forget_raw_store(sync_strava.RAW_DIR)
+        # A new upload in the same run must not reuse the deleted row's generation.
+        raw = SegmentedRawStore(os.path.join("activities", "raw", "strava"))
+        raw.put("4", _strava(4, "2026-02-04T07:00:00Z"))
+        raw.close()
+
+        items, years, calls = self._run(sqlite=True)
+        self.assertEqual(calls, 1)
+        self.assertEqual(sorted(item["id"] for item in items), ["1", "3", "4"])
+        self.assertEqual(years["2026"]["Run"]["2026-02-01"]["activity_ids"], ["1"])
+
+if __name__ == "__main__":
+    unittest.main()
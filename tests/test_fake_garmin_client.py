@@ -0,0 +1,59 @@
+import os
+import sys
+import types
+import unittest
+from datetime import date
+
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SCRIPTS_DIR = os.path.join(ROOT_DIR, "scripts")
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
+
+yaml_stub = types.ModuleType("yaml")
+yaml_stub.safe_load = lambda *_args, **_kwargs: {}
+sys.modules.setdefault("yaml", yaml_stub)
+
+import fake_garmin_client  # noqa: E402
+import sync_garmin  # noqa: E402
+
+
+END_TS = 1_770_000_000
+
+
+class FakeGarminClientTests(unittest.TestCase):
+    def test_listings_are_newest_first_and_details_fill_missing_durations(self) -> None:
+        activities = fake_garmin_client.synthetic_activities(50, END_TS, spacing_seconds=86400)
+        client = fake_garmin_client.FakeGarmin(activities, missing_duration_rate=0.3, date_ranges=False)
+
+        page = client.get_activities(0, 20)
+        stamps = [item["startTimeGMT"] for item in page]
+        self.assertEqual(stamps, sorted(stamps, reverse=True))
+        self.assertEqual(client.get_activities(40, 20)[-1]["activityId"], fake_garmin_client.ACTIVITY_ID_BASE)
+        self.assertIsNone(client.get_activities_by_date)
+
+        missing = [item for item in page if str(item["activityId"]) in client.missing_duration_ids]
+        self.assertTrue(missing)
+        self.assertEqual(sync_garmin._normalize_activity(missing[0])["moving_time"], 0.0)
+        value, endpoint = sync_garmin._fetch_activity_duration_from_summary(client, str(missing[0]["activityId"]))
+        self.assertGreater(value, 0)
+        self.assertEqual(endpoint, "get_activity")
+        self.assertEqual(client.counts["get_activities"], 2)
+
+    def test_scripted_429_is_recognised_and_retried_by_the_limiter(self) -> None:
+        activities = fake_garmin_client.synthetic_activities(10, END_TS)
+        client = fake_garmin_client.FakeGarmin(activities, throttle_calls={1})
+        limiter = sync_garmin._GarminLimiter(backoff_seconds=0)
+        paced = sync_garmin._PacedClient(client, limiter)
+
+        ranged = sync_garmin._fetch_range(paced, date(2000, 1, 1), date(2100, 1, 1))
+
+        self.assertEqual(len(ranged), 10)
+        self.assertEqual((client.counts["calls"], client.counts["throttled"]), (2, 1))
+        self.assertEqual(limiter.rate_limited, 1)
+        with self.assertRaises(fake_garmin_client.GarminConnectConnectionError):
+            client.get_activity("missing")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import json
+import os
+import sys
+import unittest
+import urllib.error
+import urllib.request
+
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SCRIPTS_DIR = os.path.join(ROOT_DIR, "scripts")
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
+
+import fake_strava_server  # noqa: E402
+
+
+END_TS = 1_770_000_000
+
+
+class FakeStravaServerTests(unittest.TestCase):
+    def _get(self, server, path):
+        with urllib.request.urlopen(server.base_url + path, timeout=5) as resp:
+            return json.loads(resp.read()), dict(resp.headers)
+
+    def test_activity_pages_are_newest_first_unless_after_is_given(self) -> None:
+        activities = fake_strava_server.synthetic_activities(25, END_TS, spacing_seconds=100)
+        timestamps = [fake_strava_server._start_ts(item) for item in activities]
+        with fake_strava_server.FakeStravaServer(activities) as server:
+            page_one, headers = self._get(server, "/api/v3/athlete/activities?per_page=10&page=1")
+            page_three, _ = self._get(server, "/api/v3/athlete/activities?per_page=10&page=3")
+            before_only, _ = self._get(server, f"/api/v3/athlete/activities?per_page=3&before={timestamps[9]}")
+            ascending, _ = self._get(server, "/api/v3/athlete/activities?per_page=10&page=1&after=0")
+            bounded, _ = self._get(
+                server,
+                f"/api/v3/athlete/activities?per_page=200&after={timestamps[4]}&before={timestamps[9]}",
+            )
+
+        self.assertEqual([item["id"] for item in page_one], [activities[i]["id"] for i in range(24, 14, -1)])
+        self.assertEqual(len(page_three), 5)
+        self.assertEqual([item["id"] for item in before_only], [activities[i]["id"] for i in range(8, 5, -1)])
+        self.assertEqual([item["id"] for item in ascending], [activities[i]["id"] for i in range(10)])
+        self.assertEqual([item["id"] for item in bounded], [activities[i]["id"] for i in range(5, 9)])
+        self.assertEqual(headers["X-ReadRateLimit-Usage"].split(",")[0], "1")
+
+    def test_rate_limit_and_injected_faults_return_error_statuses(self) -> None:
+        activities = fake_strava_server.synthetic_activities(3, END_TS)
+        limits = {"read_15_min": 2}
+        with fake_strava_server.FakeStravaServer(activities, rate_limits=limits) as server:
+            self._get(server, "/api/v3/athlete")
+            self._get(server, "/api/v3/athlete")
+            with self.assertRaises(urllib.error.HTTPError) as ctx:
+                self._get(server, "/api/v3/athlete")
+        self.assertEqual(ctx.exception.code, 429)
+        self.assertEqual(server.counts["throttled"], 1)
+
+        with fake_strava_server.FakeStravaServer(activities, fault_rate=1.0, fault_statuses=[503]) as server:
+            with self.assertRaises(urllib.error.HTTPError) as ctx:
+                self._get(server, "/api/v3/athlete")
+        self.assertEqual(ctx.exception.code, 503)
+
+
+if __name__ == "__main__":
+    unittest.main()
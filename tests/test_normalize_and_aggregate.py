@@ -1,5 +1,6 @@
 import os
 import sys
+import tempfile
 import types
 import unittest
 from datetime import datetime, timezone
@@ -17,6 +18,7 @@ sys.modules.setdefault("yaml", yaml_stub)
 
 import aggregate  # noqa: E402
 import normalize  # noqa: E402
+from utils import write_json  # noqa: E402
 
 
 class NormalizeAndAggregateTests(unittest.TestCase):
@@ -49,6 +51,49 @@ class NormalizeAndAggregateTests(unittest.TestCase):
         self.assertEqual(normalized["elevation_gain"], 50.0)
         self.assertEqual(normalized["name"], "Morning Session")
 
+    def test_normalize_activity_merges_detail_fields(self) -> None:
+        activity = {
+            "id": 321,
+            "start_date_local": "2026-02-13T08:15:30Z",
+            "type": "Run",
+            "average_heartrate": 140,
+        }
+        detail = {"calories": "612.5", "device_name": " Garmin Forerunner ", "average_heartrate": 142.4}
+
+        normalized = normalize._normalize_activity(activity, {}, "strava", detail)
+        summary_only = normalize._normalize_activity(activity, {}, "strava")
+
+        self.assertEqual(normalized["calories"], 612.5)
+        self.assertEqual(normalized["device_name"], "Garmin Forerunner")
+        self.assertEqual(normalized["average_heartrate"], 142.4)
+        self.assertEqual(summary_only["average_heartrate"], 140.0)
+        self.assertNotIn("calories", summary_only)
+
+    def test_normalize_falls_back_to_persisted_detail_fields(self) -> None:
+        with tempfile.TemporaryDirectory() as workdir:
+            previous_cwd = os.getcwd()
+            os.chdir(workdir)
+            self.addCleanup(os.chdir, previous_cwd)
+            raw_dir = os.path.join("activities", "raw", "strava")
+            os.makedirs(raw_dir)
+            os.makedirs("data")
+            activity = {"id": 5, "start_date_local": "2026-02-13T08:15:30Z", "type": "Run"}
+            write_json(os.path.join(raw_dir, "5.json"), activity)
+            write_json(
+                os.path.join("data", "detail_queue_strava.json"),
+                {"version": 1, "details": {"5": {"calories": 410.0, "device_name": "Watch"}}},
+            )
+
+            enabled = {"source": "strava", "sync": {"detail_enrichment": True}}
+            with mock.patch("normalize.load_config", return_value=enabled):
+                items = normalize.normalize()
+            # Off by default: health and device fields never reach the published data/ tree.
+            with mock.patch("normalize.load_config", return_value={"source": "strava"}):
+                unpublished = normalize.normalize()
+
+        self.assertEqual((items[0]["calories"], items[0]["device_name"]), (410.0, "Watch"))
+        self.assertFalse(set(normalize.DETAIL_FIELDS) & set(unpublished[0]))
+
     def test_normalize_activity_returns_empty_when_missing_required_fields(self) -> None:
         self.assertEqual(normalize._normalize_activity({}, {}, "strava"), {})
         self.assertEqual(normalize._normalize_activity({"id": "x"}, {}, "strava"), {})
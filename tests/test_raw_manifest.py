@@ -0,0 +1,90 @@
+import os
+import sys
+import tempfile
+import types
+import unittest
+from unittest import mock
+
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SCRIPTS_DIR = os.path.join(ROOT_DIR, "scripts")
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
+
+yaml_stub = types.ModuleType("yaml")
+yaml_stub.safe_load = lambda *_args, **_kwargs: {}
+sys.modules.setdefault("yaml", yaml_stub)
+
+import raw_manifest  # noqa: E402
+from utils import read_json, write_json  # noqa: E402
+
+
+class RawManifestTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.raw_dir = os.path.join(self._tmp.name, "strava")
+        os.makedirs(self.raw_dir)
+        self.manifest_path = raw_manifest.manifest_path_for(self.raw_dir)
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def test_digest_ignores_key_order(self) -> None:
+        first, _ = raw_manifest.payload_digest({"a": 1, "b": [1, 2]})
+        second, _ = raw_manifest.payload_digest({"b": [1, 2], "a": 1})
+        self.assertEqual(first, second)
+
+    def test_unchanged_activity_is_skipped_without_reading_file(self) -> None:
+        manifest = raw_manifest.RawManifest.load(self.manifest_path)
+        payload = {"id": 1, "distance": 1000.0}
+
+        self.assertTrue(raw_manifest.write_raw_activity(self.raw_dir, manifest, "1", payload, 100))
+        with mock.patch("raw_manifest.read_json") as read_mock, mock.patch(
+            "raw_manifest.write_json"
+        ) as write_mock:
+            self.assertFalse(raw_manifest.write_raw_activity(self.raw_dir, manifest, "1", dict(payload)))
+        read_mock.assert_not_called()
+        write_mock.assert_not_called()
+        self.assertEqual(manifest.counts, {"new": 1, "updated": 0})
+
+        self.assertTrue(
+            raw_manifest.write_raw_activity(self.raw_dir, manifest, "1", {"id": 1, "distance": 1200.0})
+        )
+        self.assertEqual(manifest.counts, {"new": 1, "updated": 1})
+        self.assertEqual(manifest.get("1")["start_ts"], 100)
+
+    def test_legacy_file_is_adopted_without_rewrite(self) -> None:
+        payload = {"id": 7, "name": "Run"}
+        write_json(os.path.join(self.raw_dir, "7.json"), payload)
+        manifest = raw_manifest.RawManifest.load(self.manifest_path)
+
+        with mock.patch("raw_manifest.write_json") as write_mock:
+            self.assertFalse(raw_manifest.write_raw_activity(self.raw_dir, manifest, "7", payload))
+        write_mock.assert_not_called()
+        self.assertEqual(manifest.ids(), {"7"})
+        self.assertEqual(manifest.counts, {"new": 0, "updated": 0})
+
+    def test_missing_file_for_indexed_activity_is_rewritten(self) -> None:
+        manifest = raw_manifest.RawManifest.load(self.manifest_path)
+        payload = {"id": 3}
+        raw_manifest.write_raw_activity(self.raw_dir, manifest, "3", payload)
+        os.remove(os.path.join(self.raw_dir, "3.json"))
+
+        self.assertTrue(raw_manifest.write_raw_activity(self.raw_dir, manifest, "3", payload))
+        self.assertTrue(os.path.exists(os.path.join(self.raw_dir, "3.json")))
+
+    def test_save_round_trips_and_ignores_unknown_versions(self) -> None:
+        manifest = raw_manifest.RawManifest.load(self.manifest_path)
+        raw_manifest.write_raw_activity(self.raw_dir, manifest, "5", {"id": 5}, 55)
+        manifest.save()
+
+        reloaded = raw_manifest.RawManifest.load(self.manifest_path)
+        self.assertEqual(reloaded.ids(), {"5"})
+        self.assertEqual(reloaded.get("5")["start_ts"], 55)
+
+        write_json(self.manifest_path, {"version": 99, "entries": {"5": {}}})
+        self.assertEqual(raw_manifest.RawManifest.load(self.manifest_path).ids(), set())
+
+
+if __name__ == "__main__":
+    unittest.main()
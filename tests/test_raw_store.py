@@ -0,0 +1,136 @@
+import os
+import sys
+import tempfile
+import types
+import unittest
+
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SCRIPTS_DIR = os.path.join(ROOT_DIR, "scripts")
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
+
+yaml_stub = types.ModuleType("yaml")
+yaml_stub.safe_load = lambda *_args, **_kwargs: {}
+sys.modules.setdefault("yaml", yaml_stub)
+
+import raw_store  # noqa: E402
+from utils import write_json  # noqa: E402
+
+
+class SegmentedRawStoreTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.raw_dir = os.path.join(self._tmp.name, "strava")
+        os.makedirs(self.raw_dir)
+
+    def test_last_write_wins_and_tombstones_survive_reopen(self) -> None:
+        store = raw_store.SegmentedRawStore(self.raw_dir)
+        store.put("1", {"id": 1, "name": "Morning"})
+        store.put("2", {"id": 2})
+        store.put("1", {"id": 1, "name": "Renamed"})
+        self.assertTrue(store.delete("2"))
+        self.assertFalse(store.delete("2"))
+        store.close()
+
+        reopened = raw_store.SegmentedRawStore(self.raw_dir)
+        self.assertEqual(reopened.ids(), {"1"})
+        self.assertEqual(reopened.get("1"), {"id": 1, "name": "Renamed"})
+        self.assertEqual(list(reopened.items()), [("1", {"id": 1, "name": "Renamed"})])
+
+    def test_unindexed_tail_is_replayed_and_torn_line_dropped(self) -> None:
+        store = raw_store.SegmentedRawStore(self.raw_dir)
+        store.put("1", {"id": 1})
+        store.flush()
+        # Appended but the index was never saved, then a crash mid-append.
+        store.put("2", {"id": 2})
+        store.delete("1")
+        store._handle.write(b'{"id":"3","payl')
+        store._handle.close()
+
+        reopened = raw_store.SegmentedRawStore(self.raw_dir)
+        self.assertEqual(reopened.ids(), {"2"})
+        reopened.put("4", {"id": 4})
+        reopened.close()
+        os.remove(reopened.index_path)
+
+        rebuilt = raw_store.SegmentedRawStore(self.raw_dir)
+        self.assertEqual({key: rebuilt.get(key) for key in rebuilt.ids()}, {"2": {"id": 2}, "4": {"id": 4}})
+
+    def test_read_raw_activities_leaves_a_torn_store_untouched(self) -> None:
+        store = raw_store.SegmentedRawStore(self.raw_dir)
+        store.put("1", {"id": 1})
+        store.flush()
+        store.put("2", {"id": 2})
+        store._handle.write(b'{"id":"3","payl')
+        store._handle.close()
+        # A sealed segment the index does not know, as left by an interrupted compaction.
+        write_json(os.path.join(store.root, raw_store._segment_name((0, 1))), {"id": "9"})
+
+        def snapshot():
+            root = store.root
+            return {name: open(os.path.join(root, name), "rb").read() for name in sorted(os.listdir(root))}
+
+        before = snapshot()
+        self.assertEqual(dict(raw_store.read_raw_activities(self.raw_dir)), {"1": {"id": 1}, "2": {"id": 2}})
+        self.assertEqual(snapshot(), before)
+        with self.assertRaises(RuntimeError):
+            raw_store.SegmentedRawStore(self.raw_dir, read_only=True).put("4", {"id": 4})
+
+    def test_shared_read_only_store_does_not_recover_or_migrate(self) -> None:
+        store = raw_store.SegmentedRawStore(self.raw_dir)
+        store.put("1", {"id": 1})
+        store._handle.write(b'{"id":"2","payl')
+        store._handle.close()
+        write_json(os.path.join(self.raw_dir, "7.json"), {"id": 7})
+        segment = os.path.join(store.root, raw_store._segment_name((1, 0)))
+        size = os.path.getsize(segment)
+
+        opened = raw_store.open_raw_store(self.raw_dir, raw_store.LAYOUT_SEGMENTS, reload=True, read_only=True)
+        opened.close()
+        raw_store.forget_raw_store(self.raw_dir)
+
+        self.assertEqual(opened.ids(), {"1"})
+        self.assertEqual(os.path.getsize(segment), size)
+        self.assertTrue(os.path.exists(os.path.join(self.raw_dir, "7.json")))
+        self.assertFalse(os.path.exists(store.index_path))
+
+    def test_legacy_files_are_migrated_into_segments(self) -> None:
+        write_json(os.path.join(self.raw_dir, "7.json"), {"id": 7})
+        write_json(os.path.join(self.raw_dir, "8.json"), {"id": 8})
+        self.assertEqual(dict(raw_store.read_raw_activities(self.raw_dir)), {"7": {"id": 7}, "8": {"id": 8}})
+
+        store = raw_store.SegmentedRawStore(self.raw_dir)
+        store.close()
+
+        self.assertEqual(store.counts["migrated"], 2)
+        self.assertEqual(sorted(os.listdir(self.raw_dir)), ["segments"])
+        self.assertEqual(dict(raw_store.read_raw_activities(self.raw_dir)), {"7": {"id": 7}, "8": {"id": 8}})
+
+    def test_background_compaction_keeps_writes_made_meanwhile(self) -> None:
+        store = raw_store.SegmentedRawStore(self.raw_dir, segment_max_bytes=200)
+        for version in range(5):
+            for activity_id in range(10):
+                store.put(str(activity_id), {"id": activity_id, "version": version})
+        store.delete("9")
+        store.flush()
+        segments_before = len(store.segment_bytes)
+        garbage_before = store.garbage_bytes()
+
+        self.assertTrue(store.maybe_compact(background=True, min_garbage_bytes=1, min_garbage_ratio=0.1))
+        store.put("0", {"id": 0, "version": "after"})
+        store.close()
+
+        self.assertEqual(store.counts["compactions"], 1)
+        self.assertLess(len(store.segment_bytes), segments_before)
+        reopened = raw_store.SegmentedRawStore(self.raw_dir)
+        self.assertEqual(reopened.ids(), {str(activity_id) for activity_id in range(9)})
+        self.assertEqual(reopened.get("0"), {"id": 0, "version": "after"})
+        self.assertEqual(reopened.get("5"), {"id": 5, "version": 4})
+        # Only the copy of "0" superseded during compaction is left as garbage.
+        self.assertLess(reopened.garbage_bytes(), garbage_before // 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+import urllib.error
+import urllib.request
+
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SCRIPTS_DIR = os.path.join(ROOT_DIR, "scripts")
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
+
+import strava_webhook  # noqa: E402
+
+
+def _event(object_id, aspect_type="create", object_type="activity", owner_id=42, **updates):
+    return {
+        "object_type": object_type,
+        "object_id": object_id,
+        "aspect_type": aspect_type,
+        "owner_id": owner_id,
+        "subscription_id": 7,
+        "event_time": 1_770_000_000,
+        "updates": updates,
+    }
+
+
+class StravaWebhookTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.queue_path = os.path.join(self._tmp.name, "data", "webhook_queue.jsonl")
+
+    def test_receiver_validates_subscription_and_queues_replayed_events(self) -> None:
+        queue = strava_webhook.EventQueue(self.queue_path)
+        with strava_webhook.WebhookReceiver(queue, "secret-token") as receiver:
+            url = f"{receiver.base_url}/webhook?hub.mode=subscribe&hub.verify_token=secret-token&hub.challenge=abc"
+            with urllib.request.urlopen(url, timeout=5) as resp:
+                self.assertEqual(json.loads(resp.read()), {"hub.challenge": "abc"})
+            with self.assertRaises(urllib.error.HTTPError) as ctx:
+                urllib.request.urlopen(url.replace("secret-token", "wrong"), timeout=5)
+            self.assertEqual(ctx.exception.code, 403)
+
+            statuses = strava_webhook.replay_events(
+                receiver.base_url,
+                [_event(1), _event(1, "update", title="Renamed"), {"object_type": "route"}, _event(2, "delete")],
+            )
+
+        self.assertEqual(statuses, [200, 200, 400, 200])
+        self.assertEqual(receiver.counts, {"received": 4, "queued": 3, "rejected": 1})
+        events = queue.peek()
+        self.assertEqual([(item["object_id"], item["aspect_type"]) for item in events], [(1, "create"), (1, "update"), (2, "delete")])
+        self.assertEqual(events[1]["updates"], {"title": "Renamed"})
+
+    def test_claim_rotates_queue_and_ack_keeps_late_and_requeued_events(self) -> None:
+        queue = strava_webhook.EventQueue(self.queue_path)
+        queue.append(_event(1))
+        queue.append(_event(2))
+
+        claimed = queue.claim()
+        self.assertEqual([item["object_id"] for item in claimed], [1, 2])
+        self.assertFalse(os.path.exists(self.queue_path))
+        queue.append(_event(3))
+        # A receiver that opened the file just before the rotation.
+        with open(queue.processing_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(_event(4)) + "\n")
+        # Same queue claimed again after a crash returns the unacknowledged batch.
+        self.assertEqual([item["object_id"] for item in strava_webhook.EventQueue(self.queue_path).claim()][:2], [1, 2])
+
+        queue.ack(requeue=[claimed[1]])
+
+        self.assertFalse(os.path.exists(queue.processing_path))
+        self.assertEqual([item["object_id"] for item in queue.peek()], [3, 2, 4])
+
+    def test_owner_ids_are_stored_as_fingerprints(self) -> None:
+        queue = strava_webhook.EventQueue(self.queue_path, owner_secret="client-secret")
+        queue.append(_event(1, owner_id=12345))
+
+        with open(self.queue_path, "r", encoding="utf-8") as f:
+            self.assertNotIn("12345", f.read())
+        event = queue.claim()[0]
+        self.assertNotIn("owner_id", event)
+        self.assertEqual(event["owner_fingerprint"], strava_webhook.owner_fingerprint(12345, "client-secret"))
+
+    def test_torn_trailing_line_is_ignored(self) -> None:
+        queue = strava_webhook.EventQueue(self.queue_path)
+        queue.append(_event(5))
+        with open(self.queue_path, "a", encoding="utf-8") as f:
+            f.write('{"object_type": "activ')
+        self.assertEqual([item["object_id"] for item in queue.claim()], [5])
+
+
+if __name__ == "__main__":
+    unittest.main()
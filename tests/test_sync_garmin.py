@@ -0,0 +1,529 @@
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import types
+import unittest
+from datetime import date, datetime, timedelta, timezone
+from unittest import mock
+
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SCRIPTS_DIR = os.path.join(ROOT_DIR, "scripts")
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
+
+yaml_stub = types.ModuleType("yaml")
+yaml_stub.safe_load = lambda *_args, **_kwargs: {}
+sys.modules.setdefault("yaml", yaml_stub)
+
+import raw_store  # noqa: E402
+import sync_garmin  # noqa: E402
+
+
+class _DetailClient:
+    """Garmin client stand-in whose `get_activity` is slow, flaky or throttled on demand."""
+
+    def __init__(self, delay=0.0, throttle_first=0, hang_ids=()):
+        self.delay = delay
+        self.throttle_first = throttle_first
+        self.hang_ids = set(hang_ids)
+        self.calls = []
+        self.active = 0
+        self.peak_active = 0
+        self._lock = threading.Lock()
+
+    def get_activity(self, activity_id):
+        with self._lock:
+            self.calls.append(activity_id)
+            self.active += 1
+            self.peak_active = max(self.peak_active, self.active)
+            throttle = len(self.calls) <= self.throttle_first
+        try:
+            if throttle:
+                raise RuntimeError("429 Client Error: Too Many Requests")
+            time.sleep(1.0 if activity_id in self.hang_ids else self.delay)
+            if activity_id == "404":
+                raise RuntimeError("Not Found")
+            return {"summaryDTO": {"movingDuration": 600.0 + int(activity_id)}}
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+def _activities(*ids, moving_time=0.0):
+    return [{"id": str(activity_id), "moving_time": moving_time} for activity_id in ids]
+
+
+class GarminDurationEnrichmentTests(unittest.TestCase):
+    def test_page_candidates_resolve_concurrently_within_worker_bound(self) -> None:
+        client = _DetailClient(delay=0.05)
+        enricher = sync_garmin._DurationEnricher(client, workers=4, timeout_seconds=5)
+        page = _activities(1, 2, 3, 4, 5, 6, 7, 8) + _activities(9, moving_time=1200.0) + _activities(404)
+        try:
+            started = time.monotonic()
+            enriched = enricher.enrich(page)
+            elapsed = time.monotonic() - started
+        finally:
+            enricher.close()
+
+        self.assertLess(elapsed, 0.4)
+        self.assertEqual(client.peak_active, 4)
+        self.assertNotIn("9", client.calls)
+        self.assertEqual([item["moving_time"] for item in enriched[:3]], [601.0, 602.0, 603.0])
+        self.assertEqual(enriched[8]["moving_time"], 1200.0)
+        self.assertEqual(enriched[9]["moving_time"], 0.0)
+        summary = enricher.summary()
+        self.assertEqual((summary["attempted"], summary["enriched"]), (9, 8))
+        self.assertEqual(summary["missing"], 1)
+        self.assertGreater(summary["latency_seconds_avg"], 0.0)
+
+    def test_rate_limit_pauses_all_workers_and_retries(self) -> None:
+        client = _DetailClient(throttle_first=1)
+        enricher = sync_garmin._DurationEnricher(client, workers=2, timeout_seconds=5, backoff_seconds=0.2)
+        try:
+            started = time.monotonic()
+            enriched = enricher.enrich(_activities(1, 2))
+            elapsed = time.monotonic() - started
+        finally:
+            enricher.close()
+
+        self.assertGreaterEqual(elapsed, 0.2)
+        self.assertEqual([item["moving_time"] for item in enriched], [601.0, 602.0])
+        self.assertEqual(enricher.stats["rate_limited"], 1)
+        self.assertEqual(enricher.stats["enriched"], 2)
+
+    def test_slow_call_is_given_up_after_timeout(self) -> None:
+        client = _DetailClient(hang_ids={"2"})
+        enricher = sync_garmin._DurationEnricher(client, workers=2, timeout_seconds=0.2)
+        try:
+            enriched = enricher.enrich(_activities(1, 2))
+        finally:
+            enricher.close()
+
+        self.assertEqual([item["moving_time"] for item in enriched], [601.0, 0.0])
+        self.assertEqual(enricher.stats["timed_out"], 1)
+
+    def test_timed_out_call_keeps_its_worker_and_is_not_retried(self) -> None:
+        client = _DetailClient(hang_ids={"1"})
+        original = client.get_activity
+
+        def throttled_after_hang(activity_id):
+            original(activity_id)
+            raise RuntimeError("429 Client Error: Too Many Requests")
+
+        client.get_activity = throttled_after_hang
+        enricher = sync_garmin._DurationEnricher(client, workers=1, timeout_seconds=0.2, backoff_seconds=0)
+        try:
+            enriched = enricher.enrich(_activities(1, 2, 3))
+        finally:
+            enricher.close()
+        time.sleep(1.2)
+
+        self.assertEqual([item["moving_time"] for item in enriched], [0.0, 0.0, 0.0])
+        self.assertEqual(client.calls, ["1"])
+        self.assertEqual(enricher.stats["timed_out"], 1)
+        self.assertEqual(enricher.stats["skipped"], 2)
+
+    def test_cache_limits_each_activity_to_one_lookup_across_runs(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache_path = os.path.join(tmpdir, "data", "duration_cache_garmin.json")
+            page = _activities(1, 404, 7)
+            client = _DetailClient(throttle_first=0, hang_ids={"7"})
+
+            first = sync_garmin._DurationEnricher(
+                client, workers=2, timeout_seconds=0.2, cache=sync_garmin._DurationCache.load(cache_path)
+            )
+            try:
+                first.enrich(page)
+            finally:
+                first.close()
+            first.cache.save()
+            stored = sync_garmin.read_json(cache_path)["entries"]
+            self.assertEqual(stored["1"]["moving_time"], 601.0)
+            self.assertEqual(stored["1"]["endpoint"], "get_activity")
+            self.assertIsNone(stored["404"]["moving_time"])
+            self.assertNotIn("7", stored)
+
+            client.calls.clear()
+            client.hang_ids.clear()
+            second = sync_garmin._DurationEnricher(
+                client, workers=2, cache=sync_garmin._DurationCache.load(cache_path)
+            )
+            try:
+                enriched = second.enrich(page)
+            finally:
+                second.close()
+
+        self.assertEqual(client.calls, ["7"])
+        self.assertEqual([item["moving_time"] for item in enriched], [601.0, 0.0, 607.0])
+        self.assertEqual(second.stats["cache_hits"], 2)
+
+
+
+NOW = datetime(2026, 2, 13, 12, tzinfo=timezone.utc)
+
+
+class _FakeGarmin:
+    """Offset and date-range listings over a fixed activity list (one every `spacing_days`)."""
+
+    def __init__(self, count, spacing_days=5, with_ranges=True, throttle_ranges=(), throttle_offsets=()):
+        self.activities = []
+        for index in range(count):
+            start = NOW - timedelta(days=1 + index * spacing_days)
+            stamp = start.strftime("%Y-%m-%d %H:%M:%S")
+            self.activities.append(
+                {"activityId": 5000 + index, "startTimeGMT": stamp, "startTimeLocal": stamp, "duration": 1800.0}
+            )
+        self.throttle_ranges = set(throttle_ranges)
+        self.throttle_offsets = set(throttle_offsets)
+        self.range_calls = []
+        self.offset_calls = []
+        if not with_ranges:
+            self.get_activities_by_date = None
+
+    def get_activities(self, start, limit):
+        self.offset_calls.append((start, limit))
+        if start in self.throttle_offsets:
+            raise RuntimeError("429 Too Many Requests")
+        return self.activities[start : start + limit]
+
+    def get_activities_by_date(self, startdate, enddate):
+        self.range_calls.append((startdate, enddate))
+        if startdate in self.throttle_ranges:
+            raise RuntimeError("429 Too Many Requests")
+        return [
+            item
+            for item in self.activities
+            if startdate <= item["startTimeLocal"][:10] <= enddate
+        ]
+
+
+class GarminRangeSyncTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.raw_dir = os.path.join(self._tmp.name, "raw")
+        os.makedirs(self.raw_dir)
+        self.state_path = os.path.join(self._tmp.name, "backfill_state_garmin.json")
+
+    def _sync(self, client, garmin_cfg=None, sync_cfg=None):
+        config = {
+            "sync": dict({"start_date": "2025-01-01", "recent_days": 7, "per_page": 20}, **(sync_cfg or {})),
+            "garmin": dict({"range_days": 200, "backfill_workers": 2}, **(garmin_cfg or {})),
+        }
+        with (
+            mock.patch("sync_garmin.RAW_DIR", self.raw_dir),
+            mock.patch("sync_garmin.STATE_PATH", self.state_path),
+            mock.patch("sync_garmin.ensure_dir"),
+            mock.patch("sync_garmin.utc_now", return_value=NOW),
+        ):
+            enricher = sync_garmin._DurationEnricher(client, workers=1)
+            try:
+                return sync_garmin._sync_with_client(
+                    config, client, enricher, sync_garmin._raw_manifest(reload=True), False, False
+                )
+            finally:
+                enricher.close()
+
+    def test_split_date_ranges_covers_history_newest_first(self) -> None:
+        ranges = sync_garmin._split_date_ranges(date(2025, 1, 1), date(2025, 1, 10), 4)
+        self.assertEqual(
+            [(item["start"], item["end"]) for item in ranges],
+            [("2025-01-07", "2025-01-10"), ("2025-01-03", "2025-01-06"), ("2025-01-01", "2025-01-02")],
+        )
+
+    def test_recent_sync_is_one_range_query_and_backfill_fetches_ranges_concurrently(self) -> None:
+        client = _FakeGarmin(100)
+        summary = self._sync(client)
+
+        self.assertEqual(summary["backfill_mode"], "range")
+        self.assertTrue(summary["backfill_completed"])
+        self.assertEqual(client.offset_calls, [])
+        self.assertEqual(client.range_calls[0], ("2026-02-05", "2026-02-14"))
+        self.assertEqual(len(client.range_calls), 1 + 3)
+        # Activities on or after 2025-01-01 only (every 5 days back from 2026-02-12).
+        expected = sum(1 for item in client.activities if item["startTimeGMT"] >= "2025-01-01")
+        self.assertEqual(len(list(raw_store.read_raw_activities(self.raw_dir))), expected)
+        self.assertIsNone(sync_garmin.read_json(self.state_path)["ranges"])
+
+    def test_rate_limited_range_is_retried_next_run_only(self) -> None:
+        client = _FakeGarmin(100, throttle_ranges={"2025-01-11"})
+        first = self._sync(client)
+
+        self.assertTrue(first["rate_limited"])
+        self.assertEqual(first["backfill_ranges_remaining"], 1)
+        state = sync_garmin.read_json(self.state_path)
+        self.assertEqual([item["start"] for item in state["ranges"] if not item["completed"]], ["2025-01-11"])
+
+        client.throttle_ranges.clear()
+        client.range_calls.clear()
+        second = self._sync(client)
+
+        self.assertTrue(second["backfill_completed"])
+        # The recent pass is answered by its small probe; only the open range is queried.
+        self.assertEqual(client.range_calls, [("2025-01-11", "2025-07-29")])
+
+    def test_falls_back_to_offset_paging_without_range_method(self) -> None:
+        client = _FakeGarmin(30, with_ranges=False)
+        summary = self._sync(client)
+
+        self.assertEqual(summary["backfill_mode"], "offset")
+        self.assertTrue(summary["backfill_completed"])
+        self.assertEqual(client.range_calls, [])
+        # The two recent activities are not fetched again by the backfill pass.
+        self.assertEqual(summary["fetched"], 30)
+
+    def test_offset_backfill_resumes_from_timestamp_cursor_after_new_uploads(self) -> None:
+        client = _FakeGarmin(60, spacing_days=2, with_ranges=False, throttle_offsets={40})
+        first = self._sync(client, sync_cfg={"recent_days": 0})
+        self.assertTrue(first["rate_limited"])
+        state = sync_garmin.read_json(self.state_path)
+        self.assertEqual(state["offset_hint"], 40)
+        self.assertEqual(state["cursor_ids"], ["5039"])
+
+        # Three uploads land at the front; every stored offset now points 3 items too early.
+        for index in range(3):
+            stamp = (NOW - timedelta(hours=index + 1)).strftime("%Y-%m-%d %H:%M:%S")
+            client.activities.insert(0, {"activityId": 9000 + index, "startTimeGMT": stamp, "startTimeLocal": stamp, "duration": 60.0})
+        client.throttle_offsets.clear()
+        written = []
+        with mock.patch("sync_garmin._write_activity", side_effect=lambda item: written.append(item["id"]) or True):
+            second = self._sync(client, sync_cfg={"recent_days": 0})
+
+        self.assertTrue(second["backfill_completed"])
+        self.assertEqual(written, [str(5000 + index) for index in range(40, 60)])
+        self.assertNotIn("9000", written)
+
+    def test_offset_hint_past_the_end_searches_back_for_the_cursor(self) -> None:
+        client = _FakeGarmin(60, spacing_days=2, with_ranges=False, throttle_offsets={40})
+        self._sync(client, sync_cfg={"recent_days": 0})
+        self.assertEqual(sync_garmin.read_json(self.state_path)["offset_hint"], 40)
+
+        # Deleting the 25 newest activities leaves 35, so the stored hint now points past the end.
+        del client.activities[:25]
+        client.throttle_offsets.clear()
+        written = []
+        with mock.patch("sync_garmin._write_activity", side_effect=lambda item: written.append(item["id"]) or True):
+            second = self._sync(client, sync_cfg={"recent_days": 0})
+
+        self.assertTrue(second["backfill_completed"])
+        self.assertEqual(written, [str(5000 + index) for index in range(40, 60)])
+
+    def test_offset_recent_sync_stops_at_first_page_of_known_activities(self) -> None:
+        client = _FakeGarmin(100, spacing_days=0.05, with_ranges=False)
+        first = self._sync(client)
+        self.assertFalse(first["recent_sync"]["early_stopped"])
+        self.assertEqual(first["recent_sync"]["fetched"], 100)
+
+        # CI starts every run without activities/raw/ (and its manifest); only data/ is restored.
+        raw_store.forget_raw_store(self.raw_dir)
+        shutil.rmtree(self.raw_dir)
+        os.makedirs(self.raw_dir)
+        client.offset_calls.clear()
+        second = self._sync(client)
+        self.assertTrue(second["recent_sync"]["early_stopped"])
+        self.assertEqual(client.offset_calls, [(0, sync_garmin.RECENT_PROBE_SIZE)])
+        self.assertEqual(len(sync_garmin.read_json(self.state_path)["recent_digests"]), 100)
+
+        stamp = (NOW - timedelta(minutes=30)).strftime("%Y-%m-%d %H:%M:%S")
+        client.activities.insert(0, {"activityId": 9000, "startTimeGMT": stamp, "startTimeLocal": stamp, "duration": 60.0})
+        client.offset_calls.clear()
+        third = self._sync(client)
+
+        # The probe holding the new upload is not all known; the next page is.
+        probe = sync_garmin.RECENT_PROBE_SIZE
+        self.assertEqual(client.offset_calls, [(0, probe), (probe, 20)])
+        self.assertIn("9000", third["recent_sync"]["activity_ids"])
+        self.assertTrue(third["recent_sync"]["early_stopped"])
+
+
+    def test_quiet_day_costs_one_small_request_at_default_config(self) -> None:
+        client = _FakeGarmin(100, spacing_days=0.5)
+        sync_cfg = {"recent_days": 7, "per_page": 200}
+        first = self._sync(client, sync_cfg=sync_cfg)
+        self.assertTrue(first["backfill_completed"])
+
+        client.range_calls.clear()
+        client.offset_calls.clear()
+        second = self._sync(client, sync_cfg=sync_cfg)
+
+        self.assertTrue(second["recent_sync"]["early_stopped"])
+        self.assertEqual(client.range_calls, [])
+        self.assertEqual(client.offset_calls, [(0, sync_garmin.RECENT_PROBE_SIZE)])
+
+
+class GarminRequestLimiterTests(unittest.TestCase):
+    def test_calls_are_paced_and_a_transient_429_is_retried(self) -> None:
+        class _Listing:
+            calls = 0
+
+            def get_activities(self, start, limit):
+                self.calls += 1
+                if self.calls == 2:
+                    raise RuntimeError("429 Too Many Requests")
+                return [{"activityId": start}]
+
+        limiter = sync_garmin._GarminLimiter(requests_per_minute=1200, backoff_seconds=0.1, seed=1)
+        client = sync_garmin._PacedClient(_Listing(), limiter)
+        started = time.monotonic()
+        pages = [sync_garmin._fetch_page(client, offset, 1) for offset in range(4)]
+        elapsed = time.monotonic() - started
+
+        self.assertEqual([page[0]["activityId"] for page in pages], [0, 1, 2, 3])
+        # Five calls 50 ms apart plus one back-off of at least 100 ms.
+        self.assertGreaterEqual(elapsed, 0.25)
+        self.assertEqual((limiter.requests, limiter.rate_limited, limiter.consecutive), (5, 1, 0))
+
+    def test_repeated_429s_trip_out_and_persist_a_cooldown(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            state_path = os.path.join(tmpdir, "backfill_state_garmin.json")
+            login_calls = []
+
+            class _Garmin:
+                def __init__(self, *args, **kwargs):
+                    pass
+
+                def login(self, *args, **kwargs):
+                    login_calls.append(args or kwargs)
+                    raise RuntimeError("429 Too Many Requests")
+
+            garminconnect_stub = types.ModuleType("garminconnect")
+            garminconnect_stub.Garmin = _Garmin
+            config = {"garmin": {"email": "me@example.com", "password": "pw", "backoff_seconds": 0}}
+            with (
+                mock.patch.dict(sys.modules, {"garminconnect": garminconnect_stub, "garth": None}),
+                mock.patch("sync_garmin.load_config", return_value=config),
+                mock.patch("sync_garmin.STATE_PATH", state_path),
+                mock.patch("sync_garmin.SESSION_BOOTSTRAP_PATH", os.path.join(tmpdir, "bootstrap.json")),
+                mock.patch("sync_garmin.ensure_dir"),
+                mock.patch("sync_garmin._maybe_reset_for_new_account"),
+            ):
+                first = sync_garmin.sync_garmin(dry_run=False, prune_deleted=False)
+                # A 429 on login retries that variant until the limiter trips, never the others.
+                self.assertEqual(len(login_calls), sync_garmin.GARMIN_MAX_CONSECUTIVE_RATE_LIMITS)
+                self.assertEqual(len({repr(call) for call in login_calls}), 1)
+                self.assertTrue(first["rate_limited"])
+                self.assertIsNotNone(sync_garmin.read_json(state_path)["cooldown_until"])
+
+                with mock.patch("sync_garmin._load_garmin_client") as load_client:
+                    second = sync_garmin.sync_garmin(dry_run=False, prune_deleted=False)
+                load_client.assert_not_called()
+
+        self.assertTrue(second["rate_limited"])
+        self.assertIn("cool-down", second["rate_limit_message"])
+
+    def test_listing_gives_up_after_consecutive_rate_limits(self) -> None:
+        limiter = sync_garmin._GarminLimiter(backoff_seconds=0, cooldown_minutes=30)
+        client = sync_garmin._PacedClient(_FakeGarmin(5, with_ranges=False, throttle_offsets={0}), limiter)
+
+        with self.assertRaises(RuntimeError):
+            sync_garmin._fetch_page(client, 0, 5)
+
+        self.assertEqual(limiter.requests, sync_garmin.GARMIN_MAX_CONSECUTIVE_RATE_LIMITS)
+        self.assertTrue(limiter.tripped_out)
+        cooldown = datetime.fromisoformat(limiter.cooldown_until_iso())
+        self.assertGreater(cooldown, datetime.now(timezone.utc) + timedelta(minutes=29))
+
+
+    def test_requests_made_inside_one_client_call_are_each_paced(self) -> None:
+        class _Paging:
+            def __init__(self):
+                self.requests = 0
+
+            def connectapi(self, path, **kwargs):
+                self.requests += 1
+                if self.requests == 2:
+                    raise RuntimeError("429 Too Many Requests")
+                return [{"activityId": self.requests}]
+
+            def get_activities_by_date(self, start, end):
+                # garminconnect pages a date range with one request per page.
+                return [item for _page in range(3) for item in self.connectapi("/activities", params={})]
+
+        limiter = sync_garmin._GarminLimiter(requests_per_minute=1200, backoff_seconds=0)
+        client = sync_garmin._PacedClient(_Paging(), limiter)
+
+        with self.assertRaises(RuntimeError):
+            client.get_activities_by_date("2026-01-01", "2026-01-31")
+        self.assertEqual(client.get_activities_by_date("2026-01-01", "2026-01-31"), [
+            {"activityId": 3}, {"activityId": 4}, {"activityId": 5},
+        ])
+        self.assertEqual((limiter.requests, limiter.rate_limited), (5, 1))
+        # One 429 that a retry got past leaves no cool-down behind for the next run.
+        self.assertIsNone(limiter.cooldown_until_iso())
+
+
+class GarminSessionBootstrapTests(unittest.TestCase):
+    def test_successful_login_path_is_reused_on_the_next_run(self) -> None:
+        login_calls = []
+
+        class _Garmin:
+            def __init__(self, *args, **kwargs):
+                if kwargs:
+                    raise TypeError("positional arguments only")
+
+            def login(self, *args, **kwargs):
+                login_calls.append((args, kwargs))
+                if args or set(kwargs) != {"email", "password"}:
+                    raise TypeError("login(email=..., password=...)")
+
+        garminconnect_stub = types.ModuleType("garminconnect")
+        garminconnect_stub.Garmin = _Garmin
+        config = {"garmin": {"email": "me@example.com", "password": "pw"}}
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with (
+                mock.patch.dict(sys.modules, {"garminconnect": garminconnect_stub, "garth": None}),
+                mock.patch("sync_garmin.SESSION_BOOTSTRAP_PATH", os.path.join(tmpdir, "bootstrap.json")),
+            ):
+                _client, first = sync_garmin._load_garmin_client(config)
+                first_calls = len(login_calls)
+                login_calls.clear()
+                _client, second = sync_garmin._load_garmin_client(config)
+                second_calls = len(login_calls)
+
+                rotated = {"garmin": {"email": "other@example.com", "password": "pw"}}
+                _client, third = sync_garmin._load_garmin_client(rotated)
+                record = sync_garmin.read_json(os.path.join(tmpdir, "bootstrap.json"))
+
+        self.assertEqual(
+            (first["path"], first["constructor"], first["login"]),
+            ("search", "email_password_args", "credentials_kwargs"),
+        )
+        self.assertGreater(first_calls, 1)
+        self.assertEqual(second["path"], "cached")
+        self.assertEqual(second_calls, 1)
+        self.assertIn("seconds", second)
+        self.assertEqual(third["path"], "search")
+        # Only login mechanics and a key that cannot be checked against a guessed email.
+        self.assertEqual(set(record), {"key", "constructor", "login", "updated_utc", "version"})
+        self.assertNotEqual(
+            record["key"], sync_garmin._session_bootstrap_key(None, "other@example.com", "guess", False)
+        )
+
+    def test_dry_run_does_not_record_the_login_path(self) -> None:
+        class _Garmin:
+            def __init__(self, *args, **kwargs):
+                pass
+
+            def login(self, *args, **kwargs):
+                pass
+
+        garminconnect_stub = types.ModuleType("garminconnect")
+        garminconnect_stub.Garmin = _Garmin
+        config = {"garmin": {"email": "me@example.com", "password": "pw"}}
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "bootstrap.json")
+            with (
+                mock.patch.dict(sys.modules, {"garminconnect": garminconnect_stub, "garth": None}),
+                mock.patch("sync_garmin.SESSION_BOOTSTRAP_PATH", path),
+            ):
+                _client, startup = sync_garmin._load_garmin_client(config, persist=False)
+            self.assertEqual(startup["path"], "search")
+            self.assertFalse(os.path.exists(path))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import os
+import sys
+import tempfile
+import unittest
+
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SCRIPTS_DIR = os.path.join(ROOT_DIR, "scripts")
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
+
+import sync_metrics  # noqa: E402
+
+
+class SyncMetricsTests(unittest.TestCase):
+    def test_endpoint_label_collapses_numeric_ids(self) -> None:
+        self.assertEqual(
+            sync_metrics.endpoint_label("https://www.strava.com/api/v3/activities/12345?x=1"),
+            "/api/v3/activities/{id}",
+        )
+        self.assertEqual(
+            sync_metrics.endpoint_label("http://127.0.0.1:8765/api/v3/athlete/activities"),
+            "/api/v3/athlete/activities",
+        )
+
+    def test_summary_accumulates_histogram_attempts_and_sleeps(self) -> None:
+        metrics = sync_metrics.SyncMetrics("strava")
+        metrics.observe_response("/a", 0.04, 429, 10)
+        metrics.observe_response("/a", 0.3, 200, 90)
+        metrics.observe_response("/a", 45.0, "network_error")
+        metrics.record_call("/a", 3, ok=True)
+        metrics.record_retry_sleep("rate_limited", 1.0)
+        metrics.record_retry_sleep("network_error", 2.0)
+
+        summary = metrics.summary(limiter_sleep_seconds=4.5)
+        stats = summary["endpoints"]["/a"]
+
+        self.assertEqual(stats["statuses"], {"200": 1, "429": 1, "network_error": 1})
+        self.assertEqual(stats["bytes_received"], 100)
+        self.assertEqual((stats["calls"], stats["attempts"], stats["failed_calls"]), (1, 3, 0))
+        self.assertEqual(stats["latency_buckets"]["0.05"], 1)
+        self.assertEqual(stats["latency_buckets"]["0.5"], 2)
+        self.assertEqual(stats["latency_buckets"]["30.0"], 2)
+        self.assertEqual(stats["latency_buckets"]["+Inf"], 3)
+        self.assertEqual(summary["retry_sleep_seconds_total"], 3.0)
+        self.assertEqual(summary["limiter_sleep_seconds"], 4.5)
+
+    def test_write_prometheus_emits_textfile_format(self) -> None:
+        metrics = sync_metrics.SyncMetrics("strava")
+        metrics.observe_response("/api/v3/athlete", 0.2, 200, 32)
+        metrics.record_call("/api/v3/athlete", 1, ok=True)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "metrics", "sync.prom")
+            metrics.write_prometheus(path, limiter_sleep_seconds=1.5)
+            with open(path, "r", encoding="utf-8") as f:
+                text = f.read()
+
+        self.assertIn("# TYPE activity_sync_request_duration_seconds_bucket_last_run gauge", text)
+        self.assertIn(
+            'activity_sync_request_duration_seconds_bucket_last_run{source="strava",endpoint="/api/v3/athlete",le="0.25"} 1',
+            text,
+        )
+        self.assertIn('activity_sync_limiter_sleep_seconds_last_run{source="strava"} 1.5', text)
+        # Values reset every run, so nothing may claim to be a cumulative type.
+        types_ = {line.rsplit(" ", 1)[1] for line in text.splitlines() if line.startswith("# TYPE ")}
+        self.assertEqual(types_, {"gauge"})
+        self.assertTrue(text.endswith("\n"))
+
+
+if __name__ == "__main__":
+    unittest.main()
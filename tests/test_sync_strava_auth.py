@@ -112,6 +112,26 @@ class SyncStravaAuthTests(unittest.TestCase):
         self.assertEqual(calls, ["cached-stale-token", "configured-token"])
         self.assertEqual(saved_payloads[0]["refresh_token"], "rotated-token")
 
+    def test_request_json_with_retry_routes_through_client_session(self) -> None:
+        class _FakePool:
+            num_connections = 1
+
+        pool = _FakePool()
+        response = _MockResponse(200, {"id": 7})
+        response.raw = types.SimpleNamespace(_pool=pool)
+        session = mock.Mock()
+        session.request.return_value = response
+        client = sync_strava.StravaClient(session=session)
+
+        with mock.patch("sync_strava.requests.request") as request_mock:
+            for _ in range(3):
+                payload = sync_strava._fetch_athlete("token", limiter=None, client=client)
+
+        self.assertEqual(payload, {"id": 7})
+        request_mock.assert_not_called()
+        self.assertEqual(session.request.call_count, 3)
+        self.assertEqual(client.connection_stats(), {"requests": 3, "opened": 1, "reused": 2})
+
     def test_save_token_cache_persists_refresh_token(self) -> None:
         with tempfile.TemporaryDirectory() as tmpdir:
             token_cache = os.path.join(tmpdir, ".strava_token.json")
@@ -127,6 +147,39 @@ class SyncStravaAuthTests(unittest.TestCase):
                 payload = sync_strava._load_token_cache()
                 self.assertEqual(payload.get("refresh_token"), "r")
 
+    def test_identity_verification_is_cached_until_ttl_or_credentials_change(self) -> None:
+        config = {
+            "strava": {"client_id": "1", "client_secret": "s", "refresh_token": "r"},
+            "sync": {"identity_cache_ttl_hours": 24},
+        }
+        verified_at = datetime(2026, 2, 13, 6, tzinfo=timezone.utc)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            athlete_path = os.path.join(tmpdir, "athletes_strava.json")
+            with (
+                mock.patch("sync_strava.ATHLETE_PATH", athlete_path),
+                mock.patch("sync_strava.LEGACY_ATHLETE_PATH", athlete_path + ".legacy"),
+                mock.patch("sync_strava.ensure_dir"),
+                mock.patch("sync_strava.utc_now", return_value=verified_at),
+                mock.patch("sync_strava._fetch_athlete", return_value={"id": 42}) as athlete_mock,
+                mock.patch("sync_strava._has_existing_data", return_value=False),
+            ):
+                self.assertFalse(sync_strava._identity_verification_cached(config))
+                sync_strava._maybe_reset_for_new_athlete(config, "token", 200, None)
+            athlete_mock.assert_called_once()
+
+            def _cached_at(now, cfg=config):
+                with (
+                    mock.patch("sync_strava.ATHLETE_PATH", athlete_path),
+                    mock.patch("sync_strava.utc_now", return_value=now),
+                ):
+                    return sync_strava._identity_verification_cached(cfg)
+
+            later = datetime(2026, 2, 14, 5, tzinfo=timezone.utc)
+            self.assertTrue(_cached_at(later))
+            self.assertFalse(_cached_at(datetime(2026, 2, 14, 7, tzinfo=timezone.utc)))
+            rotated = {"strava": dict(config["strava"], refresh_token="r2"), "sync": config["sync"]}
+            self.assertFalse(_cached_at(later, rotated))
+
 
 if __name__ == "__main__":
     unittest.main()
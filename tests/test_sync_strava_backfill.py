@@ -0,0 +1,755 @@
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import types
+import unittest
+from datetime import datetime, timezone
+from unittest import mock
+
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SCRIPTS_DIR = os.path.join(ROOT_DIR, "scripts")
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
+
+
+requests_stub = types.ModuleType("requests")
+
+
+class _RequestException(Exception):
+    pass
+
+
+class _HTTPError(_RequestException):
+    def __init__(self, message: str, response=None):
+        super().__init__(message)
+        self.response = response
+
+
+def _default_request(*_args, **_kwargs):
+    raise NotImplementedError("requests.request stub was not patched")
+
+
+requests_stub.RequestException = _RequestException
+requests_stub.HTTPError = _HTTPError
+requests_stub.request = _default_request
+sys.modules.setdefault("requests", requests_stub)
+
+yaml_stub = types.ModuleType("yaml")
+yaml_stub.safe_load = lambda *_args, **_kwargs: {}
+sys.modules.setdefault("yaml", yaml_stub)
+
+import raw_store  # noqa: E402
+import sync_strava  # noqa: E402
+
+
+NOW = datetime(2026, 2, 13, tzinfo=timezone.utc)
+
+
+def _iso(ts: int) -> str:
+    return datetime.fromtimestamp(ts, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+class _FakeStrava:
+    """Serves a fixed activity list with Strava's after/before/page semantics.
+
+    Like the real endpoint, results are newest first unless `after` is given,
+    in which case they are oldest first.
+    """
+
+    def __init__(self, timestamps, fail_after_calls=None):
+        self.activities = [
+            {"id": 1000 + index, "start_date": _iso(ts)} for index, ts in enumerate(timestamps)
+        ]
+        self.fail_after_calls = fail_after_calls
+        self.calls = []
+        self.detail_calls = []
+        self._lock = threading.Lock()
+
+    def fetch_page(self, _token, per_page, page, after, before, _limiter, *_args, **_kwargs):
+        with self._lock:
+            self.calls.append((page, after, before))
+            if self.fail_after_calls is not None and len(self.calls) > self.fail_after_calls:
+                raise sync_strava.RateLimitExceeded("Read daily limit reached")
+        matches = [
+            activity
+            for activity in self.activities
+            if (after or 0) < sync_strava._activity_start_ts(activity) < (before or 2**62)
+        ]
+        matches.sort(key=sync_strava._activity_start_ts, reverse=after is None)
+        start = (page - 1) * per_page
+        return matches[start : start + per_page]
+
+    def fetch_detail(self, _token, activity_id, _limiter, *_args, **_kwargs):
+        with self._lock:
+            self.detail_calls.append(activity_id)
+        return {"id": int(activity_id), "calories": 500.0, "device_name": "Watch"}
+
+
+class SyncStravaBackfillTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.raw_dir = os.path.join(self._tmp.name, "raw")
+        self.state_path = os.path.join(self._tmp.name, "state.json")
+        self.rate_state_path = os.path.join(self._tmp.name, "rate_limit_state.json")
+        self.detail_queue_path = os.path.join(self._tmp.name, "detail_queue.json")
+        self.normalized_path = os.path.join(self._tmp.name, "activities_normalized.json")
+        os.makedirs(self.raw_dir)
+
+    def _stored_ids(self) -> set:
+        return {activity_id for activity_id, _payload in raw_store.read_raw_activities(self.raw_dir)}
+
+    def _run_sync(self, fake: _FakeStrava, sync_cfg: dict, prune_deleted: bool = False) -> dict:
+        base_cfg = {
+            "recent_days": 0,
+            "per_page": 2,
+            "start_date": "2020-01-01",
+            "detail_enrichment": False,
+        }
+        config = {
+            "sync": dict(base_cfg, **sync_cfg),
+            "rate_limits": {"min_interval_seconds": 0},
+        }
+        with (
+            mock.patch("sync_strava.load_config", return_value=config),
+            mock.patch("sync_strava._get_access_token", return_value="token"),
+            mock.patch("sync_strava._maybe_reset_for_new_athlete", side_effect=lambda _c, t, *_a, **_k: t),
+            mock.patch("sync_strava._fetch_page", side_effect=fake.fetch_page),
+            mock.patch("sync_strava.RAW_DIR", self.raw_dir),
+            mock.patch("sync_strava.STATE_PATH", self.state_path),
+            mock.patch("sync_strava.LEGACY_STATE_PATH", self.state_path + ".legacy"),
+            mock.patch("sync_strava.RATE_LIMIT_STATE_PATH", self.rate_state_path),
+            mock.patch("sync_strava.DETAIL_QUEUE_PATH", self.detail_queue_path),
+            mock.patch("sync_strava.NORMALIZED_PATH", self.normalized_path),
+            mock.patch("sync_strava._fetch_activity_detail", side_effect=fake.fetch_detail),
+            mock.patch("sync_strava.ensure_dir", side_effect=self._ensure_tmp_dir),
+            mock.patch("sync_strava.utc_now", return_value=NOW),
+        ):
+            return sync_strava.sync_strava(dry_run=False, prune_deleted=prune_deleted)
+
+    def _ensure_tmp_dir(self, path: str) -> None:
+        if os.path.abspath(path).startswith(self._tmp.name):
+            os.makedirs(path, exist_ok=True)
+
+    def test_split_backfill_windows_partitions_range_newest_first(self) -> None:
+        after = int(datetime(2020, 1, 1, tzinfo=timezone.utc).timestamp())
+        before = int(NOW.timestamp())
+
+        windows = sync_strava._split_backfill_windows(after, before, 4)
+
+        self.assertEqual(len(windows), 4)
+        self.assertEqual(windows[0]["before"], before)
+        self.assertEqual(windows[-1]["after"], after)
+        for newer, older in zip(windows, windows[1:]):
+            self.assertEqual(older["before"], newer["after"])
+        self.assertTrue(all(w["next_before"] == w["before"] for w in windows))
+
+    def test_split_backfill_windows_keeps_unbounded_history_in_oldest_window(self) -> None:
+        windows = sync_strava._split_backfill_windows(0, int(NOW.timestamp()), 3)
+
+        self.assertEqual(windows[-1]["after"], 0)
+        self.assertGreater(windows[-1]["before"], sync_strava.BACKFILL_FLOOR_TS)
+        self.assertEqual(windows[-1]["before"], windows[-2]["after"])
+
+    def test_parallel_backfill_fetches_every_window_and_completes(self) -> None:
+        base = int(datetime(2021, 1, 1, tzinfo=timezone.utc).timestamp())
+        timestamps = [base + day * 86400 * 60 for day in range(20)]
+        fake = _FakeStrava(timestamps)
+
+        summary = self._run_sync(fake, {"backfill_workers": 3, "backfill_windows": 4})
+
+        self.assertTrue(summary["backfill_completed"])
+        self.assertEqual(summary["fetched"], len(timestamps))
+        self.assertEqual(len(self._stored_ids()), len(timestamps))
+        self.assertEqual(summary["backfill_windows_remaining"], 0)
+        state = sync_strava.read_json(self.state_path)
+        self.assertTrue(state["completed"])
+        self.assertEqual(state["windows"], [])
+        # `after` would make Strava list oldest first; window floors are applied locally.
+        self.assertEqual({after for _page, after, _before in fake.calls}, {None})
+
+    def test_backfill_window_closes_at_its_floor_without_skipping_history(self) -> None:
+        base = int(datetime(2022, 6, 1, tzinfo=timezone.utc).timestamp())
+        fake = _FakeStrava([base + offset * 100 for offset in range(10)])
+        window = {"after": base + 250, "before": base + 900, "next_before": base + 900, "completed": False}
+
+        with mock.patch("sync_strava._fetch_page", side_effect=fake.fetch_page):
+            result = sync_strava._backfill_window(
+                {}, "token", 2, 0, window, self._limiter(), True, threading.Event()
+            )
+
+        self.assertTrue(result["exhausted"])
+        self.assertEqual(result["min_ts"], base + 300)
+        self.assertEqual(result["max_ts"], base + 800)
+        self.assertEqual(result["fetched"], 6)
+
+    def test_rate_limited_backfill_records_cursor_per_window_and_resumes(self) -> None:
+        base = int(datetime(2020, 2, 1, tzinfo=timezone.utc).timestamp())
+        timestamps = [base + day * 86400 * 100 for day in range(20)]
+
+        summary = self._run_sync(
+            _FakeStrava(timestamps, fail_after_calls=2),
+            {"backfill_workers": 1, "backfill_windows": 3},
+        )
+
+        self.assertTrue(summary["rate_limited"])
+        self.assertFalse(summary["backfill_completed"])
+        state = sync_strava.read_json(self.state_path)
+        self.assertEqual(len(state["windows"]), 3)
+        newest = state["windows"][0]
+        self.assertLess(newest["next_before"], newest["before"])
+        untouched = state["windows"][-1]
+        self.assertEqual(untouched["next_before"], untouched["before"])
+
+        resumed = _FakeStrava(timestamps)
+        summary = self._run_sync(resumed, {"backfill_workers": 2, "backfill_windows": 3})
+
+        self.assertTrue(summary["backfill_completed"])
+        self.assertEqual(len(self._stored_ids()), len(timestamps))
+        self.assertIn(newest["next_before"], {before for _page, _after, before in resumed.calls})
+
+    def test_backfill_uses_keyset_cursor_and_keeps_same_second_siblings(self) -> None:
+        base = int(datetime(2022, 6, 1, tzinfo=timezone.utc).timestamp())
+        # Two activities share a second that straddles a page edge.
+        timestamps = [base + 500, base + 400, base + 300, base + 300, base + 100]
+        fake = _FakeStrava(timestamps)
+
+        summary = self._run_sync(fake, {"backfill_workers": 1, "backfill_windows": 1})
+
+        self.assertTrue(summary["backfill_completed"])
+        self.assertEqual(len(self._stored_ids()), len(timestamps))
+        self.assertEqual({page for page, _after, _before in fake.calls}, {1})
+        befores = [before for _page, _after, before in fake.calls]
+        self.assertEqual(befores[1:3], [base + 401, base + 301])
+        self.assertEqual(summary["fetched"], len(timestamps))
+
+    def test_backfill_checkpoints_cursor_after_each_page(self) -> None:
+        base = int(datetime(2022, 6, 1, tzinfo=timezone.utc).timestamp())
+        timestamps = [base + offset * 100 for offset in range(6)]
+        saved_states = []
+
+        with mock.patch(
+            "sync_strava._save_state", side_effect=lambda state: saved_states.append(dict(state))
+        ):
+            self._run_sync(
+                _FakeStrava(timestamps, fail_after_calls=2),
+                {"backfill_workers": 1, "backfill_windows": 1},
+            )
+
+        cursors = [state["windows"][0]["next_before"] for state in saved_states[:2]]
+        self.assertEqual(cursors, [base + 401, base + 301])
+
+    def test_backfill_fetches_next_page_while_previous_page_is_written(self) -> None:
+        base = int(datetime(2022, 6, 1, tzinfo=timezone.utc).timestamp())
+        fake = _FakeStrava([base + offset * 100 for offset in range(4)])
+        second_fetch = threading.Event()
+        original_fetch = fake.fetch_page
+        original_write = sync_strava._write_activity
+        progress = []
+
+        def _fetch(*args, **kwargs):
+            if len(fake.calls) == 1:
+                second_fetch.set()
+            return original_fetch(*args, **kwargs)
+
+        def _write(activity):
+            # The first page's write only finishes once the next request is out.
+            self.assertTrue(second_fetch.wait(timeout=5))
+            return original_write(activity)
+
+        def _on_progress(update):
+            # The durable cursor may only move past activities already on disk.
+            on_disk = sync_strava._raw_store().ids()
+            progress.append((update["next_before"], on_disk))
+
+        window = {"after": base - 1, "before": base + 1000, "next_before": base + 1000}
+        with (
+            mock.patch("sync_strava._fetch_page", side_effect=_fetch),
+            mock.patch("sync_strava._write_activity", side_effect=_write),
+            mock.patch("sync_strava.RAW_DIR", self.raw_dir),
+        ):
+            result = sync_strava._backfill_window(
+                {}, "token", 2, base - 1, window, self._limiter(), False, threading.Event(),
+                on_progress=_on_progress,
+            )
+
+        self.assertTrue(result["exhausted"])
+        self.assertEqual(result["new_or_updated"], 4)
+        self.assertEqual(progress[0][0], base + 201)
+        self.assertEqual(progress[0][1], {"1002", "1003"})
+
+    def test_backfill_writer_error_propagates_without_advancing_cursor(self) -> None:
+        base = int(datetime(2022, 6, 1, tzinfo=timezone.utc).timestamp())
+        fake = _FakeStrava([base + offset * 100 for offset in range(6)])
+        saved_states = []
+
+        with (
+            mock.patch("sync_strava._write_activity", side_effect=OSError("disk full")),
+            mock.patch(
+                "sync_strava._save_state", side_effect=lambda state: saved_states.append(dict(state))
+            ),
+        ):
+            with self.assertRaises(OSError):
+                self._run_sync(fake, {"backfill_workers": 1, "backfill_windows": 1})
+
+        self.assertEqual(saved_states, [])
+
+    def test_detail_queue_drains_newest_first_within_budget_and_requeues_edits(self) -> None:
+        base = int(datetime(2022, 6, 1, tzinfo=timezone.utc).timestamp())
+        fake = _FakeStrava([base + offset * 100 for offset in range(5)])
+        cfg = {"backfill_workers": 1, "detail_enrichment": True, "detail_max_per_run": 3}
+
+        summary = self._run_sync(fake, cfg)
+
+        self.assertEqual(fake.detail_calls, ["1004", "1003", "1002"])
+        self.assertEqual(summary["detail_enrichment"]["fetched"], 3)
+        self.assertEqual(summary["detail_enrichment"]["pending"], 2)
+        self.assertEqual(summary["detail_enrichment"]["stopped"], "max_per_run")
+        detail = sync_strava.read_json(os.path.join(self.raw_dir, "details", "1004.json"))
+        self.assertEqual(detail["calories"], 500.0)
+
+        # The next run only drains what is left; an edited summary is queued again.
+        os.remove(self.state_path)
+        fake.detail_calls.clear()
+        fake.activities[4]["name"] = "Renamed"
+        summary = self._run_sync(fake, cfg)
+
+        self.assertEqual(fake.detail_calls, ["1004", "1001", "1000"])
+        self.assertEqual(summary["detail_enrichment"]["stopped"], "queue_empty")
+
+    def test_disabling_detail_enrichment_stops_publishing_detail_fields(self) -> None:
+        base = int(datetime(2022, 6, 1, tzinfo=timezone.utc).timestamp())
+        fake = _FakeStrava([base])
+        self._run_sync(fake, {"backfill_workers": 1, "detail_enrichment": True})
+        self.assertTrue(os.path.exists(self.detail_queue_path))
+
+        os.remove(self.state_path)
+        self._run_sync(fake, {"backfill_workers": 1})
+        self.assertFalse(os.path.exists(self.detail_queue_path))
+
+    def test_detail_fields_outlive_the_raw_detail_directory(self) -> None:
+        base = int(datetime(2022, 6, 1, tzinfo=timezone.utc).timestamp())
+        fake = _FakeStrava([base + offset * 100 for offset in range(3)])
+        cfg = {"backfill_workers": 1, "detail_enrichment": True}
+        self._run_sync(fake, cfg)
+        queue_state = sync_strava.read_json(self.detail_queue_path)
+        self.assertEqual(queue_state["details"]["1002"], {"calories": 500.0, "device_name": "Watch"})
+
+        # CI starts without raw details; the persisted fields keep them fetched.
+        shutil.rmtree(os.path.join(self.raw_dir, "details"))
+        os.remove(self.state_path)
+        fake.detail_calls.clear()
+        self._run_sync(fake, cfg)
+        self.assertEqual(fake.detail_calls, [])
+
+        # A queue written before the fields were persisted fetches them again.
+        queue_state = sync_strava.read_json(self.detail_queue_path)
+        del queue_state["details"]
+        sync_strava.write_json(self.detail_queue_path, queue_state)
+        os.remove(self.state_path)
+        self._run_sync(fake, cfg)
+        self.assertEqual(fake.detail_calls, ["1002", "1001", "1000"])
+
+    def test_detail_queue_tolerates_legacy_entries_on_failure(self) -> None:
+        queue_state = {"pending": {"7": "legacy"}, "fetched": {}}
+
+        with mock.patch("sync_strava._fetch_activity_detail", side_effect=sync_strava.requests.RequestException("boom")):
+            summary, _token = sync_strava._drain_detail_queue({"sync": {}}, "token", self._limiter(), queue_state)
+
+        self.assertEqual(summary["failed"], 1)
+        self.assertEqual(queue_state["pending"]["7"], {"attempts": 1})
+
+    def test_detail_queue_stops_at_daily_read_reserve(self) -> None:
+        limiter = self._limiter()
+        limiter.read_day = 990
+        queue_state = {"pending": {"1": {"start_ts": 1, "summary_sha256": "a"}}, "fetched": {}}
+
+        with mock.patch("sync_strava._fetch_activity_detail") as fetch_mock:
+            summary, _token = sync_strava._drain_detail_queue(
+                {"sync": {"detail_daily_reserve": 10}}, "token", limiter, queue_state
+            )
+
+        fetch_mock.assert_not_called()
+        self.assertEqual(summary["stopped"], "daily_reserve")
+        self.assertEqual(summary["pending"], 1)
+
+    def test_backfill_plan_uses_density_history_and_daily_headroom(self) -> None:
+        limiter = self._limiter()
+        limiter.read_day = 600
+        limiter.daily_reserve = 100
+        day = 86400
+        windows = [
+            {"after": 0, "before": 400 * day, "next_before": 300 * day, "completed": False},
+            {"after": 400 * day, "before": 500 * day, "next_before": 450 * day, "completed": True},
+        ]
+        state = {"backfill_density": {"activities": 200, "seconds": 100 * day}}
+
+        plan = sync_strava._plan_backfill(windows, 2, limiter, state)
+
+        self.assertEqual(plan["density_source"], "backfill_history")
+        self.assertEqual(plan["estimated_activities"], 600)
+        self.assertEqual(plan["estimated_pages"], 301)
+        self.assertEqual(plan["daily_headroom"], 1000 - 600 - 2 - 100)
+        self.assertEqual(plan["daily_budget"], 898)
+        self.assertFalse(plan["fits_this_run"])
+        self.assertEqual((plan["eta_days"], plan["eta_runs"]), (1, 2))
+
+    def test_backfill_records_density_and_reserve_caps_the_run(self) -> None:
+        base = int(datetime(2022, 6, 1, tzinfo=timezone.utc).timestamp())
+        fake = _FakeStrava([base + offset * 100 for offset in range(6)])
+
+        summary = self._run_sync(fake, {"backfill_workers": 1, "backfill_windows": 1})
+
+        self.assertIsNotNone(summary["backfill_plan"])
+        density = sync_strava.read_json(self.state_path)["backfill_density"]
+        self.assertEqual(density["activities"], 6)
+        self.assertEqual(density["seconds"], int(NOW.timestamp()) - int(datetime(2020, 1, 1, tzinfo=timezone.utc).timestamp()))
+
+        limiter = self._limiter()
+        limiter.daily_reserve = 500
+        limiter.read_day = 1000 - 2 - 500
+        with self.assertRaisesRegex(sync_strava.RateLimitExceeded, "reserve"):
+            limiter.before_request("read")
+
+    def test_deletion_audit_rotates_one_slice_per_run(self) -> None:
+        now_ts = int(NOW.timestamp())
+        day = 86400
+        timestamps = [now_ts - 200 * day, now_ts - 150 * day, now_ts - 20 * day, now_ts - 10 * day]
+        cfg = {"recent_days": 7, "per_page": 50, "start_date": "2025-01-01", "deletion_audit_slice_days": 90}
+        self._run_sync(_FakeStrava(timestamps), cfg)
+        sync_strava.write_json(
+            self.normalized_path,
+            [{"id": 1000 + index, "start_date_local": _iso(ts)[:-1]} for index, ts in enumerate(timestamps)],
+        )
+
+        # 1002 (20 days ago) and 1000 (200 days ago) were deleted on Strava.
+        remaining = _FakeStrava(timestamps)
+        remaining.activities = [remaining.activities[1], remaining.activities[3]]
+        first = self._run_sync(remaining, cfg, prune_deleted=True)
+
+        self.assertEqual(first["deletion_audit"]["slice_before"], now_ts)
+        self.assertEqual(first["deletion_audit"]["slice_after"], now_ts - 90 * day)
+        self.assertEqual(first["deleted"], 1)
+        self.assertNotIn("1002", self._stored_ids())
+        self.assertIn("1000", self._stored_ids())
+        rows = sync_strava.read_json(self.normalized_path)
+        self.assertEqual(sorted(row["id"] for row in rows), [1000, 1001, 1003])
+        state = sync_strava.read_json(self.state_path)
+        self.assertEqual(state["deletion_audit"]["cursor_before"], now_ts - 90 * day)
+
+        second = self._run_sync(remaining, cfg, prune_deleted=True)
+        self.assertEqual(second["deletion_audit"]["slice_after"], now_ts - 180 * day)
+        self.assertEqual(second["deleted"], 0)
+
+        third = self._run_sync(remaining, cfg, prune_deleted=True)
+        self.assertEqual(third["deleted"], 1)
+        self.assertNotIn("1000", self._stored_ids())
+        self.assertEqual(sync_strava.read_json(self.state_path)["deletion_audit"]["cursor_before"], now_ts - 270 * day)
+
+    def test_rate_limited_deletion_audit_keeps_cursor_and_files(self) -> None:
+        now_ts = int(NOW.timestamp())
+        timestamps = [now_ts - 30 * 86400, now_ts - 20 * 86400]
+        cfg = {"recent_days": 7, "per_page": 1, "start_date": "2025-01-01"}
+        self._run_sync(_FakeStrava(timestamps), cfg)
+
+        remaining = _FakeStrava(timestamps, fail_after_calls=2)
+        remaining.activities = remaining.activities[1:]
+        summary = self._run_sync(remaining, cfg, prune_deleted=True)
+
+        self.assertTrue(summary["deletion_audit"]["rate_limited"])
+        self.assertEqual(summary["deleted"], 0)
+        self.assertIn("1000", self._stored_ids())
+        self.assertIsNone(sync_strava.read_json(self.state_path).get("deletion_audit"))
+
+    def test_webhook_queue_sync_fetches_queued_ids_and_applies_deletes(self) -> None:
+        now_ts = int(NOW.timestamp())
+        self._run_sync(_FakeStrava([now_ts - 5 * 86400, now_ts - 4 * 86400]), {"start_date": "2026-01-01"})
+        sync_strava.write_json(self.normalized_path, [{"id": 1000}, {"id": 1001}])
+        queue_path = os.path.join(self._tmp.name, "webhook_queue.jsonl")
+        queue = sync_strava.EventQueue(queue_path, owner_secret="s")
+        for object_id, aspect, owner in [
+            (2000, "create", 42),
+            (1000, "update", 42),
+            (1001, "delete", 42),
+            (3000, "create", 99),
+            (4000, "create", 42),
+        ]:
+            queue.append(
+                {"object_type": "activity", "object_id": object_id, "aspect_type": aspect, "owner_id": owner}
+            )
+        fetched = []
+
+        def _fetch_detail(_token, activity_id, _limiter, *_args, **_kwargs):
+            fetched.append(activity_id)
+            if activity_id == "4000":
+                raise sync_strava.requests.HTTPError("404", response=types.SimpleNamespace(status_code=404))
+            return {"id": int(activity_id), "start_date": _iso(now_ts - 3600), "name": "From webhook"}
+
+        config = {"sync": {"start_date": "2026-01-01", "detail_enrichment": True}, "strava": {"client_secret": "s"}}
+        with (
+            mock.patch("sync_strava.load_config", return_value=config),
+            mock.patch("sync_strava._get_access_token", return_value="token"),
+            mock.patch("sync_strava._load_athlete_fingerprint", return_value=sync_strava._athlete_fingerprint(42, "s")),
+            mock.patch("sync_strava._fetch_activity_detail", side_effect=_fetch_detail),
+            mock.patch("sync_strava.WEBHOOK_QUEUE_PATH", queue_path),
+            mock.patch("sync_strava.RAW_DIR", self.raw_dir),
+            mock.patch("sync_strava.RATE_LIMIT_STATE_PATH", self.rate_state_path),
+            mock.patch("sync_strava.DETAIL_QUEUE_PATH", self.detail_queue_path),
+            mock.patch("sync_strava.NORMALIZED_PATH", self.normalized_path),
+            mock.patch("sync_strava.ensure_dir", side_effect=self._ensure_tmp_dir),
+            mock.patch("sync_strava.utc_now", return_value=NOW),
+        ):
+            summary = sync_strava.sync_strava_events(dry_run=False)
+
+        self.assertEqual(fetched, ["2000", "1000", "4000"])
+        self.assertEqual(summary["foreign_events"], 1)
+        self.assertEqual((summary["fetched"], summary["deleted"]), (2, 2))
+        self.assertEqual(sorted(self._stored_ids()), ["1000", "2000"])
+        self.assertEqual(sync_strava.read_json(self.normalized_path), [{"id": 1000}])
+        self.assertTrue(os.path.exists(os.path.join(self.raw_dir, "details", "2000.json")))
+        self.assertEqual(sync_strava.read_json(self.detail_queue_path)["pending"], {})
+        self.assertEqual(queue.peek(), [])
+
+    def test_webhook_detail_is_stored_in_the_listing_summary_shape(self) -> None:
+        listed = {
+            "id": 5,
+            "resource_state": 2,
+            "name": "Lunch Run",
+            "start_date": "2026-02-12T12:00:00Z",
+            "average_heartrate": 151.0,
+            "athlete": {"id": 42, "resource_state": 1},
+            "map": {"id": "a5", "summary_polyline": "abc", "resource_state": 2},
+        }
+        detail = dict(listed, resource_state=3, calories=612.0, description="Easy", device_name="Watch", laps=[])
+        detail["map"] = {"id": "a5", "polyline": "abcdef", "summary_polyline": "abc", "resource_state": 3}
+
+        summary = sync_strava._summary_from_detail(detail)
+
+        self.assertEqual(summary, listed)
+        self.assertEqual(
+            sync_strava._detail_enrichment_fields(detail),
+            {"calories": 612.0, "average_heartrate": 151.0, "device_name": "Watch"},
+        )
+
+    def test_recent_sync_plan_switches_between_incremental_and_edit_sweep(self) -> None:
+        cfg = {"incremental_overlap_hours": 2, "edit_sweep_interval_days": 7}
+        hwm = int(NOW.timestamp()) - 86400
+        recent_sweep = {"high_water_ts": hwm, "last_edit_sweep_utc": "2026-02-10T00:00:00+00:00"}
+        stale_sweep = {"high_water_ts": hwm, "last_edit_sweep_utc": "2026-02-01T00:00:00+00:00"}
+
+        self.assertEqual(
+            sync_strava._recent_sync_plan(cfg, recent_sweep, NOW), ("incremental", hwm - 7200)
+        )
+        self.assertEqual(sync_strava._recent_sync_plan(cfg, stale_sweep, NOW), ("edit_sweep", None))
+        self.assertEqual(sync_strava._recent_sync_plan(cfg, {}, NOW), ("edit_sweep", None))
+        self.assertEqual(
+            sync_strava._recent_sync_plan(dict(cfg, incremental=False), recent_sweep, NOW),
+            ("edit_sweep", None),
+        )
+        # Hand-edited or older timestamps without an offset are read as UTC.
+        for naive in ("2026-02-10T00:00:00", "2026-02-10T00:00:00Z"):
+            self.assertEqual(
+                sync_strava._recent_sync_plan(cfg, dict(recent_sweep, last_edit_sweep_utc=naive), NOW),
+                ("incremental", hwm - 7200),
+            )
+
+    def test_steady_state_incremental_run_is_a_single_request(self) -> None:
+        now_ts = int(NOW.timestamp())
+        timestamps = [now_ts - 3 * 86400, now_ts - 2 * 86400, now_ts - 3600]
+        cfg = {"recent_days": 7, "per_page": 50, "start_date": "2026-01-01"}
+
+        first = self._run_sync(_FakeStrava(timestamps), cfg)
+        self.assertEqual(first["recent_sync"]["mode"], "edit_sweep")
+        state = sync_strava.read_json(self.state_path)
+        self.assertEqual(state["high_water_ts"], now_ts - 3600)
+        self.assertTrue(state["completed"])
+
+        fake = _FakeStrava(timestamps)
+        second = self._run_sync(fake, cfg)
+
+        self.assertEqual(second["recent_sync"]["mode"], "incremental")
+        self.assertEqual(len(fake.calls), 1)
+        self.assertEqual(fake.calls[0][1], now_ts - 3600 - 6 * 3600)
+        self.assertEqual(second["fetched"], 1)
+
+    def _limiter(self) -> "sync_strava.RateLimiter":
+        return sync_strava.RateLimiter(
+            overall_15_limit=200,
+            overall_day_limit=2000,
+            read_15_limit=100,
+            read_day_limit=1000,
+            safety_buffer=2,
+            min_interval_seconds=0,
+        )
+
+    def test_rate_limiter_aligns_window_to_quarter_hour(self) -> None:
+        # 10:07:30 UTC -> window opened at 10:00:00 and resets at 10:15:00.
+        now = datetime(2026, 2, 13, 10, 7, 30, tzinfo=timezone.utc).timestamp()
+        with mock.patch("sync_strava.time.time", return_value=now):
+            limiter = self._limiter()
+        self.assertEqual(limiter.window_start, now - 450)
+
+        limiter.read_15 = 98
+        slept = []
+        with (
+            mock.patch("sync_strava.time.time", return_value=now),
+            mock.patch("sync_strava.time.sleep", side_effect=slept.append),
+        ):
+            limiter._sleep_until_window_reset()
+        self.assertEqual(slept, [451])
+
+    def test_rate_limit_state_rehydrates_only_open_windows(self) -> None:
+        config = {"strava": {"client_id": "123"}}
+        first_run = datetime(2026, 2, 13, 10, 2, tzinfo=timezone.utc).timestamp()
+        with (
+            mock.patch("sync_strava.RATE_LIMIT_STATE_PATH", self.rate_state_path),
+            mock.patch("sync_strava.ensure_dir"),
+            mock.patch("sync_strava.time.time", return_value=first_run),
+        ):
+            limiter = self._limiter()
+            limiter.apply_headers(
+                {
+                    "X-ReadRateLimit-Limit": "100,1000",
+                    "X-ReadRateLimit-Usage": "60,400",
+                }
+            )
+            sync_strava._save_rate_limit_state(limiter, config)
+
+        same_window = first_run + 300
+        next_window = first_run + 900
+        with (
+            mock.patch("sync_strava.RATE_LIMIT_STATE_PATH", self.rate_state_path),
+            mock.patch("sync_strava.time.time", return_value=same_window),
+        ):
+            resumed = self._limiter()
+            sync_strava._load_rate_limit_state(resumed, config)
+        self.assertEqual((resumed.read_15, resumed.read_day), (60, 400))
+
+        with (
+            mock.patch("sync_strava.RATE_LIMIT_STATE_PATH", self.rate_state_path),
+            mock.patch("sync_strava.time.time", return_value=next_window),
+        ):
+            later = self._limiter()
+            sync_strava._load_rate_limit_state(later, config)
+        self.assertEqual((later.read_15, later.read_day), (0, 400))
+
+        with (
+            mock.patch("sync_strava.RATE_LIMIT_STATE_PATH", self.rate_state_path),
+            mock.patch("sync_strava.time.time", return_value=same_window),
+        ):
+            other_app = self._limiter()
+            sync_strava._load_rate_limit_state(other_app, {"strava": {"client_id": "999"}})
+        self.assertEqual(other_app.read_day, 0)
+
+    def test_pacing_interval_bursts_then_ramps_towards_buffer(self) -> None:
+        # 10:05:00 UTC leaves 600 s in the current quarter-hour window.
+        now = datetime(2026, 2, 13, 10, 5, tzinfo=timezone.utc).timestamp()
+        with mock.patch("sync_strava.time.time", return_value=now):
+            limiter = self._limiter()
+            limiter.read_15 = 40
+            self.assertEqual(limiter.pacing_interval("read"), 0.0)
+
+            # 74/98 used: ~half way up the ramp, 24 requests left over 600 s.
+            limiter.read_15 = 74
+            expected = ((74 / 98 - 0.5) / 0.5) * 600 / 24
+            self.assertAlmostEqual(limiter.pacing_interval("read"), expected, places=3)
+            self.assertEqual(limiter.pacing_interval("overall"), 0.0)
+
+            limiter.read_15 = 97
+            self.assertEqual(limiter.pacing_interval("read"), limiter.max_interval_seconds)
+
+            limiter.min_interval_seconds = 45
+            limiter.read_15 = 10
+            self.assertEqual(limiter.pacing_interval("read"), 45)
+
+    def test_default_config_keeps_ten_second_floor_under_adaptive_pacing(self) -> None:
+        now = datetime(2026, 2, 13, 10, 5, tzinfo=timezone.utc).timestamp()
+        with (
+            mock.patch("sync_strava.RATE_LIMIT_STATE_PATH", self.rate_state_path),
+            mock.patch("sync_strava.time.time", return_value=now),
+        ):
+            limiter = sync_strava._build_limiter({})
+            self.assertEqual(limiter.pacing_interval("read"), 10.0)
+            # Even where the headroom ramp asks for less, the floor holds.
+            limiter.read_15 = 60
+            self.assertEqual(limiter.pacing_interval("read"), 10.0)
+            limiter.read_15 = 97
+            self.assertEqual(limiter.pacing_interval("read"), 30.0)
+
+    def test_rate_limiter_reports_sleep_time_and_effective_rate(self) -> None:
+        clock = [datetime(2026, 2, 13, 10, 5, tzinfo=timezone.utc).timestamp()]
+
+        def _sleep(seconds: float) -> None:
+            clock[0] += seconds
+
+        with (
+            mock.patch("sync_strava.time.time", side_effect=lambda: clock[0]),
+            mock.patch("sync_strava.time.sleep", side_effect=_sleep),
+        ):
+            limiter = self._limiter()
+            limiter.min_interval_seconds = 2
+            for _ in range(4):
+                limiter.before_request("read")
+            stats = limiter.stats()
+
+        self.assertEqual(stats["requests"], 4)
+        self.assertEqual(stats["sleep_seconds"], 6)
+        self.assertEqual(stats["effective_rate_per_min"], 40.0)
+
+    def test_rate_limiter_reserves_slots_across_threads(self) -> None:
+        limiter = sync_strava.RateLimiter(
+            overall_15_limit=1000,
+            overall_day_limit=1000,
+            read_15_limit=1000,
+            read_day_limit=12,
+            safety_buffer=2,
+            min_interval_seconds=0,
+            max_interval_seconds=0,
+        )
+        admitted = []
+        errors = []
+
+        def _worker() -> None:
+            for _ in range(5):
+                try:
+                    limiter.before_request("read")
+                    admitted.append(1)
+                except sync_strava.RateLimitExceeded as exc:
+                    errors.append(exc)
+                    return
+
+        threads = [threading.Thread(target=_worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(admitted), 10)
+        self.assertEqual(limiter.read_day, 10)
+        self.assertTrue(errors)
+
+    def test_rate_limiter_sleeps_outside_its_lock(self) -> None:
+        limiter = self._limiter()
+        limiter.min_interval_seconds = 0.5
+        limiter.before_request("read")
+        waiter = threading.Thread(target=limiter.before_request, args=("read",))
+        waiter.start()
+        time.sleep(0.05)
+
+        started = time.monotonic()
+        limiter.apply_headers({"X-ReadRateLimit-Limit": "100,1000", "X-ReadRateLimit-Usage": "7,70"})
+        stats = limiter.stats()
+        blocked = time.monotonic() - started
+        waiter.join()
+
+        self.assertLess(blocked, 0.2)
+        self.assertEqual(stats["requests"], 2)
+        self.assertEqual(limiter.read_15, 7)
+
+
+if __name__ == "__main__":
+    unittest.main()